@@ -1,2 +1,3 @@
 from . import delivery_aggregator
-from . import sale_mill
\ No newline at end of file
+from . import sale_mill
+from . import sequence_batch
@@ -1,6 +1,6 @@
 {
     'name': 'Delivery Aggregator',
-    'version': '1.0.0',
+    'version': '1.0.1',
     'category': 'Inventory',
     'summary': 'Aggregate delivery orders and generate monthly summaries',
     'description': """
@@ -15,6 +15,7 @@
         'base',
         'stock',
         'sale',
+        'sequence_batch',
     ],
     'data': [
         #Security
@@ -23,6 +24,9 @@
         #Data
         'data/delivery_sequence.xml',
         'data/delivery_cron.xml',  # Cron job untuk auto-generate monthly summary
+        'data/monthly_summary_data.xml',
+        'data/delivery_trip_occupancy_data.xml',
+        'data/delivery_fleet_data.xml',
         #Views
         'views/delivery_order_views.xml',
         'views/monthly_summary_views.xml',
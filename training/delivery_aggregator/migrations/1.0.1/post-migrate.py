@@ -0,0 +1,20 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Build the data the noupdate <function> tags only build on install"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    # Driver and vehicle records of the typed driver names and vehicle numbers,
+    # linked first so recomputing the names from the records keeps them
+    env['delivery.order']._link_fleet()
+    # Per-customer running totals of the monthly summaries
+    env['monthly.summary']._rebuild_customer_totals()
+    # Trip occupancy of the existing delivery orders
+    env['delivery.trip.occupancy']._rebuild_all()
+    # Delivery orders are numbered by batches: switch existing databases to the
+    # gap-allowed Postgres sequence
+    sequence = env.ref('delivery_aggregator.seq_delivery_order', raise_if_not_found=False)
+    if sequence and sequence.implementation != 'standard':
+        sequence.implementation = 'standard'
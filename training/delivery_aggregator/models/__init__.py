@@ -1,6 +1,9 @@
+from . import delivery_fleet
 from . import delivery_order
+from . import delivery_trip_occupancy
 from . import monthly_summary
 from . import delivery_order_tracking
+from . import delivery_tracking_log
 from . import wizard_delivery_assign
 from . import sale_order_integration
 from . import wizard_delivery_quotation
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# Hours a delivery run keeps its vehicle and driver busy, 0 (default) disables the double-booking check
+SCHEDULE_SLOT_PARAM = 'delivery_aggregator.schedule_slot_hours'
+
+
+def get_schedule_slot(env):
+    """Return the configured delivery run duration, or None when vehicles and drivers are never double-booked"""
+    hours = float(env['ir.config_parameter'].sudo().get_param(SCHEDULE_SLOT_PARAM, 0) or 0)
+    return timedelta(hours=hours) if hours > 0 else None
+
+
+def normalize_vehicle_number(vehicle_number):
+    """Normalize a plate number so 'b  1234 abc' and 'B 1234 ABC' are the same vehicle"""
+    return ' '.join(vehicle_number.split()).upper() if vehicle_number else False
+
+
+def normalize_driver_name(driver_name):
+    """Collapse the whitespace of a driver name"""
+    return ' '.join(driver_name.split()) if driver_name else False
+
+
+class DeliveryVehicle(models.Model):
+    _name = 'delivery.vehicle'
+    _description = 'Delivery Vehicle'
+    _order = 'name'
+    _sql_constraints = [
+        ('unique_name', 'unique(name)', 'A vehicle with this number already exists!')
+    ]
+
+    name = fields.Char(string='Vehicle Number', required=True, index=True)
+    active = fields.Boolean(default=True)
+    delivery_order_ids = fields.One2many('delivery.order', 'vehicle_id', string='Delivery Orders')
+
+    @api.model
+    def _get_or_create(self, vehicle_numbers):
+        """Return {normalized vehicle number: vehicle}, creating the missing vehicles in one batch"""
+        names = {normalize_vehicle_number(number) for number in vehicle_numbers if number}
+        # sudo: vehicles are shared reference data, whoever assigns them
+        vehicle_model = self.sudo().with_context(active_test=False)
+        vehicles = vehicle_model.search_fetch([('name', 'in', list(names))], ['name'])
+        vehicle_by_name = {vehicle.name: vehicle for vehicle in vehicles}
+        missing_names = sorted(names - vehicle_by_name.keys())
+        for vehicle in vehicle_model.create([{'name': name} for name in missing_names]):
+            vehicle_by_name[vehicle.name] = vehicle
+        return vehicle_by_name
+
+    def get_next_free_slot(self, start=None, exclude_order_ids=None):
+        """Get the earliest time from ``start`` (default now) when the vehicle is free for a whole slot
+
+        Runs starting at the exact same time as ``start`` share the vehicle and
+        do not block it. Orders in ``exclude_order_ids`` (e.g. the ones being
+        rescheduled) are ignored. Without a configured slot the vehicle is
+        always free.
+        """
+        self.ensure_one()
+        candidate = start or fields.Datetime.now()
+        slot = get_schedule_slot(self.env)
+        if not slot:
+            return candidate
+        # sudo: the vehicle is busy whoever created the order
+        bookings = self.env['delivery.order'].sudo().search_fetch(
+            [
+                ('vehicle_id', '=', self.id),
+                ('delivery_time', '>', candidate - slot),
+                ('id', 'not in', exclude_order_ids or []),
+            ],
+            ['delivery_time'],
+            order='delivery_time',
+        )
+        for booked_time in bookings.mapped('delivery_time'):
+            if booked_time >= candidate + slot:
+                break
+            if booked_time != candidate:
+                candidate = max(candidate, booked_time + slot)
+        return candidate
+
+
+class DeliveryDriver(models.Model):
+    _name = 'delivery.driver'
+    _description = 'Delivery Driver'
+    _order = 'name'
+    _sql_constraints = [
+        ('unique_name', 'unique(name)', 'A driver with this name already exists!')
+    ]
+
+    name = fields.Char(string='Driver Name', required=True, index=True)
+    active = fields.Boolean(default=True)
+    delivery_order_ids = fields.One2many('delivery.order', 'driver_id', string='Delivery Orders')
+
+    @api.model
+    def _get_or_create(self, driver_names):
+        """Return {normalized driver name: driver}, creating the missing drivers in one batch"""
+        names = {normalize_driver_name(name) for name in driver_names if name}
+        # sudo: drivers are shared reference data, whoever assigns them
+        driver_model = self.sudo().with_context(active_test=False)
+        drivers = driver_model.search_fetch([('name', 'in', list(names))], ['name'])
+        driver_by_name = {driver.name: driver for driver in drivers}
+        missing_names = sorted(names - driver_by_name.keys())
+        for driver in driver_model.create([{'name': name} for name in missing_names]):
+            driver_by_name[driver.name] = driver
+        return driver_by_name
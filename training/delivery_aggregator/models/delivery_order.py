@@ -1,11 +1,45 @@
 from odoo import models, fields, api, exceptions
+from odoo.tools import SQL
+from collections import defaultdict
+
+# Fields feeding the per-customer totals of monthly summaries
+SUMMARY_TOTAL_FIELDS = {'monthly_summary_id', 'customer_id', 'state', 'quantity', 'unit_price', 'total_amount'}
+# Fields moving an order between trip occupancy keys
+TRIP_KEY_FIELDS = {'delivery_date', 'customer_id', 'trip'}
+
+
+def _iter_free_trips(used_trips):
+    """Yield trip numbers not in ``used_trips``, lowest first, so gaps are filled before new trips"""
+    used_trips = set(used_trips)
+    trip_number = 1
+    while True:
+        if trip_number not in used_trips:
+            yield trip_number
+        trip_number += 1
+
+
+def _get_available_trips(used_trip_numbers):
+    """Return the unused trip numbers below the highest used one, or the next trip when there is no gap"""
+    if not used_trip_numbers:
+        return [1]  # If no trips exist, first trip is available
+    max_trip = max(used_trip_numbers)
+    available_trips = sorted(set(range(1, max_trip + 1)) - set(used_trip_numbers))
+    # Add next trip number if all existing numbers are used
+    return available_trips or [max_trip + 1]
+
 
 class DeliveryOrder(models.Model):
     _name = 'delivery.order'
     _description = 'Delivery Order'
     _order = 'delivery_date desc, customer_id, trip'
+    _sql_constraints = [
+        # Deferred so that trips can be reshuffled inside one flush; the occupancy
+        # row lock in _compute_trip keeps concurrent allocators from reaching it.
+        ('unique_trip_per_customer_date', 'unique(delivery_date, customer_id, trip) deferrable initially deferred',
+         'This trip number is already used for the customer on this delivery date!')
+    ]
 
-    name = fields.Char(string='Name', required=True, default=lambda self: self._get_sequence())
+    name = fields.Char(string='Name', required=True, default='New')
     customer_id = fields.Many2one('res.partner', string='Customer', required=True)
     delivery_date = fields.Date(string='Delivery Date', required=True)
     trip = fields.Char(string='Trip', compute='_compute_trip', store=True, readonly=True)
@@ -40,36 +74,102 @@ class DeliveryOrder(models.Model):
             if record.unit_price < 0:
                 raise exceptions.ValidationError("Unit price cannot be negative.")
 
-    def _get_sequence(self):
-        return self.env['ir.sequence'].next_by_code('delivery.order') or 'New'
-
     @api.depends('delivery_date', 'customer_id')
     def _compute_trip(self):
-        """Compute trip number based on delivery date and customer"""
-        for record in self:
-            if record.delivery_date and record.customer_id:
-                # Get all existing trips for the same date and customer
-                existing_trips = self.search([
-                    ('delivery_date', '=', record.delivery_date),
-                    ('customer_id', '=', record.customer_id.id),
-                    ('id', '!=', record.id)
-                ]).mapped('trip')
-                
-                # Find the next available trip number
-                trip_number = 1
-                while str(trip_number) in existing_trips:
-                    trip_number += 1
-                
-                record.trip = str(trip_number)
-            else:
-                record.trip = False
+        """Compute trip number based on delivery date and customer
+
+        The whole recordset is allocated at once: trips already used by other
+        orders are loaded in one grouped query for every (date, customer) key,
+        then each record takes the lowest free trip number of its key.
+        """
+        keyed_records = self.filtered(lambda r: r.delivery_date and r.customer_id)
+        (self - keyed_records).trip = False
+        if not keyed_records:
+            return
+
+        keys = {(record.delivery_date, record.customer_id.id) for record in keyed_records}
+        # Records of an onchange are not saved yet: nothing to serialize against
+        self._lock_trip_keys({
+            (record.delivery_date, record.customer_id.id) for record in keyed_records if record.id
+        })
+        used_trips_by_key = self._get_used_trips_by_key(keys, exclude_ids=self._origin.ids)
+
+        free_trips_by_key = {}
+        for record in keyed_records:
+            key = (record.delivery_date, record.customer_id.id)
+            if key not in free_trips_by_key:
+                free_trips_by_key[key] = _iter_free_trips(used_trips_by_key.get(key, ()))
+            record.trip = str(next(free_trips_by_key[key]))
+
+    @api.model
+    def _lock_trip_keys(self, keys):
+        """Lock the trip occupancy row of every (delivery_date, customer_id) key, creating the missing ones
+
+        Odoo cursors run in REPEATABLE READ, so a lock taken after the snapshot
+        cannot make a waiting allocator see the trips committed meanwhile.
+        Locking the occupancy rows, which every allocation rewrites, makes the
+        waiting transaction fail with a serialization error instead, and Odoo
+        retries the request on a fresh snapshot. Keys are locked in a stable
+        order so two allocators cannot deadlock.
+        """
+        keys = sorted(keys)
+        if not keys:
+            return
+        delivery_dates = [delivery_date for delivery_date, _customer_id in keys]
+        customer_ids = [customer_id for _delivery_date, customer_id in keys]
+        self.env['delivery.trip.occupancy'].flush_model()
+        self.env.cr.execute(SQL("""
+            INSERT INTO delivery_trip_occupancy (delivery_date, customer_id, order_count,
+                                                 create_uid, write_uid, create_date, write_date)
+                 SELECT k.delivery_date, k.customer_id, 0, %s, %s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+                   FROM unnest(%s::date[], %s::int[]) AS k(delivery_date, customer_id)
+            ON CONFLICT (delivery_date, customer_id) DO NOTHING
+        """, self.env.uid, self.env.uid, delivery_dates, customer_ids))
+        self.env.cr.execute(SQL("""
+               SELECT occupancy.id
+                 FROM delivery_trip_occupancy occupancy
+                 JOIN unnest(%s::date[], %s::int[]) AS k(delivery_date, customer_id)
+                   ON occupancy.delivery_date = k.delivery_date AND occupancy.customer_id = k.customer_id
+             ORDER BY occupancy.delivery_date, occupancy.customer_id
+                  FOR UPDATE OF occupancy
+        """, delivery_dates, customer_ids))
+
+    @api.model
+    def _get_used_trips_by_key(self, keys, exclude_ids=()):
+        """Return {(delivery_date, customer_id): set of used trip numbers} with a single query"""
+        if not keys:
+            return {}
+
+        domain = [
+            ('delivery_date', 'in', list({delivery_date for delivery_date, _customer_id in keys})),
+            ('customer_id', 'in', list({customer_id for _delivery_date, customer_id in keys})),
+            ('trip', '!=', False),
+        ]
+        if exclude_ids:
+            domain.append(('id', 'not in', list(exclude_ids)))
+
+        # sudo: record rules hide other users' orders, but their trips are taken all the same
+        used_trips_by_key = {}
+        groups = self.sudo()._read_group(domain, ['delivery_date:day', 'customer_id'], ['trip:array_agg'])
+        for delivery_date, customer, trips in groups:
+            key = (delivery_date, customer.id)
+            if key in keys:
+                used_trips_by_key[key] = {int(trip) for trip in trips if trip and trip.isdigit()}
+        return used_trips_by_key
 
     @api.depends('delivery_date', 'customer_id')
     def _compute_trip_info(self):
-        """Compute trip information for display"""
+        """Compute trip information for display
+
+        Trip occupancy of every (date, customer) key shown is read in one batch.
+        """
+        trip_info_by_key = self.get_trip_info_for_keys({
+            (record.delivery_date, record.customer_id.id)
+            for record in self if record.delivery_date and record.customer_id
+        })
         for record in self:
             if record.delivery_date and record.customer_id:
-                trip_info = self.get_trip_info_for_date(record.delivery_date, record.customer_id.id)
+                trip_info = trip_info_by_key[record.delivery_date, record.customer_id.id]
                 info_text = f"Date: {record.delivery_date}\n"
                 info_text += f"Customer: {record.customer_id.name}\n"
                 info_text += f"Total Orders: {trip_info['total_orders']}\n"
@@ -97,82 +197,154 @@ class DeliveryOrder(models.Model):
         for record in self:
             record.state = 'delivered'
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to number new orders in one sequence block, link them to their
+        monthly summary and add them to its totals"""
+        vals_to_number = [vals for vals in vals_list if vals.get('name', 'New') == 'New']
+        names = self.env['ir.sequence'].next_by_code_batch('delivery.order', len(vals_to_number))
+        for vals, name in zip(vals_to_number, names):
+            vals['name'] = name
+        self._prepare_monthly_summary_vals(vals_list)
+        records = super(DeliveryOrder, self).create(vals_list)
+        records._update_summary_totals({}, records._get_summary_contributions())
+        self.env['delivery.trip.occupancy']._refresh_keys(records._get_trip_keys())
+        return records
+
+    def write(self, vals):
+        """Override write to relink orders whose delivery date changes, move their amounts
+        between summary totals and refresh the trip occupancy they leave and join"""
+        if 'delivery_date' in vals and 'monthly_summary_id' not in vals:
+            vals = dict(vals)
+            self._prepare_monthly_summary_vals([vals])
+        update_summary = bool(SUMMARY_TOTAL_FIELDS & vals.keys())
+        update_trips = bool(TRIP_KEY_FIELDS & vals.keys())
+        if not update_summary and not update_trips:
+            return super(DeliveryOrder, self).write(vals)
+        contributions_before = self._get_summary_contributions() if update_summary else {}
+        trip_keys_before = self._get_trip_keys() if update_trips else set()
+        result = super(DeliveryOrder, self).write(vals)
+        if update_summary:
+            self._update_summary_totals(contributions_before, self._get_summary_contributions())
+        if update_trips:
+            self.env['delivery.trip.occupancy']._refresh_keys(trip_keys_before | self._get_trip_keys())
+        return result
+
     def unlink(self):
         for record in self:
             if record.state != 'draft':
                 raise exceptions.UserError("Only draft delivery orders can be deleted.")
-        return super(DeliveryOrder, self).unlink()
+        contributions_before = self._get_summary_contributions()
+        trip_keys_before = self._get_trip_keys()
+        result = super(DeliveryOrder, self).unlink()
+        self._update_summary_totals(contributions_before, {})
+        self.env['delivery.trip.occupancy']._refresh_keys(trip_keys_before)
+        return result
+
+    def _get_trip_keys(self):
+        """Return the (delivery_date, customer_id) trip keys of these orders"""
+        return {(record.delivery_date, record.customer_id.id) for record in self}
+
+    @api.model
+    def _prepare_monthly_summary_vals(self, vals_list):
+        """Set monthly_summary_id from the delivery month in vals that do not give one explicitly"""
+        vals_to_link = [vals for vals in vals_list if 'monthly_summary_id' not in vals]
+        delivery_dates = [fields.Date.to_date(vals.get('delivery_date')) for vals in vals_to_link]
+        summary_ids_by_month = self.env['monthly.summary']._get_summary_ids_by_month({
+            (delivery_date.year, delivery_date.month) for delivery_date in delivery_dates if delivery_date
+        })
+        for vals, delivery_date in zip(vals_to_link, delivery_dates):
+            month_key = (delivery_date.year, delivery_date.month) if delivery_date else None
+            vals['monthly_summary_id'] = summary_ids_by_month.get(month_key, False)
+
+    def _link_monthly_summary(self):
+        """Link orders to the summary of their delivery month, writing only mis-linked ones"""
+        summary_ids_by_month = self.env['monthly.summary']._get_summary_ids_by_month({
+            (record.delivery_date.year, record.delivery_date.month) for record in self if record.delivery_date
+        })
+        order_ids_by_summary = defaultdict(list)
+        for record in self:
+            month_key = (record.delivery_date.year, record.delivery_date.month) if record.delivery_date else None
+            summary_id = summary_ids_by_month.get(month_key, False)
+            if record.monthly_summary_id.id != summary_id:
+                order_ids_by_summary[summary_id].append(record.id)
+        for summary_id, order_ids in order_ids_by_summary.items():
+            self.browse(order_ids).write({'monthly_summary_id': summary_id})
+
+    def _get_summary_contributions(self):
+        """Return what these orders add to monthly summary totals
+
+        Maps (monthly_summary_id, customer_id) to
+        [order_count, total_amount, confirmed_count, delivered_count].
+        """
+        contributions = defaultdict(lambda: [0, 0.0, 0, 0])
+        for record in self.filtered('monthly_summary_id'):
+            contribution = contributions[record.monthly_summary_id.id, record.customer_id.id]
+            contribution[0] += 1
+            contribution[1] += record.total_amount
+            contribution[2] += 1 if record.state == 'confirmed' else 0
+            contribution[3] += 1 if record.state == 'delivered' else 0
+        return contributions
+
+    @api.model
+    def _update_summary_totals(self, contributions_before, contributions_after):
+        """Apply the difference between two contribution snapshots to the summary totals"""
+        deltas = defaultdict(lambda: [0, 0.0, 0, 0])
+        for key, contribution in contributions_after.items():
+            deltas[key] = [value + added for value, added in zip(deltas[key], contribution)]
+        for key, contribution in contributions_before.items():
+            deltas[key] = [value - removed for value, removed in zip(deltas[key], contribution)]
+        self.env['monthly.summary.customer']._apply_deltas(deltas)
 
     @api.model
     def get_available_trips_for_date(self, delivery_date, customer_id=None):
         """Get available trip numbers for a specific date and customer"""
         if not delivery_date:
             return []
-        
-        # Build domain based on parameters
-        domain = [('delivery_date', '=', delivery_date)]
-        if customer_id:
-            domain.append(('customer_id', '=', customer_id))
-        
-        # Get all existing trips for the date and customer
-        existing_trips = self.search(domain).mapped('trip')
-        
-        # Convert to integers for easier comparison
-        existing_trip_numbers = []
-        for trip in existing_trips:
-            if trip and isinstance(trip, str) and trip.isdigit():
-                existing_trip_numbers.append(int(trip))
-        
-        # Find missing trip numbers
-        if not existing_trip_numbers:
-            return [1]  # If no trips exist, first trip is available
-        
-        max_trip = max(existing_trip_numbers)
-        all_trips = set(range(1, max_trip + 1))
-        used_trips = set(existing_trip_numbers)
-        available_trips = sorted(list(all_trips - used_trips))
-        
-        # Add next trip number if all existing numbers are used
-        if not available_trips:
-            available_trips = [max_trip + 1]
-        
-        return available_trips
+        return self.get_trip_info_for_date(delivery_date, customer_id)['available_trips']
 
     @api.model
-    def get_trip_summary(self, delivery_date=None, customer_id=None):
-        """Get trip summary for a specific date/customer or all dates"""
+    def get_trip_summary(self, delivery_date=None, customer_id=None, date_from=None, date_to=None, offset=0, limit=None):
+        """Get trip summary per delivery date and customer
+
+        Orders are aggregated in one grouped query; filter by a single date or a
+        date range and/or a customer, and page through the (date, customer) keys
+        with offset/limit.
+        """
         domain = []
         if delivery_date:
             domain.append(('delivery_date', '=', delivery_date))
+        if date_from:
+            domain.append(('delivery_date', '>=', date_from))
+        if date_to:
+            domain.append(('delivery_date', '<=', date_to))
         if customer_id:
             domain.append(('customer_id', '=', customer_id))
         
-        delivery_orders = self.search(domain)
+        groups = self._read_group(
+            domain,
+            ['delivery_date:day', 'customer_id'],
+            ['trip:array_agg', '__count'],
+            order='delivery_date:day, customer_id',
+            offset=offset,
+            limit=limit,
+        )
         
         trip_summary = {}
-        for order in delivery_orders:
-            date_str = order.delivery_date.strftime('%Y-%m-%d')
-            customer_key = f"{date_str}_{order.customer_id.id}"
-            
-            if customer_key not in trip_summary:
-                trip_summary[customer_key] = {
-                    'date': date_str,
-                    'customer': order.customer_id.name,
-                    'customer_id': order.customer_id.id,
-                    'used_trips': [],
-                    'available_trips': [],
-                    'total_orders': 0
-                }
-            
-            trip_summary[customer_key]['used_trips'].append(order.trip)
-            trip_summary[customer_key]['total_orders'] += 1
-        
-        # Calculate available trips for each date-customer combination
-        for customer_key, data in trip_summary.items():
-            date_obj = fields.Date.from_string(data['date'])
-            available_trips = self.get_available_trips_for_date(date_obj, data['customer_id'])
-            trip_summary[customer_key]['available_trips'] = available_trips
-            trip_summary[customer_key]['used_trips'] = sorted(trip_summary[customer_key]['used_trips'])
+        for order_date, customer, trips, total_orders in groups:
+            date_str = order_date.strftime('%Y-%m-%d')
+            used_trips = sorted(
+                (trip for trip in trips if trip),
+                key=lambda trip: int(trip) if trip.isdigit() else 0,
+            )
+            trip_summary[f"{date_str}_{customer.id}"] = {
+                'date': date_str,
+                'customer': customer.name,
+                'customer_id': customer.id,
+                'used_trips': used_trips,
+                'available_trips': _get_available_trips([int(trip) for trip in used_trips if trip.isdigit()]),
+                'total_orders': total_orders,
+            }
         
         return trip_summary
 
@@ -201,23 +373,40 @@ class DeliveryOrder(models.Model):
         if customer_id:
             domain.append(('customer_id', '=', customer_id))
         
-        # Get all delivery orders for the date and customer
-        orders = self.search(domain)
-        
-        used_trips = [order.trip for order in orders if order.trip]
-        used_trip_numbers = []
-        for trip in used_trips:
-            if trip and isinstance(trip, str) and trip.isdigit():
-                used_trip_numbers.append(int(trip))
-        
-        available_trips = self.get_available_trips_for_date(delivery_date, customer_id)
-        next_trip = available_trips[0] if available_trips else 1
-        
+        occupancies = self.env['delivery.trip.occupancy'].sudo().search(domain)
+        return self._get_trip_info(occupancies)
+
+    @api.model
+    def get_trip_info_for_keys(self, keys):
+        """Get trip information for many (delivery_date, customer_id) keys with one fetch
+        Returns dict {(delivery_date, customer_id): trip information}"""
+        keys = set(keys)
+        if not keys:
+            return {}
+        occupancies = self.env['delivery.trip.occupancy'].sudo().search([
+            ('delivery_date', 'in', list({delivery_date for delivery_date, _customer_id in keys})),
+            ('customer_id', 'in', list({customer_id for _delivery_date, customer_id in keys})),
+        ])
+        occupancy_by_key = {
+            (occupancy.delivery_date, occupancy.customer_id.id): occupancy for occupancy in occupancies
+        }
+        return {key: self._get_trip_info(occupancy_by_key.get(key, occupancies.browse())) for key in keys}
+
+    @api.model
+    def _get_trip_info(self, occupancies):
+        """Build the trip information dict from trip occupancy records"""
+        used_trip_numbers = sorted(
+            trip for occupancy in occupancies for trip in occupancy._get_used_trip_numbers()
+        )
+        if len(occupancies) == 1:
+            available_trips = occupancies._get_available_trip_numbers()
+        else:
+            available_trips = _get_available_trips(used_trip_numbers)
         return {
-            'used_trips': sorted(used_trip_numbers),
+            'used_trips': used_trip_numbers,
             'available_trips': available_trips,
-            'next_trip': next_trip,
-            'total_orders': len(orders)
+            'next_trip': available_trips[0] if available_trips else 1,
+            'total_orders': sum(occupancies.mapped('order_count')),
         }
 
     # Sales Integration Methods
@@ -237,6 +426,22 @@ class DeliveryOrder(models.Model):
 
 
 
+    @api.model
+    def create_from_sale_orders(self, sale_order_ids):
+        """Create delivery orders from many sale orders at once
+
+        Values for every line are built first and created in a single batch, so
+        names, trips and summary links are assigned for the whole batch together.
+        """
+        sale_orders = self.env['sale.order'].browse(sale_order_ids).exists()
+        vals_list = [
+            self._prepare_sale_line_delivery_vals(line, f'Created from Sale Order: {sale_order.name}')
+            for sale_order in sale_orders
+            for line in sale_order.order_line
+            if line.product_id and line.product_uom_qty > 0
+        ]
+        return self.create(vals_list)
+
     @api.model
     def create_from_sale_order(self, sale_order_id):
         """Create delivery order from sale order"""
@@ -244,22 +449,7 @@ class DeliveryOrder(models.Model):
         if not sale_order.exists():
             return False
         
-        delivery_orders = []
-        for line in sale_order.order_line:
-            if line.product_id and line.product_uom_qty > 0:
-                delivery_order = self.create({
-                    'customer_id': sale_order.partner_id.id,
-                    'delivery_date': fields.Date.today(),
-                    'product_id': line.product_id.id,
-                    'quantity': line.product_uom_qty,
-                    'unit_price': line.price_unit,
-                    'sale_order_id': sale_order.id,
-                    'sale_order_line_id': line.id,
-                    'notes': f'Created from Sale Order: {sale_order.name}',
-                })
-                delivery_orders.append(delivery_order)
-        
-        return delivery_orders
+        return list(self.create_from_sale_orders(sale_order.ids))
 
     @api.model
     def create_from_sale_order_line(self, sale_order_line_id):
@@ -268,7 +458,14 @@ class DeliveryOrder(models.Model):
         if not sale_line.exists():
             return False
         
-        delivery_order = self.create({
+        return self.create(self._prepare_sale_line_delivery_vals(
+            sale_line, f'Created from Sale Order Line: {sale_line.order_id.name}'
+        ))
+
+    @api.model
+    def _prepare_sale_line_delivery_vals(self, sale_line, notes):
+        """Prepare delivery order values for a sale order line"""
+        return {
             'customer_id': sale_line.order_id.partner_id.id,
             'delivery_date': fields.Date.today(),
             'product_id': sale_line.product_id.id,
@@ -276,7 +473,5 @@ class DeliveryOrder(models.Model):
             'unit_price': sale_line.price_unit,
             'sale_order_id': sale_line.order_id.id,
             'sale_order_line_id': sale_line.id,
-            'notes': f'Created from Sale Order Line: {sale_line.order_id.name}',
-        })
-        
-        return delivery_order
\ No newline at end of file
+            'notes': notes,
+        }
@@ -1,14 +1,69 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+
+from .delivery_fleet import get_schedule_slot, normalize_driver_name, normalize_vehicle_number
 
 class DeliveryOrderTracking(models.Model):
     _inherit = 'delivery.order'
     _description = 'Delivery Order with Tracking'
 
     delivery_time = fields.Datetime(string='Delivery Time', help='Waktu pengiriman yang dijadwalkan')
-    driver_name = fields.Char(string='Driver Name', help='Nama driver yang mengirim')
-    vehicle_number = fields.Char(string='Vehicle Number', help='Nomor kendaraan')
+    driver_name = fields.Char(string='Driver Name', help='Nama driver yang mengirim',
+                              compute='_compute_driver_name', inverse='_inverse_driver_name', store=True)
+    vehicle_number = fields.Char(string='Vehicle Number', help='Nomor kendaraan',
+                                 compute='_compute_vehicle_number', inverse='_inverse_vehicle_number', store=True)
+    driver_id = fields.Many2one('delivery.driver', string='Driver', index=True)
+    vehicle_id = fields.Many2one('delivery.vehicle', string='Vehicle', index=True)
+    tracking_log_ids = fields.One2many('delivery.tracking.log', 'delivery_order_id', string='Tracking Log')
     
+    def init(self):
+        super().init()
+        # Schedule of a vehicle or a driver, for the double-booking range check
+        for column in ('vehicle_id', 'driver_id'):
+            create_index(
+                self.env.cr,
+                f'delivery_order_{column}_delivery_time_index',
+                self._table,
+                [column, 'delivery_time'],
+                where=f'{column} IS NOT NULL AND delivery_time IS NOT NULL',
+            )
+
+    @api.depends('driver_id.name')
+    def _compute_driver_name(self):
+        for record in self:
+            record.driver_name = record.driver_id.name
+
+    def _inverse_driver_name(self):
+        driver_by_name = self.env['delivery.driver']._get_or_create(self.mapped('driver_name'))
+        for driver_name, records in self.grouped(lambda record: normalize_driver_name(record.driver_name)).items():
+            records.driver_id = driver_by_name.get(driver_name, False)
+
+    @api.depends('vehicle_id.name')
+    def _compute_vehicle_number(self):
+        for record in self:
+            record.vehicle_number = record.vehicle_id.name
+
+    def _inverse_vehicle_number(self):
+        vehicle_by_name = self.env['delivery.vehicle']._get_or_create(self.mapped('vehicle_number'))
+        for vehicle_number, records in self.grouped(
+            lambda record: normalize_vehicle_number(record.vehicle_number)
+        ).items():
+            records.vehicle_id = vehicle_by_name.get(vehicle_number, False)
+
+    @api.model
+    def _link_fleet(self):
+        """Link orders that only have a typed driver name or vehicle number to driver and vehicle records"""
+        orders = self.sudo().search([
+            '|',
+            '&', ('driver_name', '!=', False), ('driver_id', '=', False),
+            '&', ('vehicle_number', '!=', False), ('vehicle_id', '=', False),
+        ])
+        orders._inverse_driver_name()
+        orders._inverse_vehicle_number()
+
     def action_confirm(self):
         super(DeliveryOrderTracking, self).action_confirm()
         
@@ -23,6 +78,55 @@ class DeliveryOrderTracking(models.Model):
             if record.delivery_time and record.delivery_time < fields.Datetime.now():
                 raise ValidationError("Delivery time cannot be in the past!")
     
+    @api.constrains('delivery_time', 'vehicle_id', 'driver_id')
+    def _check_schedule_conflict(self):
+        """Validasi vehicle dan driver tidak double-booked
+
+        Orders starting at the same time share one run. Any other order of the
+        same vehicle or driver must start at least one slot apart. The whole
+        batch is checked against the schedule with one range query. Nothing is
+        checked until a slot is configured.
+        """
+        slot = get_schedule_slot(self.env)
+        if not slot:
+            return
+        bookings = self.filtered(lambda record: record.delivery_time and (record.vehicle_id or record.driver_id))
+        if not bookings:
+            return
+
+        delivery_times = bookings.mapped('delivery_time')
+        # sudo: a vehicle is busy whoever created the order
+        scheduled_orders = self.sudo().search_fetch([
+            ('id', 'not in', bookings.ids),
+            ('delivery_time', '>', min(delivery_times) - slot),
+            ('delivery_time', '<', max(delivery_times) + slot),
+            '|',
+            ('vehicle_id', 'in', bookings.vehicle_id.ids),
+            ('driver_id', 'in', bookings.driver_id.ids),
+        ], ['name', 'delivery_time', 'vehicle_id', 'driver_id'])
+
+        schedule = defaultdict(lambda: defaultdict(list))
+        for order in bookings.sudo() | scheduled_orders:
+            for resource in (order.vehicle_id, order.driver_id):
+                if resource:
+                    schedule[resource][order.delivery_time].append(order)
+
+        booking_ids = set(bookings.ids)
+        for resource, orders_by_time in schedule.items():
+            start_times = sorted(orders_by_time)
+            for previous_time, current_time in zip(start_times, start_times[1:]):
+                if current_time - previous_time >= slot:
+                    continue
+                previous_orders = orders_by_time[previous_time]
+                current_orders = orders_by_time[current_time]
+                if not any(order.id in booking_ids for order in previous_orders + current_orders):
+                    continue
+                raise ValidationError(
+                    f"{resource._description} {resource.name} is already scheduled for "
+                    f"{previous_orders[0].name} at {previous_time}, "
+                    f"too close to {current_orders[0].name} at {current_time}!"
+                )
+
     def action_open_assign_wizard(self):
         """Buka wizard untuk assign driver, vehicle, dan delivery time"""
         return {
@@ -38,14 +142,15 @@ class DeliveryOrderTracking(models.Model):
     
     def action_reset_assign(self):
         """Reset driver, vehicle, and delivery time assignments"""
-        for record in self:
-            record.driver_name = False
-            record.vehicle_number = False
-            record.delivery_time = False
-            # Reset state to draft if it was confirmed
-            if record.state == 'confirmed':
-                record.state = 'draft'
-            record.notes = (record.notes or '') + f'\n[Reset assignment: {fields.Datetime.now()}]'
+        # Log assignment yang dilepas sebelum dikosongkan
+        self.env['delivery.tracking.log']._log_orders(self, 'reset')
+        self.write({
+            'driver_name': False,
+            'vehicle_number': False,
+            'delivery_time': False,
+        })
+        # Reset state to draft if it was confirmed
+        self.filtered(lambda record: record.state == 'confirmed').write({'state': 'draft'})
         
         # Show notification and reload
         return {
@@ -65,10 +170,12 @@ class DeliveryOrderTracking(models.Model):
     
     def action_mark_ready(self):
         """Mark delivery order as ready to deliver"""
-        for record in self:
-            if record.driver_name and record.vehicle_number and record.delivery_time:
-                record.state = 'confirmed'
-                record.notes = (record.notes or '') + f'\n[Marked as ready to deliver: {fields.Datetime.now()}]'
+        ready_orders = self.filtered(
+            lambda record: record.driver_name and record.vehicle_number and record.delivery_time
+        )
+        if ready_orders:
+            ready_orders.write({'state': 'confirmed'})
+            self.env['delivery.tracking.log']._log_orders(ready_orders, 'ready')
         
         # Show notification and reload
         return {
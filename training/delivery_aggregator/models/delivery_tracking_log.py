@@ -0,0 +1,109 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+
+HISTORY_FIELDS = ['delivery_order_id', 'log_time', 'event_type', 'driver_id', 'vehicle_id',
+                  'delivery_time', 'user_id']
+
+
+class DeliveryTrackingLog(models.Model):
+    _name = 'delivery.tracking.log'
+    _description = 'Delivery Tracking Log'
+    _order = 'log_time desc, id desc'
+
+    delivery_order_id = fields.Many2one('delivery.order', string='Delivery Order', required=True,
+                                        ondelete='cascade', index=True)
+    log_time = fields.Datetime(string='Logged At', required=True, readonly=True, default=fields.Datetime.now)
+    user_id = fields.Many2one('res.users', string='User', readonly=True, default=lambda self: self.env.user)
+    event_type = fields.Selection([
+        ('assign', 'Tracking Updated'),
+        ('reset', 'Assignment Reset'),
+        ('ready', 'Marked as Ready'),
+    ], string='Event', required=True, readonly=True)
+    # Integer references keep the log rows small; archive drivers and vehicles instead of deleting them
+    driver_id = fields.Many2one('delivery.driver', string='Driver', readonly=True, ondelete='restrict')
+    vehicle_id = fields.Many2one('delivery.vehicle', string='Vehicle', readonly=True, ondelete='restrict')
+    driver_name = fields.Char(string='Driver Name', related='driver_id.name')
+    vehicle_number = fields.Char(string='Vehicle Number', related='vehicle_id.name')
+    delivery_time = fields.Datetime(string='Delivery Time', readonly=True)
+    description = fields.Char(string='Description', compute='_compute_description')
+
+    def init(self):
+        super().init()
+        # History of an order, newest first
+        create_index(
+            self.env.cr,
+            'delivery_tracking_log_order_time_index',
+            self._table,
+            ['delivery_order_id', 'log_time DESC'],
+        )
+        # Rows are only appended, so log_time follows the physical order and a BRIN stays tiny
+        create_index(
+            self.env.cr,
+            'delivery_tracking_log_time_brin_index',
+            self._table,
+            ['log_time'],
+            method='brin',
+        )
+        # History of a vehicle, newest first
+        create_index(
+            self.env.cr,
+            'delivery_tracking_log_vehicle_id_time_index',
+            self._table,
+            ['vehicle_id', 'log_time DESC'],
+            where='vehicle_id IS NOT NULL',
+        )
+
+    @api.depends('driver_id.name', 'vehicle_id.name', 'delivery_time')
+    def _compute_description(self):
+        for record in self:
+            changes = []
+            if record.driver_name:
+                changes.append(f"Driver: {record.driver_name}")
+            if record.vehicle_number:
+                changes.append(f"Vehicle: {record.vehicle_number}")
+            if record.delivery_time:
+                changes.append(f"Delivery time: {record.delivery_time}")
+            record.description = ", ".join(changes)
+
+    def write(self, vals):
+        raise UserError("Tracking log entries cannot be modified.")
+
+    @api.model
+    def _log_orders(self, delivery_orders, event_type):
+        """Append one log entry per delivery order with a single create
+
+        Each entry records the current driver, vehicle and delivery time of its order.
+        """
+        # sudo: logging is part of the tracked action, not a separate permission
+        return self.sudo().create([{
+            'delivery_order_id': delivery_order.id,
+            'event_type': event_type,
+            'driver_id': delivery_order.driver_id.id,
+            'vehicle_id': delivery_order.vehicle_id.id,
+            'delivery_time': delivery_order.delivery_time,
+        } for delivery_order in delivery_orders])
+
+    @api.model
+    def get_order_history(self, delivery_order_id, offset=0, limit=80):
+        """Get the tracking events of a delivery order, newest first"""
+        return self.search_read(
+            [('delivery_order_id', '=', delivery_order_id)],
+            HISTORY_FIELDS,
+            offset=offset,
+            limit=limit,
+        )
+
+    @api.model
+    def get_vehicle_history(self, vehicle_id, date_from=None, date_to=None, offset=0, limit=80):
+        """Get the tracking events of a vehicle, newest first
+
+        ``date_from`` and ``date_to`` bound the log time, e.g. to answer
+        where a vehicle was today.
+        """
+        domain = [('vehicle_id', '=', vehicle_id)]
+        if date_from:
+            domain.append(('log_time', '>=', date_from))
+        if date_to:
+            domain.append(('log_time', '<=', date_to))
+        return self.search_read(domain, HISTORY_FIELDS, offset=offset, limit=limit)
@@ -0,0 +1,89 @@
+from odoo import models, fields, api
+
+
+class DeliveryTripOccupancy(models.Model):
+    _name = 'delivery.trip.occupancy'
+    _description = 'Delivery Trip Occupancy'
+    _order = 'delivery_date desc, customer_id'
+    _sql_constraints = [
+        ('unique_date_customer', 'unique(delivery_date, customer_id)',
+         'Trip occupancy already exists for this customer on this delivery date!')
+    ]
+
+    delivery_date = fields.Date(string='Delivery Date', required=True, index=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', required=True, ondelete='cascade')
+    order_count = fields.Integer(string='Total Orders')
+    used_trips = fields.Char(string='Used Trips', help='Comma separated trip numbers, lowest first')
+    trip_bitmap = fields.Char(string='Trip Bitmap',
+                              help='One character per trip from 1 to the highest used trip: 1 = used, 0 = free gap')
+
+    def _get_used_trip_numbers(self):
+        """Return the used trip numbers of this occupancy, lowest first"""
+        self.ensure_one()
+        return [int(trip) for trip in self.used_trips.split(',')] if self.used_trips else []
+
+    def _get_available_trip_numbers(self):
+        """Return the free gaps of this occupancy, or the next trip when there is no gap"""
+        self.ensure_one()
+        bitmap = self.trip_bitmap or ''
+        available_trips = [position + 1 for position, used in enumerate(bitmap) if used == '0']
+        return available_trips or [len(bitmap) + 1]
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """Rebuild the occupancy of the given (delivery_date, customer_id) keys from their delivery orders"""
+        keys = {(delivery_date, customer_id) for delivery_date, customer_id in keys if delivery_date and customer_id}
+        if not keys:
+            return
+
+        # sudo: trips of every user's orders are taken, whatever the record rules show
+        used_trips_by_key = self.env['delivery.order'].sudo()._get_used_trips_by_key(keys)
+        order_counts = self.env['delivery.order'].sudo()._read_group(
+            [
+                ('delivery_date', 'in', list({delivery_date for delivery_date, _customer_id in keys})),
+                ('customer_id', 'in', list({customer_id for _delivery_date, customer_id in keys})),
+            ],
+            ['delivery_date:day', 'customer_id'],
+            ['__count'],
+        )
+        order_count_by_key = {(delivery_date, customer.id): count for delivery_date, customer, count in order_counts}
+
+        occupancy_model = self.sudo()
+        existing_occupancies = occupancy_model.search([
+            ('delivery_date', 'in', list({delivery_date for delivery_date, _customer_id in keys})),
+            ('customer_id', 'in', list({customer_id for _delivery_date, customer_id in keys})),
+        ])
+        occupancy_by_key = {
+            (occupancy.delivery_date, occupancy.customer_id.id): occupancy for occupancy in existing_occupancies
+        }
+
+        vals_list = []
+        to_unlink = occupancy_model.browse()
+        for key in keys:
+            occupancy = occupancy_by_key.get(key)
+            order_count = order_count_by_key.get(key, 0)
+            if not order_count:
+                if occupancy:
+                    to_unlink |= occupancy
+                continue
+            used_trips = used_trips_by_key.get(key, set())
+            vals = {
+                'order_count': order_count,
+                'used_trips': ','.join(map(str, sorted(used_trips))),
+                'trip_bitmap': ''.join(
+                    '1' if trip in used_trips else '0' for trip in range(1, max(used_trips, default=0) + 1)
+                ),
+            }
+            if occupancy:
+                occupancy.write(vals)
+            else:
+                vals_list.append(dict(vals, delivery_date=key[0], customer_id=key[1]))
+        to_unlink.unlink()
+        occupancy_model.create(vals_list)
+
+    @api.model
+    def _rebuild_all(self):
+        """Rebuild the occupancy of every (delivery_date, customer_id) key"""
+        self.sudo().search([]).unlink()
+        groups = self.env['delivery.order'].sudo()._read_group([], ['delivery_date:day', 'customer_id'])
+        self._refresh_keys({(delivery_date, customer.id) for delivery_date, customer in groups})
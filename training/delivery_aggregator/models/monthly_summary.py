@@ -1,12 +1,24 @@
 from odoo import models, fields, api, exceptions
 from datetime import date
 import calendar
+from collections import Counter, defaultdict
 import logging
 from dateutil.relativedelta import relativedelta
+from psycopg2.errors import UniqueViolation
 
 # Setup logger untuk tracking dan debugging
 _logger = logging.getLogger(__name__)
 
+MONTH_NUMBERS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+MONTH_NAMES = {number: name for name, number in MONTH_NUMBERS.items()}
+
+# Database constraint guarding one summary per month and year
+UNIQUE_MONTH_YEAR = 'monthly_summary_unique_month_year'
+
 class MonthlySummary(models.Model):
     _name = 'monthly.summary'
     _description = 'Monthly Summary'
@@ -31,12 +43,13 @@ class MonthlySummary(models.Model):
     ], string='Month', required=True)
     year = fields.Integer(string='Year', required=True)
     delivery_order_ids = fields.One2many('delivery.order', 'monthly_summary_id', string='Delivery Orders')
-    total_orders = fields.Integer(string='Total Orders', compute='_compute_total_orders', store=True)
-    total_amount = fields.Float(string='Total Amount', compute='_compute_total_amount', store=True)
-    top_customer_id = fields.Many2one('res.partner', string='Top Customer', compute='_compute_top_customer', store=True)
+    customer_total_ids = fields.One2many('monthly.summary.customer', 'summary_id', string='Customer Totals')
+    total_orders = fields.Integer(string='Total Orders', compute='_compute_order_totals', store=True)
+    total_amount = fields.Float(string='Total Amount', compute='_compute_order_totals', store=True)
+    top_customer_id = fields.Many2one('res.partner', string='Top Customer', compute='_compute_order_totals', store=True)
     average_order_value = fields.Float(string='Average Order Value', compute='_compute_average_order_value', store=True)
-    delivered_orders = fields.Integer(string='Delivered Orders', compute='_compute_delivered_orders', store=True)
-    confirmed_orders = fields.Integer(string='Confirmed Orders', compute='_compute_confirmed_orders', store=True)
+    delivered_orders = fields.Integer(string='Delivered Orders', compute='_compute_order_totals', store=True)
+    confirmed_orders = fields.Integer(string='Confirmed Orders', compute='_compute_order_totals', store=True)
     currency_id = fields.Many2one('res.currency', string='Currency', default=lambda self: self.env.company.currency_id)
     summary_date = fields.Date(string='Summary Date', required=True, default=lambda self: fields.Date.context_today(self))
     date_range = fields.Char(string='Date Range', compute='_compute_date_range', store=True)
@@ -61,36 +74,23 @@ class MonthlySummary(models.Model):
             else:
                 record.date_range = ""
 
-    @api.depends('delivery_order_ids')
-    def _compute_total_orders(self):
-        for record in self:
-            record.total_orders = len(record.delivery_order_ids)
-
-    @api.depends('delivery_order_ids', 'delivery_order_ids.total_amount')
-    def _compute_total_amount(self):
-        for record in self:
-            record.total_amount = sum(record.delivery_order_ids.mapped('total_amount'))
+    @api.depends('customer_total_ids.order_count', 'customer_total_ids.total_amount',
+                 'customer_total_ids.confirmed_count', 'customer_total_ids.delivered_count')
+    def _compute_order_totals(self):
+        """Compute order totals from the per-customer running totals
 
-    @api.depends('delivery_order_ids', 'delivery_order_ids.total_amount', 'delivery_order_ids.customer_id')
-    def _compute_top_customer(self):
+        Customer totals are kept up to date by delivery orders, so the work
+        here depends on the number of customers, not on the number of orders.
+        """
         for record in self:
-            if record.delivery_order_ids:
-                # Group by customer and sum their total amounts
-                customer_totals = {}
-                for order in record.delivery_order_ids:
-                    customer_id = order.customer_id.id
-                    if customer_id not in customer_totals:
-                        customer_totals[customer_id] = 0
-                    customer_totals[customer_id] += order.total_amount
-                
-                # Find customer with highest total
-                if customer_totals:
-                    top_customer_id = max(customer_totals.items(), key=lambda x: x[1])[0]
-                    record.top_customer_id = top_customer_id
-                else:
-                    record.top_customer_id = False
-            else:
-                record.top_customer_id = False
+            customer_totals = record.customer_total_ids
+            record.total_orders = sum(customer_totals.mapped('order_count'))
+            record.total_amount = sum(customer_totals.mapped('total_amount'))
+            record.confirmed_orders = sum(customer_totals.mapped('confirmed_count'))
+            record.delivered_orders = sum(customer_totals.mapped('delivered_count'))
+            # Customer with highest total amount
+            top_customer_total = max(customer_totals, key=lambda total: total.total_amount, default=None)
+            record.top_customer_id = top_customer_total.customer_id if top_customer_total else False
 
     @api.depends('total_orders', 'total_amount')
     def _compute_average_order_value(self):
@@ -100,26 +100,28 @@ class MonthlySummary(models.Model):
             else:
                 record.average_order_value = 0.0
 
-    @api.depends('delivery_order_ids', 'delivery_order_ids.state')
-    def _compute_delivered_orders(self):
-        for record in self:
-            record.delivered_orders = len(record.delivery_order_ids.filtered(lambda x: x.state == 'delivered'))
-
-    @api.depends('delivery_order_ids', 'delivery_order_ids.state')
-    def _compute_confirmed_orders(self):
-        for record in self:
-            record.confirmed_orders = len(record.delivery_order_ids.filtered(lambda x: x.state == 'confirmed'))
-
     @api.onchange('month', 'year')
     def _onchange_month_year(self):
-        """Automatically populate delivery orders when month or year changes"""
-        if self.month and self.year:
-            self._update_delivery_orders()
+        """Show the delivery orders of the selected month; they get linked on save"""
+        if not self.month or not self.year:
+            return
+        first_day, last_day = self._get_month_bounds()
+        self.delivery_order_ids = self.env['delivery.order'].search([
+            ('delivery_date', '>=', first_day),
+            ('delivery_date', '<=', last_day),
+        ])
 
     @api.model_create_multi
     def create(self, vals_list):
         """Override create to automatically populate delivery orders"""
-        records = super().create(vals_list)
+        try:
+            with self.env.cr.savepoint():
+                records = super().create(vals_list)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_MONTH_YEAR:
+                raise
+            keys = [(vals.get('month'), vals.get('year')) for vals in vals_list]
+            raise self._get_duplicate_month_year_error(keys) from None
         for record in records:
             if record.month and record.year:
                 record._update_delivery_orders()
@@ -127,41 +129,71 @@ class MonthlySummary(models.Model):
 
     def write(self, vals):
         """Override write to automatically populate delivery orders when month/year changes"""
-        result = super().write(vals)
-        # Check if month or year was updated
-        if 'month' in vals or 'year' in vals:
-            for record in self:
-                if record.month and record.year:
-                    record._update_delivery_orders()
+        if 'month' not in vals and 'year' not in vals:
+            return super().write(vals)
+        try:
+            with self.env.cr.savepoint():
+                result = super().write(vals)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_MONTH_YEAR:
+                raise
+            keys = [(vals.get('month', record.month), vals.get('year', record.year)) for record in self]
+            raise self._get_duplicate_month_year_error(keys, exclude_ids=self.ids) from None
+        # Month or year was updated
+        for record in self:
+            if record.month and record.year:
+                record._update_delivery_orders()
         return result
 
+    def _get_month_bounds(self):
+        """Return the first and last day of the summary month"""
+        self.ensure_one()
+        month_num = MONTH_NUMBERS[self.month]
+        last_day = calendar.monthrange(self.year, month_num)[1]
+        return date(self.year, month_num, 1), date(self.year, month_num, last_day)
+
+    @api.model
+    def _get_summary_ids_by_month(self, months):
+        """Return {(year, month_number): summary_id} for the given (year, month_number) keys"""
+        if not months:
+            return {}
+        # sudo: orders belong to the summary of their month, whoever created it
+        summaries = self.sudo().search_fetch([
+            ('year', 'in', list({year for year, _month_num in months})),
+            ('month', 'in', list({MONTH_NAMES[month_num] for _year, month_num in months})),
+        ], ['month', 'year'])
+        summary_ids_by_month = {}
+        for summary in summaries:
+            key = (summary.year, MONTH_NUMBERS[summary.month])
+            if key in months:
+                summary_ids_by_month[key] = summary.id
+        return summary_ids_by_month
+
     def _update_delivery_orders(self):
-        """Update delivery orders based on selected month and year"""
-        if not self.month or not self.year:
-            return
+        """Link delivery orders of the selected month and year to this summary
 
-        # Get month number from month name
-        month_mapping = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12
-        }
-        
-        month_num = month_mapping.get(self.month)
-        if not month_num:
+        Orders are linked when created or when their delivery date changes, so
+        this is a consistency check: only mis-linked orders are written.
+        """
+        if not self.month or not self.year:
             return
 
-        # Get the last day of the month
-        last_day = calendar.monthrange(self.year, month_num)[1]
-        
-        # Find delivery orders for the selected month and year
-        delivery_orders = self.env['delivery.order'].search([
-            ('delivery_date', '>=', f'{self.year}-{month_num:02d}-01'),
-            ('delivery_date', '<=', f'{self.year}-{month_num:02d}-{last_day:02d}')
+        first_day, last_day = self._get_month_bounds()
+        # sudo: the summary covers every order of the month, whoever created it
+        delivery_orders = self.env['delivery.order'].sudo()
+        missing_orders = delivery_orders.search([
+            ('delivery_date', '>=', first_day),
+            ('delivery_date', '<=', last_day),
+            ('monthly_summary_id', '!=', self.id),
         ])
-
-        # Update the delivery_order_ids field
-        self.delivery_order_ids = [(6, 0, delivery_orders.ids)]
+        stray_orders = delivery_orders.search([
+            ('monthly_summary_id', '=', self.id),
+            '|', ('delivery_date', '<', first_day), ('delivery_date', '>', last_day),
+        ])
+        if missing_orders:
+            missing_orders.write({'monthly_summary_id': self.id})
+        if stray_orders:
+            stray_orders._link_monthly_summary()
 
     def action_confirm(self):
         self.write({'state': 'confirmed'})
@@ -183,20 +215,47 @@ class MonthlySummary(models.Model):
             }
         }
 
-    @api.constrains('month', 'year')
-    def _check_unique_month_year(self):
-        """Python constraint to check for duplicate month/year combinations"""
-        for record in self:
-            if record.month and record.year:
-                existing_record = self.search([
-                    ('month', '=', record.month),
-                    ('year', '=', record.year),
-                    ('id', '!=', record.id)
-                ])
-                if existing_record:
-                    raise exceptions.ValidationError(
-                        f'A summary for {record.month.title()} {record.year} already exists!'
-                    )
+    @api.model
+    def _get_duplicate_month_year_error(self, keys, exclude_ids=()):
+        """Build the error for the first (month, year) key violating uniqueness
+
+        Only called once the database rejected the rows, so the extra lookup stays off the normal path.
+        """
+        duplicate_keys = {key for key, count in Counter(keys).items() if count > 1}
+        existing_summaries = self.search_fetch([
+            ('month', 'in', [key[0] for key in keys]),
+            ('year', 'in', [key[1] for key in keys]),
+            ('id', 'not in', list(exclude_ids)),
+        ], ['month', 'year'])
+        duplicate_keys.update((summary.month, summary.year) for summary in existing_summaries)
+        for month, year in keys:
+            if (month, year) in duplicate_keys:
+                return exceptions.ValidationError(
+                    f'A summary for {month.title()} {year} already exists!'
+                )
+        return exceptions.ValidationError('A summary for this month and year combination already exists!')
+
+    def _rebuild_customer_totals(self):
+        """Rebuild the per-customer running totals from the delivery orders
+
+        Called on an empty recordset (e.g. from data files) it rebuilds every summary.
+        """
+        summaries = self or self.search([])
+        summaries.customer_total_ids.sudo().unlink()
+        # sudo: record rules hide other users' orders, but they still count in the summary
+        groups = self.env['delivery.order'].sudo()._read_group(
+            [('monthly_summary_id', 'in', summaries.ids)],
+            ['monthly_summary_id', 'customer_id', 'state'],
+            ['__count', 'total_amount:sum'],
+        )
+        deltas = defaultdict(lambda: [0, 0.0, 0, 0])
+        for summary, customer, state, count, total_amount in groups:
+            delta = deltas[summary.id, customer.id]
+            delta[0] += count
+            delta[1] += total_amount
+            delta[2] += count if state == 'confirmed' else 0
+            delta[3] += count if state == 'delivered' else 0
+        self.env['monthly.summary.customer']._apply_deltas(deltas)
 
     @api.model
     def _auto_generate_monthly_summary(self):
@@ -261,4 +320,68 @@ class MonthlySummary(models.Model):
         except Exception as e:
             # Error handling: log error dan return False
             _logger.error(f"Error in auto-generating monthly summary: {e}")
-            return False
\ No newline at end of file
+            return False
+
+class MonthlySummaryCustomer(models.Model):
+    _name = 'monthly.summary.customer'
+    _description = 'Monthly Summary Customer Totals'
+    _order = 'total_amount desc, id'
+    _sql_constraints = [
+        ('unique_summary_customer', 'unique(summary_id, customer_id)', 'Customer totals already exist for this summary!')
+    ]
+
+    summary_id = fields.Many2one('monthly.summary', string='Monthly Summary', required=True, ondelete='cascade', index=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', required=True, ondelete='cascade')
+    order_count = fields.Integer(string='Orders')
+    total_amount = fields.Float(string='Total Amount')
+    confirmed_count = fields.Integer(string='Confirmed Orders')
+    delivered_count = fields.Integer(string='Delivered Orders')
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Add deltas to the running totals
+
+        ``deltas`` maps (summary_id, customer_id) to
+        [order_count, total_amount, confirmed_count, delivered_count].
+        Rows whose order count drops to zero are removed. A missing row is
+        only created from a positive order count: removing orders that were
+        never counted must not leave negative totals behind.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+
+        # sudo: totals follow every delivery order, whoever may edit the summary
+        totals_model = self.sudo()
+        existing_totals = totals_model.search([
+            ('summary_id', 'in', list({summary_id for summary_id, _customer_id in deltas})),
+            ('customer_id', 'in', list({customer_id for _summary_id, customer_id in deltas})),
+        ])
+        totals_by_key = {(total.summary_id.id, total.customer_id.id): total for total in existing_totals}
+
+        vals_list = []
+        to_unlink = totals_model.browse()
+        for key, (order_count, total_amount, confirmed_count, delivered_count) in deltas.items():
+            total = totals_by_key.get(key)
+            if not total:
+                if order_count <= 0:
+                    continue
+                vals_list.append({
+                    'summary_id': key[0],
+                    'customer_id': key[1],
+                    'order_count': order_count,
+                    'total_amount': total_amount,
+                    'confirmed_count': confirmed_count,
+                    'delivered_count': delivered_count,
+                })
+            elif total.order_count + order_count <= 0:
+                to_unlink |= total
+            else:
+                total.write({
+                    'order_count': total.order_count + order_count,
+                    'total_amount': total.total_amount + total_amount,
+                    'confirmed_count': total.confirmed_count + confirmed_count,
+                    'delivered_count': total.delivered_count + delivered_count,
+                })
+        to_unlink.unlink()
+        totals_model.create(vals_list)
@@ -13,30 +13,35 @@ class SaleOrder(models.Model):
             record.delivery_order_count = len(record.delivery_order_ids)
 
     def action_create_delivery_orders(self):
-        """Create delivery orders from sale order"""
-        self.ensure_one()
-        
+        """Create delivery orders from one or many sale orders"""
         # Check if delivery orders already exist
         if self.delivery_order_ids:
-            raise UserError("Delivery orders already exist for this sale order!")
+            if len(self) == 1:
+                raise UserError("Delivery orders already exist for this sale order!")
+            raise UserError("Delivery orders already exist for sale orders: %s" % ', '.join(
+                self.filtered('delivery_order_ids').mapped('name')
+            ))
         
         # Warning for draft quotations
-        if self.state == 'draft':
+        if any(order.state == 'draft' for order in self):
+            context = {'default_sale_order_ids': self.ids}
+            if len(self) == 1:
+                context.update({
+                    'default_sale_order_id': self.id,
+                    'default_sale_order_name': self.name,
+                    'default_partner_id': self.partner_id.id,
+                })
             return {
                 'name': 'Create Delivery Orders from Quotation',
                 'type': 'ir.actions.act_window',
                 'res_model': 'delivery.create.from.quotation.wizard',
                 'view_mode': 'form',
                 'target': 'new',
-                'context': {
-                    'default_sale_order_id': self.id,
-                    'default_sale_order_name': self.name,
-                    'default_partner_id': self.partner_id.id,
-                }
+                'context': context,
             }
         
-        # Create delivery orders for confirmed sale orders
-        delivery_orders = self.env['delivery.order'].create_from_sale_order(self.id)
+        # Create delivery orders for confirmed sale orders in one batch
+        delivery_orders = self.env['delivery.order'].create_from_sale_orders(self.ids)
         
         if delivery_orders:
             return {
@@ -44,8 +49,8 @@ class SaleOrder(models.Model):
                 'type': 'ir.actions.act_window',
                 'res_model': 'delivery.order',
                 'view_mode': 'list,form',
-                'domain': [('sale_order_id', '=', self.id)],
-                'context': {'default_sale_order_id': self.id},
+                'domain': [('sale_order_id', 'in', self.ids)],
+                'context': {'default_sale_order_id': self.id} if len(self) == 1 else {},
             }
         else:
             raise UserError("No valid order lines found to create delivery orders!")
@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 from datetime import timedelta, datetime, time
 
+from .delivery_fleet import normalize_vehicle_number
+
 
 class DeliveryAssignWizard(models.TransientModel):
     _name = 'delivery.assign.wizard'
@@ -12,6 +14,8 @@ class DeliveryAssignWizard(models.TransientModel):
     vehicle_number = fields.Char(string='Vehicle Number', required=True)
     delivery_time = fields.Datetime(string='Delivery Time', required=True, default=lambda self: datetime.combine(fields.Date.today() + timedelta(days=1), time(9, 0)))
     order_count = fields.Integer(string='Number of Orders', compute='_compute_order_count')
+    next_free_slot = fields.Datetime(string='Vehicle Next Free Slot', compute='_compute_next_free_slot',
+                                     help='Waktu paling awal kendaraan ini kosong mulai dari delivery time')
 
     @api.depends('delivery_order_ids')
     def _compute_order_count(self):
@@ -19,6 +23,23 @@ class DeliveryAssignWizard(models.TransientModel):
         for record in self:
             record.order_count = len(record.delivery_order_ids)
 
+    @api.depends('vehicle_number', 'delivery_time', 'delivery_order_ids')
+    def _compute_next_free_slot(self):
+        """Compute the next free slot of the typed vehicle for the dispatcher"""
+        vehicle_numbers = {normalize_vehicle_number(record.vehicle_number) for record in self if record.vehicle_number}
+        vehicles = self.env['delivery.vehicle'].search_fetch([('name', 'in', list(vehicle_numbers))], ['name'])
+        vehicle_by_name = {vehicle.name: vehicle for vehicle in vehicles}
+        for record in self:
+            vehicle = vehicle_by_name.get(normalize_vehicle_number(record.vehicle_number))
+            if vehicle:
+                record.next_free_slot = vehicle.get_next_free_slot(
+                    start=record.delivery_time,
+                    exclude_order_ids=record.delivery_order_ids._origin.ids,
+                )
+            else:
+                # Kendaraan baru belum punya jadwal
+                record.next_free_slot = record.delivery_time
+
     @api.model
     def default_get(self, fields_list):
         """Set default values"""
@@ -35,30 +56,24 @@ class DeliveryAssignWizard(models.TransientModel):
     def action_assign_all(self):
         """Assign driver, vehicle, dan delivery time ke semua delivery order"""
         # Validasi delivery time tidak boleh di masa lalu
-        if self.delivery_time < fields.Datetime.now():
+        if self.delivery_time and self.delivery_time < fields.Datetime.now():
             raise ValidationError("Delivery time cannot be in the past!")
         
-        for delivery_order in self.delivery_order_ids:
-            # Update tracking info
-            if self.delivery_time:
-                delivery_order.delivery_time = self.delivery_time
-            if self.driver_name:
-                delivery_order.driver_name = self.driver_name
-            if self.vehicle_number:
-                delivery_order.vehicle_number = self.vehicle_number
-            
-            # Log perubahan
-            changes = []
-            if self.delivery_time:
-                changes.append(f"Delivery time: {self.delivery_time}")
-            if self.driver_name:
-                changes.append(f"Driver: {self.driver_name}")
-            if self.vehicle_number:
-                changes.append(f"Vehicle: {self.vehicle_number}")
-            
-            if changes:
-                delivery_order.notes = (delivery_order.notes or '') + f'\n[Tracking updated: {", ".join(changes)}]'
-        
+        # Semua order mendapat nilai yang sama, jadi cukup satu write
+        vals = {}
+        if self.delivery_time:
+            vals['delivery_time'] = self.delivery_time
+        if self.driver_name:
+            vals['driver_name'] = self.driver_name
+        if self.vehicle_number:
+            vals['vehicle_number'] = self.vehicle_number
+
+        if vals:
+            self.delivery_order_ids.write(vals)
+            # Log perubahan di tracking log, bukan di notes; nilai dibaca dari order
+            # yang sudah ditulis, jadi driver dan vehicle sudah dinormalisasi
+            self.env['delivery.tracking.log']._log_orders(self.delivery_order_ids, 'assign')
+
         # Show notification and reload
         return {
             'type': 'ir.actions.client',
@@ -5,7 +5,8 @@ class DeliveryCreateFromQuotationWizard(models.TransientModel):
     _name = 'delivery.create.from.quotation.wizard'
     _description = 'Wizard untuk membuat delivery order dari quotation'
 
-    sale_order_id = fields.Many2one('sale.order', string='Sale Order', required=True)
+    sale_order_id = fields.Many2one('sale.order', string='Sale Order')
+    sale_order_ids = fields.Many2many('sale.order', string='Sale Orders')
     sale_order_line_id = fields.Many2one('sale.order.line', string='Sale Order Line')
     sale_order_name = fields.Char(string='Quotation Name', readonly=True)
     partner_id = fields.Many2one('res.partner', string='Customer', readonly=True)
@@ -48,16 +49,17 @@ class DeliveryCreateFromQuotationWizard(models.TransientModel):
                     'target': 'current',
                 }
         else:
-            # Create delivery orders from entire sale order
-            delivery_orders = self.env['delivery.order'].create_from_sale_order(self.sale_order_id.id)
+            # Create delivery orders from entire sale orders in one batch
+            sale_orders = self.sale_order_ids or self.sale_order_id
+            delivery_orders = self.env['delivery.order'].create_from_sale_orders(sale_orders.ids)
             if delivery_orders:
                 return {
                     'name': 'Delivery Orders Created from Quotation',
                     'type': 'ir.actions.act_window',
                     'res_model': 'delivery.order',
                     'view_mode': 'list,form',
-                    'domain': [('sale_order_id', '=', self.sale_order_id.id)],
-                    'context': {'default_sale_order_id': self.sale_order_id.id},
+                    'domain': [('sale_order_id', 'in', sale_orders.ids)],
+                    'context': {'default_sale_order_id': sale_orders.id} if len(sale_orders) == 1 else {},
                 }
         
         raise UserError("Could not create delivery orders from this quotation!")
@@ -1,7 +1,10 @@
-from odoo.tests.common import TransactionCase
+from odoo.tests.common import BaseCase, TransactionCase, get_db_name, tagged
 from odoo.exceptions import ValidationError, UserError
+from odoo.modules.registry import Registry
 from datetime import date, timedelta
-from odoo import fields
+from odoo import api, fields, SUPERUSER_ID
+
+import psycopg2
 
 
 class TestDeliveryOrder(TransactionCase):
@@ -404,4 +407,148 @@ class TestDeliveryOrder(TransactionCase):
         specific_data = trip_summary_specific[customer_1_today_key]
         self.assertEqual(specific_data['total_orders'], 2)
         self.assertEqual(len(specific_data['used_trips']), 2)
-        self.assertIsInstance(specific_data['available_trips'], list)
\ No newline at end of file
+        self.assertIsInstance(specific_data['available_trips'], list)
+
+    def test_compute_trip_bulk_create(self):
+        """
+        Test 19: Bulk create membagi trip 1..N per (tanggal, customer) sekaligus
+        """
+        customer_2 = self.env['res.partner'].create({
+            'name': 'Test Customer 2',
+        })
+        vals_list = [dict(self.delivery_data) for _i in range(3)]
+        vals_list.append(dict(self.delivery_data, customer_id=customer_2.id))
+
+        delivery_orders = self.env['delivery.order'].create(vals_list)
+
+        self.assertEqual(delivery_orders[:3].mapped('trip'), ['1', '2', '3'],
+                        "Trip untuk customer yang sama harus berurutan 1, 2, 3")
+        self.assertEqual(delivery_orders[3].trip, '1',
+                        "Trip untuk customer lain harus dimulai dari 1")
+
+    def test_compute_trip_fills_gaps(self):
+        """
+        Test 20: Trip yang kosong (gap) dipakai ulang sebelum menambah trip baru
+        """
+        delivery_orders = self.env['delivery.order'].create([dict(self.delivery_data) for _i in range(3)])
+        delivery_orders[1].unlink()
+
+        new_orders = self.env['delivery.order'].create([dict(self.delivery_data) for _i in range(2)])
+
+        self.assertEqual(new_orders.mapped('trip'), ['2', '4'],
+                        "Gap trip 2 harus dipakai dulu, lalu trip 4")
+
+    def test_get_trip_summary_range_paginated(self):
+        """
+        Test 21: get_trip_summary dengan rentang tanggal dan pagination
+        """
+        customer_2 = self.env['res.partner'].create({
+            'name': 'Test Customer 2',
+        })
+        day_1 = date(2030, 1, 10)
+        day_2 = date(2030, 1, 11)
+        delivery_orders = self.env['delivery.order'].create([
+            dict(self.delivery_data, delivery_date=day_1),
+            dict(self.delivery_data, delivery_date=day_1),
+            dict(self.delivery_data, delivery_date=day_1),
+            dict(self.delivery_data, delivery_date=day_1, customer_id=customer_2.id),
+            dict(self.delivery_data, delivery_date=day_2),
+        ])
+        delivery_orders[1].unlink()
+
+        trip_summary = self.env['delivery.order'].get_trip_summary(date_from=day_1, date_to=day_2)
+        self.assertEqual(len(trip_summary), 3, "Harus ada 3 kombinasi tanggal-customer")
+
+        customer_1_data = trip_summary[f"2030-01-10_{self.customer.id}"]
+        self.assertEqual(customer_1_data['used_trips'], ['1', '3'])
+        self.assertEqual(customer_1_data['available_trips'], [2], "Gap trip 2 harus tersedia")
+        self.assertEqual(customer_1_data['total_orders'], 2)
+        self.assertEqual(customer_1_data['customer'], 'Test Customer')
+
+        # Pagination over (date, customer) keys
+        first_page = self.env['delivery.order'].get_trip_summary(date_from=day_1, date_to=day_2, limit=2)
+        second_page = self.env['delivery.order'].get_trip_summary(date_from=day_1, date_to=day_2, offset=2, limit=2)
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(list(second_page), [f"2030-01-11_{self.customer.id}"])
+
+    def test_trip_occupancy_maintained(self):
+        """
+        Test 22: Trip occupancy per (tanggal, customer) ikut create, reschedule dan unlink
+        """
+        occupancy_model = self.env['delivery.trip.occupancy']
+        today = date.today()
+        tomorrow = today + timedelta(days=1)
+        delivery_orders = self.env['delivery.order'].create([dict(self.delivery_data) for _i in range(3)])
+        delivery_orders[1].unlink()
+
+        occupancy = occupancy_model.search([('delivery_date', '=', today), ('customer_id', '=', self.customer.id)])
+        self.assertEqual(occupancy.order_count, 2)
+        self.assertEqual(occupancy.used_trips, '1,3')
+        self.assertEqual(occupancy.trip_bitmap, '101', "Bitmap harus menandai gap trip 2")
+
+        # trip_info and the API read the occupancy
+        self.assertIn('Available Trips: 2', delivery_orders[0].trip_info)
+        trip_info = self.env['delivery.order'].get_trip_info_for_date(today, self.customer.id)
+        self.assertEqual(trip_info['used_trips'], [1, 3])
+        self.assertEqual(trip_info['next_trip'], 2)
+        self.assertEqual(trip_info['total_orders'], 2)
+
+        # Rescheduling moves the order between occupancies
+        delivery_orders[2].delivery_date = tomorrow
+        self.assertEqual(occupancy.used_trips, '1')
+        self.assertEqual(occupancy.trip_bitmap, '1')
+        tomorrow_info = self.env['delivery.order'].get_trip_info_for_keys([(tomorrow, self.customer.id)])
+        self.assertEqual(tomorrow_info[tomorrow, self.customer.id]['used_trips'], [1])
+
+        # Removing the last order of a key removes its occupancy
+        delivery_orders[2].unlink()
+        self.assertFalse(occupancy_model.search([('delivery_date', '=', tomorrow), ('customer_id', '=', self.customer.id)]))
+
+
+@tagged('post_install', '-at_install')
+class TestDeliveryOrderConcurrency(BaseCase):
+    """Trip allocation of two concurrent transactions, on real cursors"""
+
+    def test_concurrent_trip_allocation(self):
+        """Test 1: A transaction allocating a trip already taken by a concurrent one is retried, not duplicated"""
+        registry = Registry(get_db_name())
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            customer = env['res.partner'].create({'name': 'Test Concurrent Customer'})
+            product = env['product.product'].create({'name': 'Test Concurrent Product'})
+            delivery_data = {
+                'customer_id': customer.id,
+                'delivery_date': date(2099, 1, 1),
+                'product_id': product.id,
+                'quantity': 10.0,
+                'unit_price': 50.0,
+            }
+            env['delivery.order'].create(delivery_data)
+
+        try:
+            with registry.cursor() as cr1, registry.cursor() as cr2:
+                env1 = api.Environment(cr1, SUPERUSER_ID, {})
+                env2 = api.Environment(cr2, SUPERUSER_ID, {})
+                # Both snapshots are taken before either transaction allocates
+                cr1.execute("SELECT 1")
+                cr2.execute("SELECT 1")
+
+                first_order = env1['delivery.order'].create(delivery_data)
+                env1.flush_all()
+                self.assertEqual(first_order.trip, '2')
+                cr1.commit()
+
+                # Odoo retries serialization failures; a unique violation would reach the user
+                with self.assertRaises(psycopg2.errors.SerializationFailure):
+                    env2['delivery.order'].create(delivery_data)
+                    env2.flush_all()
+                cr2.rollback()
+        finally:
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                orders = env['delivery.order'].search([('customer_id', '=', customer.id)])
+                summaries = orders.monthly_summary_id
+                orders.unlink()
+                summaries.filtered(lambda summary: not summary.delivery_order_ids).unlink()
+                customer.with_env(env).unlink()
+                product.with_env(env).unlink()
@@ -82,7 +82,10 @@ class TestDeliveryTracking(TransactionCase):
         self.assertFalse(delivery_order.vehicle_number)
         self.assertFalse(delivery_order.delivery_time)
         self.assertEqual(delivery_order.state, 'draft')
-        self.assertIn('Reset assignment', delivery_order.notes)
+        log = delivery_order.tracking_log_ids
+        self.assertEqual(log.event_type, 'reset', "Reset harus tercatat di tracking log")
+        self.assertEqual(log.vehicle_number, 'B 1234 TEST', "Log menyimpan vehicle yang dilepas")
+        self.assertEqual(delivery_order.notes, 'Test delivery order with tracking')
         self.assertEqual(result['type'], 'ir.actions.client')
 
     def test_action_mark_ready(self):
@@ -101,7 +104,10 @@ class TestDeliveryTracking(TransactionCase):
 
         # Verifikasi hasil
         self.assertEqual(delivery_order.state, 'confirmed')
-        self.assertIn('Marked as ready to deliver', delivery_order.notes)
+        log = delivery_order.tracking_log_ids
+        self.assertEqual(log.event_type, 'ready', "Ready harus tercatat di tracking log")
+        self.assertEqual(log.driver_name, 'Test Driver')
+        self.assertEqual(delivery_order.notes, 'Test delivery order with tracking')
         self.assertEqual(result['type'], 'ir.actions.client')
 
     def test_action_mark_ready_incomplete_data(self):
@@ -113,6 +119,7 @@ class TestDeliveryTracking(TransactionCase):
 
         # Verifikasi bahwa state tidak berubah
         self.assertEqual(delivery_order.state, 'draft')
+        self.assertFalse(delivery_order.tracking_log_ids, "Order yang tidak lengkap tidak boleh dilog")
         self.assertEqual(result['type'], 'ir.actions.client')
 
     def test_action_confirm_with_tracking(self):
@@ -155,4 +162,123 @@ class TestDeliveryTracking(TransactionCase):
         self.assertFalse(delivery_order.driver_name)
         self.assertFalse(delivery_order.vehicle_number)
         self.assertFalse(delivery_order.delivery_time)
-        self.assertEqual(delivery_order.state, 'draft') 
\ No newline at end of file
+        self.assertEqual(delivery_order.state, 'draft') 
+
+    def test_tracking_history_pagination(self):
+        """Test 10: Test history per order dan per vehicle dengan offset/limit"""
+        delivery_data = self.delivery_data.copy()
+        delivery_data.update({
+            'driver_name': 'Test Driver',
+            'vehicle_number': 'B 1234 TEST',
+            'delivery_time': fields.Datetime.now() + timedelta(days=1),
+        })
+        delivery_order = self.env['delivery.order'].create(delivery_data)
+        other_order = self.env['delivery.order'].create(dict(delivery_data, vehicle_number='B 5678 OTHER'))
+
+        delivery_order.action_mark_ready()
+        delivery_order.action_reset_assign()
+        other_order.action_mark_ready()
+
+        log_model = self.env['delivery.tracking.log']
+        history = log_model.get_order_history(delivery_order.id)
+        self.assertEqual([event['event_type'] for event in history], ['reset', 'ready'],
+                         "History harus terurut dari event terbaru")
+
+        first_page = log_model.get_order_history(delivery_order.id, limit=1)
+        second_page = log_model.get_order_history(delivery_order.id, offset=1, limit=1)
+        self.assertEqual(first_page[0]['event_type'], 'reset')
+        self.assertEqual(second_page[0]['event_type'], 'ready')
+
+        vehicle_history = log_model.get_vehicle_history(
+            delivery_order.vehicle_id.id,
+            date_from=fields.Datetime.now() - timedelta(hours=1),
+        )
+        self.assertEqual(len(vehicle_history), 2, "Hanya event vehicle B 1234 TEST yang diambil")
+        self.assertEqual({event['delivery_order_id'][0] for event in vehicle_history}, {delivery_order.id})
+        self.assertEqual(vehicle_history[0]['vehicle_id'][1], 'B 1234 TEST')
+        self.assertFalse(log_model.get_vehicle_history(
+            delivery_order.vehicle_id.id,
+            date_to=fields.Datetime.now() - timedelta(days=1),
+        ))
+
+    def test_vehicle_and_driver_normalized(self):
+        """Test 11: Test vehicle number dan driver name dihubungkan ke record yang sama"""
+        delivery_time = fields.Datetime.now() + timedelta(days=1)
+        first_order = self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Test  Driver', vehicle_number='b 1234  test', delivery_time=delivery_time,
+        ))
+        second_order = self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Test Driver', vehicle_number='B 1234 TEST', delivery_time=delivery_time,
+        ))
+
+        self.assertTrue(first_order.vehicle_id, "Vehicle harus dibuat dari vehicle number")
+        self.assertEqual(first_order.vehicle_id, second_order.vehicle_id,
+                         "Penulisan plat nomor yang berbeda harus menunjuk vehicle yang sama")
+        self.assertEqual(first_order.vehicle_id.name, 'B 1234 TEST')
+        self.assertEqual(first_order.driver_id, second_order.driver_id)
+        self.assertEqual(first_order.driver_id.name, 'Test Driver')
+
+        second_order.action_reset_assign()
+        self.assertFalse(second_order.vehicle_id)
+        self.assertFalse(second_order.driver_id)
+
+    def test_schedule_conflict(self):
+        """Test 12: Test vehicle atau driver tidak boleh double-booked"""
+        self.env['ir.config_parameter'].sudo().set_param('delivery_aggregator.schedule_slot_hours', 2)
+        delivery_time = fields.Datetime.now() + timedelta(days=1)
+        self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Driver A', vehicle_number='B 1111 AA', delivery_time=delivery_time,
+        ))
+
+        # Waktu yang sama dianggap satu run pengiriman
+        same_run = self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Driver A', vehicle_number='B 1111 AA', delivery_time=delivery_time,
+        ))
+        self.assertEqual(same_run.vehicle_id.name, 'B 1111 AA')
+
+        with self.assertRaises(ValidationError):
+            self.env['delivery.order'].create(dict(
+                self.delivery_data, vehicle_number='B 1111 AA', delivery_time=delivery_time + timedelta(hours=1),
+            ))
+        with self.assertRaises(ValidationError):
+            self.env['delivery.order'].create(dict(
+                self.delivery_data, driver_name='Driver A', delivery_time=delivery_time - timedelta(minutes=30),
+            ))
+
+        later_order = self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Driver A', vehicle_number='B 1111 AA',
+            delivery_time=delivery_time + timedelta(hours=3),
+        ))
+        with self.assertRaises(ValidationError):
+            later_order.write({'delivery_time': delivery_time + timedelta(hours=1)})
+
+    def test_vehicle_next_free_slot(self):
+        """Test 13: Test next free slot untuk kendaraan"""
+        self.env['ir.config_parameter'].sudo().set_param('delivery_aggregator.schedule_slot_hours', 2)
+        start = datetime.combine(fields.Date.today() + timedelta(days=1), datetime.min.time()).replace(hour=8)
+        for hours in (0, 2, 5):
+            self.env['delivery.order'].create(dict(
+                self.delivery_data, vehicle_number='B 2222 BB', delivery_time=start + timedelta(hours=hours),
+            ))
+        vehicle = self.env['delivery.vehicle'].search([('name', '=', 'B 2222 BB')])
+
+        self.assertEqual(vehicle.get_next_free_slot(start), start, "Run yang sama masih bisa ditambah")
+        self.assertEqual(vehicle.get_next_free_slot(start + timedelta(minutes=30)), start + timedelta(hours=2),
+                         "Boleh bergabung dengan run jam 10 yang sudah ada")
+        self.assertEqual(vehicle.get_next_free_slot(start + timedelta(hours=3)), start + timedelta(hours=7),
+                         "Slot kosong pertama setelah semua run yang bertabrakan")
+        self.assertEqual(vehicle.get_next_free_slot(start + timedelta(hours=10)), start + timedelta(hours=10))
+
+    def test_schedule_slot_disabled_by_default(self):
+        """Test 14: Test tanpa slot yang dikonfigurasi, jadwal tidak dicek"""
+        delivery_time = fields.Datetime.now() + timedelta(days=1)
+        self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Driver B', vehicle_number='B 3333 CC', delivery_time=delivery_time,
+        ))
+        overlapping = self.env['delivery.order'].create(dict(
+            self.delivery_data, driver_name='Driver B', vehicle_number='B 3333 CC',
+            delivery_time=delivery_time + timedelta(minutes=30),
+        ))
+        self.assertEqual(overlapping.vehicle_id.name, 'B 3333 CC', "Tanpa slot, order boleh berdekatan")
+        self.assertEqual(overlapping.vehicle_id.get_next_free_slot(delivery_time + timedelta(minutes=10)),
+                         delivery_time + timedelta(minutes=10), "Tanpa slot, kendaraan selalu kosong")
@@ -114,7 +114,7 @@ class TestMonthlySummary(TransactionCase):
         ])]
         
         # Trigger computation
-        self.monthly_summary._compute_total_orders()
+        self.monthly_summary._compute_order_totals()
         
         # Verify total orders
         self.assertEqual(self.monthly_summary.total_orders, 3, "Total orders harus 3")
@@ -129,7 +129,7 @@ class TestMonthlySummary(TransactionCase):
         ])]
         
         # Trigger computation
-        self.monthly_summary._compute_total_amount()
+        self.monthly_summary._compute_order_totals()
         
         # Calculate expected total amount
         # delivery_order1: 10.0 * 50.0 = 500.0
@@ -152,7 +152,7 @@ class TestMonthlySummary(TransactionCase):
         ])]
         
         # Trigger computation
-        self.monthly_summary._compute_top_customer()
+        self.monthly_summary._compute_order_totals()
         
         # Calculate expected top customer
         # customer (delivery_order1 + delivery_order2): 500.0 + 375.0 = 875.0
@@ -174,7 +174,7 @@ class TestMonthlySummary(TransactionCase):
         })
         
         # Trigger computation
-        empty_monthly_summary._compute_top_customer()
+        empty_monthly_summary._compute_order_totals()
         
         # Verify top customer is False when no orders
         self.assertFalse(empty_monthly_summary.top_customer_id, 
@@ -251,7 +251,7 @@ class TestMonthlySummary(TransactionCase):
         ])]
         
         # Trigger computation
-        self.monthly_summary._compute_delivered_orders()
+        self.monthly_summary._compute_order_totals()
         
         # Expected delivered orders: only delivery_order2 (state: 'delivered')
         expected_delivered_orders = 1
@@ -270,7 +270,7 @@ class TestMonthlySummary(TransactionCase):
         ])]
         
         # Trigger computation
-        self.monthly_summary._compute_confirmed_orders()
+        self.monthly_summary._compute_order_totals()
         
         # Expected confirmed orders: only delivery_order1 (state: 'confirmed')
         expected_confirmed_orders = 1
@@ -461,9 +461,13 @@ class TestMonthlySummary(TransactionCase):
             'state': 'draft',
         })
         
-        # Verify initial state has no delivery orders
-        self.assertEqual(len(summary_test.delivery_order_ids), 0, 
-                        "Initial delivery orders harus kosong")
+        # Orders of the month are linked when the summary is created
+        self.assertEqual(len(summary_test.delivery_order_ids), 2, 
+                        "Delivery orders bulan Juni harus langsung ter-link")
+        
+        # Break one link so refresh has something to fix
+        june_order2.monthly_summary_id = False
+        self.assertEqual(len(summary_test.delivery_order_ids), 1)
         
         # Call action_refresh_orders
         result = summary_test.action_refresh_orders()
@@ -489,3 +493,113 @@ class TestMonthlySummary(TransactionCase):
                         "Notification type harus 'success'")
         self.assertFalse(result['params']['sticky'], 
                         "Notification sticky harus False")
+
+    def test_unique_month_year(self):
+        """Test 19: Test duplicate month/year is rejected with a readable error"""
+        monthly_summary = self.env['monthly.summary'].create({
+            'name': 'March 2024 Summary',
+            'month': 'march',
+            'year': 2024,
+        })
+        
+        # Duplicate on create
+        with self.assertRaises(ValidationError) as context:
+            self.env['monthly.summary'].create({
+                'name': 'March 2024 Summary Duplicate',
+                'month': 'march',
+                'year': 2024,
+            })
+        self.assertIn('A summary for March 2024 already exists!', str(context.exception))
+        
+        # Duplicate on write
+        other_summary = self.env['monthly.summary'].create({
+            'name': 'April 2024 Summary',
+            'month': 'april',
+            'year': 2024,
+        })
+        with self.assertRaises(ValidationError) as context:
+            other_summary.write({'month': 'march'})
+        self.assertIn('A summary for March 2024 already exists!', str(context.exception))
+        self.assertEqual(other_summary.month, 'april', "Month tidak boleh berubah setelah gagal")
+        self.assertTrue(monthly_summary.exists())
+
+    def test_incremental_customer_totals(self):
+        """Test 20: Test summary totals follow delivery order changes incrementally"""
+        self.monthly_summary.delivery_order_ids = [(6, 0, [
+            self.delivery_order1.id,
+            self.delivery_order2.id,
+            self.delivery_order3.id
+        ])]
+        
+        # One running-totals row per customer
+        customer_totals = self.monthly_summary.customer_total_ids
+        self.assertEqual(len(customer_totals), 2, "Harus ada 2 baris customer")
+        customer2_total = customer_totals.filtered(lambda total: total.customer_id == self.customer2)
+        self.assertEqual(customer2_total.order_count, 1)
+        self.assertEqual(customer2_total.total_amount, 400.0)
+        
+        # Confirming an order only moves counts
+        self.delivery_order3.action_confirm()
+        self.assertEqual(self.monthly_summary.confirmed_orders, 2, "Confirmed orders harus 2")
+        self.assertEqual(customer2_total.confirmed_count, 1)
+        
+        # Changing the amount makes customer2 the top customer
+        self.delivery_order3.write({'quantity': 20.0})
+        self.assertEqual(self.monthly_summary.total_amount, 500.0 + 375.0 + 1000.0)
+        self.assertEqual(self.monthly_summary.top_customer_id, self.customer2,
+                        "Top customer harus customer2 setelah amount berubah")
+        
+        # Removing a draft order drops its customer row
+        new_order = self.env['delivery.order'].create(dict(self.delivery_data, monthly_summary_id=self.monthly_summary.id,
+                                                           customer_id=self.customer2.id, delivery_date=date(2024, 1, 26)))
+        self.assertEqual(self.monthly_summary.total_orders, 4, "Total orders harus 4")
+        new_order.unlink()
+        self.assertEqual(self.monthly_summary.total_orders, 3, "Total orders harus kembali 3")
+        
+        # Rebuilding from scratch gives the same totals
+        self.monthly_summary._rebuild_customer_totals()
+        self.assertEqual(self.monthly_summary.total_orders, 3)
+        self.assertEqual(self.monthly_summary.top_customer_id, self.customer2)
+
+    def test_link_orders_by_delivery_month(self):
+        """Test 21: Test delivery orders follow the summary of their delivery month"""
+        feb_summary = self.env['monthly.summary'].create({
+            'name': 'February 2024 Summary',
+            'month': 'february',
+            'year': 2024,
+        })
+        
+        # Orders of January are linked at creation (setUp)
+        self.assertEqual(self.delivery_order1.monthly_summary_id, self.monthly_summary,
+                        "Order Januari harus ter-link ke summary Januari")
+        
+        # New order is linked when created
+        feb_order = self.env['delivery.order'].create(dict(self.delivery_data, delivery_date=date(2024, 2, 10)))
+        self.assertEqual(feb_order.monthly_summary_id, feb_summary)
+        self.assertEqual(feb_summary.total_orders, 1)
+        
+        # Moving the delivery date moves the order and its totals
+        self.delivery_order3.delivery_date = date(2024, 2, 5)
+        self.assertEqual(self.delivery_order3.monthly_summary_id, feb_summary)
+        self.assertEqual(feb_summary.total_orders, 2)
+        self.assertEqual(self.monthly_summary.total_orders, 2)
+        
+        # Month without summary leaves the order unlinked
+        self.delivery_order3.delivery_date = date(2023, 12, 5)
+        self.assertFalse(self.delivery_order3.monthly_summary_id)
+        
+        # Changing the summary month relinks only its orders
+        feb_summary.write({'month': 'december', 'year': 2023})
+        self.assertEqual(feb_summary.delivery_order_ids, self.delivery_order3)
+        self.assertFalse(feb_order.monthly_summary_id, "Order Februari tidak punya summary lagi")
+
+    def test_negative_delta_creates_no_total(self):
+        """Test 22: Test removing uncounted orders never creates negative totals"""
+        totals_model = self.env['monthly.summary.customer']
+        self.monthly_summary.customer_total_ids.unlink()
+        
+        totals_model._apply_deltas({(self.monthly_summary.id, self.customer.id): [-1, -500.0, -1, 0]})
+        self.assertFalse(self.monthly_summary.customer_total_ids, "Delta negatif tidak boleh membuat baris baru")
+        
+        totals_model._apply_deltas({(self.monthly_summary.id, self.customer.id): [1, 500.0, 1, 0]})
+        self.assertEqual(self.monthly_summary.customer_total_ids.order_count, 1)
@@ -220,3 +220,35 @@ class TestSaleOrderIntegration(TransactionCase):
         # Should return delivery order list view
         self.assertEqual(result['res_model'], 'delivery.order')
         self.assertEqual(result['view_mode'], 'list,form')
+
+    def test_11_create_from_sale_orders_bulk(self):
+        """Test 11: Test create_from_sale_orders creates all lines of many orders in one batch"""
+        other_sale_order = self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'date_order': fields.Date.today(),
+            'order_line': [
+                (0, 0, {'product_id': self.product.id, 'name': 'Line 1', 'product_uom_qty': 5, 'price_unit': 90.0}),
+                (0, 0, {'product_id': self.product.id, 'name': 'Line 2', 'product_uom_qty': 0, 'price_unit': 90.0}),
+            ],
+        })
+        
+        delivery_orders = self.env['delivery.order'].create_from_sale_orders(
+            [self.sale_order.id, other_sale_order.id]
+        )
+        
+        # Lines without quantity are skipped
+        self.assertEqual(len(delivery_orders), 2, "Harus ada 2 delivery orders")
+        self.assertEqual(delivery_orders.sale_order_id, self.sale_order | other_sale_order)
+        
+        # Names come from one sequence block, trips are allocated for the batch
+        self.assertEqual(len(set(delivery_orders.mapped('name'))), 2, "Nama delivery order harus unik")
+        self.assertTrue(all(name != 'New' for name in delivery_orders.mapped('name')))
+        self.assertEqual(sorted(delivery_orders.mapped('trip')), ['1', '2'])
+        
+        # Action on many confirmed orders uses the bulk API as well
+        other_sale_order.delivery_order_ids.unlink()
+        self.sale_order.delivery_order_ids.unlink()
+        (self.sale_order | other_sale_order).action_confirm()
+        result = (self.sale_order | other_sale_order).action_create_delivery_orders()
+        self.assertEqual(result['domain'], [('sale_order_id', 'in', [self.sale_order.id, other_sale_order.id])])
+        self.assertEqual(self.sale_order.delivery_order_count + other_sale_order.delivery_order_count, 2)
@@ -1,5 +1,5 @@
 from odoo.tests.common import TransactionCase
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 from odoo import fields
 from datetime import timedelta, datetime, time
 
@@ -133,11 +133,18 @@ class TestWizardDeliveryAssign(TransactionCase):
         self.assertEqual(self.delivery_order2.vehicle_number, 'B 1234 ABC')
         self.assertEqual(self.delivery_order2.delivery_time, future_time)
         
-        # Verify notes are updated
-        self.assertIn('Tracking updated', self.delivery_order1.notes)
-        self.assertIn('Driver: Test Driver', self.delivery_order1.notes)
-        self.assertIn('Vehicle: B 1234 ABC', self.delivery_order1.notes)
-        self.assertIn('Delivery time:', self.delivery_order1.notes)
+        # Verify tracking log is written and notes are left untouched
+        for delivery_order in (self.delivery_order1, self.delivery_order2):
+            self.assertEqual(len(delivery_order.tracking_log_ids), 1,
+                             "Harus ada satu tracking log per delivery order")
+            log = delivery_order.tracking_log_ids
+            self.assertEqual(log.event_type, 'assign')
+            self.assertEqual(log.driver_name, 'Test Driver')
+            self.assertEqual(log.vehicle_number, 'B 1234 ABC')
+            self.assertEqual(log.delivery_time, future_time)
+            self.assertEqual(log.user_id, self.env.user)
+            self.assertEqual(delivery_order.notes, 'Initial notes',
+                             "Notes tidak boleh bertambah saat assignment")
 
     def test_05_action_assign_all_past_time_error(self):
         """Test 5: Test action_assign_all with past delivery time"""
@@ -178,10 +185,14 @@ class TestWizardDeliveryAssign(TransactionCase):
         self.assertFalse(self.delivery_order1.vehicle_number)
         self.assertFalse(self.delivery_order1.delivery_time)
         
-        # Verify notes contain only driver update
-        self.assertIn('Driver: Test Driver Only', self.delivery_order1.notes)
-        self.assertNotIn('Vehicle:', self.delivery_order1.notes)
-        self.assertNotIn('Delivery time:', self.delivery_order1.notes)
+        # Verify tracking log contains only driver update
+        log = self.delivery_order1.tracking_log_ids
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.description, 'Driver: Test Driver Only')
+        self.assertFalse(log.vehicle_number)
+        self.assertFalse(log.delivery_time)
+        self.assertFalse(self.delivery_order2.tracking_log_ids,
+                         "Order yang tidak dipilih tidak boleh punya tracking log")
 
     def test_07_action_assign_all_empty_notes(self):
         """Test 7: Test action_assign_all with delivery orders that have no initial notes"""
@@ -208,11 +219,13 @@ class TestWizardDeliveryAssign(TransactionCase):
         # Execute action
         wizard.action_assign_all()
         
-        # Verify notes are created properly
-        self.assertIn('Tracking updated', delivery_order_no_notes.notes)
-        self.assertIn('Driver: Test Driver', delivery_order_no_notes.notes)
-        self.assertIn('Vehicle: B 5678 DEF', delivery_order_no_notes.notes)
-        self.assertIn('Delivery time:', delivery_order_no_notes.notes)
+        # Verify tracking log is created and notes stay empty
+        self.assertFalse(delivery_order_no_notes.notes)
+        log = delivery_order_no_notes.tracking_log_ids
+        self.assertEqual(len(log), 1)
+        self.assertIn('Driver: Test Driver', log.description)
+        self.assertIn('Vehicle: B 5678 DEF', log.description)
+        self.assertIn('Delivery time:', log.description)
 
     def test_08_action_assign_all_multiple_changes(self):
         """Test 8: Test action_assign_all with multiple changes to same delivery order"""
@@ -236,5 +249,63 @@ class TestWizardDeliveryAssign(TransactionCase):
         self.assertEqual(self.delivery_order1.vehicle_number, 'B 9999 XYZ')
         self.assertEqual(self.delivery_order1.delivery_time, datetime.combine(fields.Date.today() + timedelta(days=3), time(16, 0)))
         
-        # Verify notes contain both updates
-        self.assertIn('Tracking updated: Driver: Updated Driver, Vehicle: B 9999 XYZ, Delivery time:', self.delivery_order1.notes)
+        # Verify tracking log keeps both updates, newest first
+        logs = self.delivery_order1.tracking_log_ids
+        self.assertEqual(len(logs), 2, "Setiap assignment harus menambah satu tracking log")
+        self.assertEqual(logs.mapped('driver_name'), ['Updated Driver', 'Test Driver'])
+        self.assertTrue(logs[0].description.startswith('Driver: Updated Driver, Vehicle: B 9999 XYZ, Delivery time:'))
+        self.assertEqual(self.delivery_order1.notes, 'Initial notes')
+
+    def test_09_tracking_log_append_only(self):
+        """Test 9: Tracking log entries cannot be modified once written"""
+        wizard = self.env['delivery.assign.wizard'].create(self.wizard_data)
+        wizard.action_assign_all()
+
+        log = self.delivery_order1.tracking_log_ids
+        with self.assertRaises(UserError):
+            log.write({'driver_name': 'Someone Else'})
+        self.assertEqual(log.driver_name, 'Test Driver')
+
+    def test_10_action_assign_all_double_booking(self):
+        """Test 10: Test action_assign_all menolak vehicle yang sudah terjadwal"""
+        self.env['ir.config_parameter'].sudo().set_param('delivery_aggregator.schedule_slot_hours', 2)
+        booked_time = self.wizard_data['delivery_time']
+        self.env['delivery.order'].create({
+            'customer_id': self.customer.id,
+            'delivery_date': fields.Date.today(),
+            'product_id': self.product.id,
+            'quantity': 1.0,
+            'unit_price': 10.0,
+            'vehicle_number': 'B 1234 ABC',
+            'delivery_time': booked_time,
+        })
+
+        wizard = self.env['delivery.assign.wizard'].create(dict(
+            self.wizard_data, delivery_time=booked_time + timedelta(hours=1),
+        ))
+        self.assertEqual(wizard.next_free_slot, booked_time + timedelta(hours=2),
+                         "Next free slot harus setelah run yang sudah ada")
+        with self.assertRaises(ValidationError):
+            wizard.action_assign_all()
+        self.assertFalse(self.delivery_order1.vehicle_id, "Assignment harus dibatalkan seluruhnya")
+
+        wizard.delivery_time = wizard.next_free_slot
+        wizard.action_assign_all()
+        self.assertEqual(self.delivery_order1.vehicle_id.name, 'B 1234 ABC')
+        self.assertEqual(self.delivery_order2.delivery_time, booked_time + timedelta(hours=2))
+
+    def test_11_assign_log_normalized_vehicle(self):
+        """Test 11: Assignment typed in lowercase is logged with the normalized vehicle number"""
+        wizard = self.env['delivery.assign.wizard'].create(dict(
+            self.wizard_data, driver_name='Test  Driver', vehicle_number='b 1234  abc',
+        ))
+        wizard.action_assign_all()
+
+        log = self.delivery_order1.tracking_log_ids
+        self.assertEqual(log.driver_name, 'Test Driver')
+        self.assertEqual(log.vehicle_number, 'B 1234 ABC')
+        self.assertEqual(log.vehicle_id, self.delivery_order1.vehicle_id)
+        history = self.env['delivery.tracking.log'].get_vehicle_history(log.vehicle_id.id)
+        self.assertEqual({event['delivery_order_id'][0] for event in history},
+                         {self.delivery_order1.id, self.delivery_order2.id},
+                         "Assignment harus ditemukan lewat plat nomor yang dinormalisasi")
@@ -1,6 +1,6 @@
 {
     'name': 'FFB Purchase',
-    'version': '1.0.0',
+    'version': '1.0.1',
     'summary': 'FFB Purchase Management',
     'description': 'FFB Purchase module with standard purchase order functionality and daily price management',
     'author': 'Tyo',
@@ -8,8 +8,13 @@
     'depends': ['purchase', 'sale', 'stock', 'account', 'product'],
     'data': [
         'security/ir.model.access.csv',
+        'security/record_rules.xml',
+        'data/sale_price_daily_data.xml',
+        'data/purchase_pricing_config_data.xml',
+        'data/purchase_order_data.xml',
         'views/wizard_calculation_details_views.xml',
         'views/purchase_pricing_config_views.xml',
+        'views/purchase_pricing_snapshot_views.xml',
         'views/purchase_order_views.xml',
         'views/menu_views.xml',
     ],
@@ -0,0 +1,12 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Build the data the noupdate <function> tags only build on install"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    # Daily sale price statistics, including quantity and price sketches
+    env['sale.price.daily']._rebuild_all()
+    # Stored calculation previews of the existing configurations, from the rebuilt statistics
+    env['purchase.pricing.config']._cron_refresh_test_calculations()
@@ -1,4 +1,9 @@
 from . import ffb_purchase_order
 from . import ffb_purchase_order_line
 from . import purchase_pricing_config
+from . import purchase_pricing_snapshot
+from . import purchase_pricing_sale_line
 from . import wizard_calculation_details
+from . import sale_price_daily
+from . import sale_order
+from . import sale_order_line
@@ -1,6 +1,16 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 from datetime import timedelta
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Orders whose lines may still be repriced
+REPRICEABLE_STATES = ('draft', 'sent')
+# Background repricing: orders per committed chunk and the saved resume point
+REPRICE_CHUNK_SIZE = 100
+REPRICE_CURSOR_PARAM = 'ffb_purchase.reprice_cursor'
 
 
 class PurchaseOrder(models.Model):
@@ -28,27 +38,73 @@ class PurchaseOrder(models.Model):
         """Apply pricing configuration when vendor changes"""
         # Otomatis terapkan pricing ketika vendor berubah, tidak peduli flag use_pricing_config
         if self.partner_id:
-            for line in self.order_line:
-                if line.product_id:
-                    line._apply_pricing_config()
-                    
+            self._reprice_lines()
+
     def write(self, vals):
         """Override write to apply pricing when partner changes"""
         result = super().write(vals)
         
-        # If partner_id changed, apply pricing to all lines
+        # If partner_id changed, apply pricing to all lines of all orders at once
         if 'partner_id' in vals and vals['partner_id']:
-            for order in self:
-                for line in order.order_line:
-                    if line.product_id:
-                        line._apply_pricing_config()
+            self._reprice_lines()
                         
         return result
 
+    def _reprice_lines(self):
+        """Re-apply pricing to the lines of all these orders in one batch
+
+        _apply_pricing_config resolves the configurations of every (product,
+        vendor) pair at once, computes each (configuration, window) price once
+        across orders and writes identical values together.
+        """
+        self.order_line.filtered('product_id')._apply_pricing_config()
+
+    def _reprice_configured_lines(self):
+        """Re-apply pricing to the lines having a pricing configuration and return them
+
+        Lines without configuration keep their hand-entered price instead of
+        falling back to the product cost.
+        """
+        lines = self.order_line.filtered('product_id')
+        config_by_line = lines._get_pricing_configs()
+        configured_lines = lines.filtered(lambda line: line in config_by_line)
+        configured_lines._apply_pricing_config()
+        return configured_lines
+
+    def _reprice_configured_lines_by_company(self):
+        """Reprice the configured lines of each company's orders and return their count
+
+        The cron user's company is not the orders' one: each company's orders
+        are priced with its own configurations and costs.
+        """
+        return sum(
+            len(company_orders.with_company(company)._reprice_configured_lines())
+            for company, company_orders in self.grouped('company_id').items()
+        )
+
+    def _reprice_isolated(self):
+        """Reprice these orders in a savepoint, then one by one if that fails
+
+        Return the repriced line count and the orders that failed, whose
+        changes are rolled back while the other orders keep theirs.
+        """
+        try:
+            with self.env.cr.savepoint():
+                return self._reprice_configured_lines_by_company(), self.browse()
+        except Exception:
+            if len(self) == 1:
+                _logger.exception("Repricing of purchase order %s failed", self.id)
+                return 0, self
+        line_count, failed = 0, self.browse()
+        for order in self:
+            order_line_count, order_failed = order._reprice_isolated()
+            line_count += order_line_count
+            failed |= order_failed
+        return line_count, failed
+
     def action_apply_pricing_config(self):
         """Manually re-apply pricing configuration to all order lines"""
-        for line in self.order_line:
-            line._apply_pricing_config()
+        self._reprice_lines()
         
         return {
             'type': 'ir.actions.client',
@@ -59,3 +115,72 @@ class PurchaseOrder(models.Model):
                 'type': 'success',
             }
         }
+
+    def action_reprice_open_orders(self):
+        """Re-apply pricing to the selected orders still in draft or sent state"""
+        open_orders = self.filtered(lambda order: order.state in REPRICEABLE_STATES)
+        open_orders._reprice_lines()
+        
+        message = _('Pricing re-applied to %s order(s).') % len(open_orders)
+        skipped = len(self) - len(open_orders)
+        if skipped:
+            message += '\n' + _('%s confirmed or cancelled order(s) skipped.') % skipped
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': message,
+                'type': 'success',
+            }
+        }
+
+    @api.model
+    def _cron_reprice_open_orders(self, chunk_size=REPRICE_CHUNK_SIZE, auto_commit=True):
+        """Reprice draft and sent orders by chunks of ascending id
+
+        Only lines with a pricing configuration are repriced. The id of the last
+        processed order is saved after every chunk, so a run killed by the cron
+        time limit resumes where it stopped. The cursor goes back to 0 once
+        every open order has been processed. An order failing to reprice is
+        rolled back, logged and counted, and does not stop the run.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        cursor = int(params.get_param(REPRICE_CURSOR_PARAM, 0))
+        started = time.monotonic()
+        stats = {'orders': 0, 'lines': 0, 'skipped': 0, 'failed': 0}
+        failed_ids = []
+        domain = [('state', 'in', REPRICEABLE_STATES)]
+
+        while True:
+            orders = self.search(domain + [('id', '>', cursor)], order='id', limit=chunk_size)
+            if not orders:
+                cursor = 0
+                params.set_param(REPRICE_CURSOR_PARAM, cursor)
+                break
+
+            to_reprice = orders.filtered(
+                lambda order: order.use_pricing_config and order.partner_id and order.order_line.product_id
+            )
+            line_count, failed = to_reprice._reprice_isolated()
+            stats['lines'] += line_count
+            stats['orders'] += len(to_reprice) - len(failed)
+            stats['skipped'] += len(orders) - len(to_reprice)
+            stats['failed'] += len(failed)
+            failed_ids += failed.ids
+
+            cursor = orders[-1].id
+            params.set_param(REPRICE_CURSOR_PARAM, cursor)
+            self.env['ir.cron']._notify_progress(
+                done=len(orders), remaining=self.search_count(domain + [('id', '>', cursor)]),
+            )
+            if auto_commit:
+                self.env.cr.commit()
+
+        elapsed = time.monotonic() - started
+        _logger.info(
+            "Repriced %s open purchase orders (%s lines) in %.1fs (%.1f orders/s), %s skipped, %s failed%s",
+            stats['orders'], stats['lines'], elapsed, stats['orders'] / elapsed if elapsed else 0.0, stats['skipped'],
+            stats['failed'], " (ids: %s)" % failed_ids if failed_ids else "",
+        )
+        return stats
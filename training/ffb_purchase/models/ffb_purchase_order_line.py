@@ -1,5 +1,6 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from collections import defaultdict
 
 # Constants
 MONEY_FORMAT = '{:,.2f}'
@@ -21,6 +22,9 @@ class PurchaseOrderLine(models.Model):
                                 help="Amount reduced from base sale price for purchase margin")
     price_calculation_info = fields.Text(string='Price Calculation Info', readonly=True,
                                         help="Details about price calculation")
+    pricing_snapshot_id = fields.Many2one('purchase.pricing.snapshot', string='Pricing Snapshot',
+                                          readonly=True, copy=False, index='btree_not_null',
+                                          help="Evidence of the sale prices the price was calculated from")
     pricing_config_available = fields.Boolean(string='Pricing Config Available', 
                                              compute='_compute_pricing_config_available', 
                                              help="Whether pricing configuration is available for this product and vendor")
@@ -30,16 +34,33 @@ class PurchaseOrderLine(models.Model):
     @api.depends('product_id', 'order_id.partner_id')
     def _compute_pricing_config_available(self):
         """Check if pricing configuration is available for this product and vendor"""
+        config_by_line = self._get_pricing_configs()
         for line in self:
-            if line.product_id and line.order_id.partner_id:
-                # Get pricing configuration using the model method
-                pricing_config_model = self.env[PRICING_CONFIG_MODEL]
-                config = pricing_config_model.get_config_for_product_vendor(  # type: ignore
-                    line.product_id.id, line.order_id.partner_id.id
-                )
-                line.pricing_config_available = bool(config)
-            else:
-                line.pricing_config_available = False
+            line.pricing_config_available = line in config_by_line
+
+    def _get_pricing_configs(self):
+        """Return {line: config} of the lines having an active configuration in their order's company
+
+        Configurations are resolved for all (product, vendor) pairs of a company at once.
+        """
+        config_by_line = {}
+        for company, lines in self.grouped(lambda line: line.order_id.company_id).items():
+            configs = self.env[PRICING_CONFIG_MODEL].get_configs_for_product_vendor_pairs(  # type: ignore
+                lines._get_product_vendor_pairs(), company_id=company.id,
+            )
+            for line in lines:
+                config = configs.get((line.product_id.id, line.order_id.partner_id.id))
+                if config:
+                    config_by_line[line] = config
+        return config_by_line
+
+    def _get_product_vendor_pairs(self):
+        """Return the (product_id, vendor_id) pairs of lines having both a product and a vendor"""
+        return {
+            (line.product_id.id, line.order_id.partner_id.id)
+            for line in self
+            if line.product_id and line.order_id.partner_id
+        }
 
     @api.depends('pricing_config_available', 'price_unit', 'product_id', 'order_id.partner_id')
     def _compute_pricing_status(self):
@@ -91,10 +112,8 @@ class PurchaseOrderLine(models.Model):
     def create(self, vals_list):
         """Override create to automatically apply pricing configuration"""
         lines = super().create(vals_list)
-        for line in lines:
-            # Otomatis terapkan pricing jika ada produk dan vendor, tidak peduli flag use_pricing_config
-            if line.product_id and line.order_id.partner_id:
-                line._apply_pricing_config()
+        # Otomatis terapkan pricing jika ada produk dan vendor, tidak peduli flag use_pricing_config
+        lines.filtered(lambda line: line.product_id and line.order_id.partner_id)._apply_pricing_config()
         return lines
 
     def write(self, vals):
@@ -103,119 +122,198 @@ class PurchaseOrderLine(models.Model):
         
         # Check if product_id or partner_id changed
         if 'product_id' in vals or (self.order_id and 'partner_id' in vals):
-            for line in self:
-                if line.product_id and line.order_id and line.order_id.partner_id:
-                    line._apply_pricing_config()
-                    
+            self.filtered(
+                lambda line: line.product_id and line.order_id and line.order_id.partner_id
+            )._apply_pricing_config()
+
         return result
 
     def _apply_pricing_config(self):
-        """Apply pricing configuration to this line"""
-        if not (self.product_id and self.order_id and self.order_id.partner_id):
-            self._clear_pricing_info()
+        """Apply pricing configuration to these lines
+
+        Configurations are resolved for all (product, vendor) pairs of each order
+        company at once, the price is computed once per distinct (configuration,
+        date window), a pricing snapshot is stored per window unless a line's
+        snapshot already holds the same calculation, and lines ending up with
+        identical values are written together.
+        """
+        if not self:
             return
 
-        try:
-            # Get pricing configuration
-            pricing_config_model = self.env[PRICING_CONFIG_MODEL]
-            config = pricing_config_model.get_config_for_product_vendor(  # type: ignore
-                self.product_id.id, self.order_id.partner_id.id
-            )
-            
+        priced_lines = self.filtered(lambda line: line.product_id and line.order_id and line.order_id.partner_id)
+        vals_by_line = {line: line._get_clear_pricing_vals() for line in self - priced_lines}
+
+        config_by_line = priced_lines._get_pricing_configs()
+        window_by_line = {}
+        price_details_by_window = {}
+        for line in priced_lines:
+            config = config_by_line.get(line)
             if not config:
-                self._apply_fallback_pricing()
-                return
+                vals_by_line[line] = line._get_fallback_pricing_vals()
+                continue
+
+            window = (config, line.order_id.pricing_date_from or False, line.order_id.pricing_date_to or False)
+            window_by_line[line] = window
+            if window not in price_details_by_window:
+                try:
+                    price_details_by_window[window] = config.get_price_details(window[1], window[2])
+                except Exception as e:
+                    # Handle any errors gracefully
+                    price_details_by_window[window] = e
+
+        # One snapshot per window actually priced from sale data; lines still
+        # being edited in an onchange get theirs once saved
+        snapshot_windows = {
+            window for line, window in window_by_line.items()
+            if line.id and not isinstance(price_details_by_window[window], Exception)
+            and price_details_by_window[window]['price_count']
+        }
+        # A line's snapshot is reused while the calculation it stores is unchanged
+        snapshot_by_window = {}
+        for line, window in window_by_line.items():
+            if window in snapshot_windows and window not in snapshot_by_window \
+                    and line.pricing_snapshot_id._matches_price_details(*window, price_details_by_window[window]):
+                snapshot_by_window[window] = line.pricing_snapshot_id
+        snapshot_by_window.update(self.env['purchase.pricing.snapshot']._create_from_price_details({
+            window: price_details_by_window[window]
+            for window in snapshot_windows - snapshot_by_window.keys()
+        }))
 
-            self._apply_config_pricing(config)
-                
-        except Exception as e:
-            # Handle any errors gracefully
-            self.base_sale_price = 0.0
-            self.margin_amount = 0.0
-            self.price_calculation_info = _('Error calculating price: %s') % str(e)
+        for line, window in window_by_line.items():
+            price_details = price_details_by_window[window]
+            if isinstance(price_details, Exception):
+                vals = {
+                    'base_sale_price': 0.0,
+                    'margin_amount': 0.0,
+                    'price_calculation_info': _('Error calculating price: %s') % str(price_details),
+                }
+            elif price_details['price_count'] == 0:
+                vals = line._get_fallback_with_config_vals()
+            else:
+                vals = line._get_calculated_pricing_vals(price_details)
+            vals['pricing_config_id'] = window[0].id
+            vals['pricing_snapshot_id'] = snapshot_by_window[window].id if window in snapshot_by_window else False
+            vals_by_line[line] = vals
+
+        self._write_pricing_vals(vals_by_line)
+
+    def _write_pricing_vals(self, vals_by_line):
+        """Write {line: vals} with one write per distinct set of values, skipping unchanged lines"""
+        line_ids_by_vals = defaultdict(list)
+        for line, vals in vals_by_line.items():
+            if line._pricing_vals_changed(vals):
+                line_ids_by_vals[frozenset(vals.items())].append(line.id)
+        for vals, line_ids in line_ids_by_vals.items():
+            self.browse(line_ids).write(dict(vals))
+
+    def _pricing_vals_changed(self, vals):
+        """Whether writing vals would change this line, values compared as stored (e.g. rounded prices)"""
+        self.ensure_one()
+        for name, value in vals.items():
+            field = self._fields[name]
+            if self[name] != field.convert_to_record(field.convert_to_cache(value, self), self):
+                return True
+        return False
+
+    def _get_clear_pricing_vals(self):
+        """Values clearing pricing information"""
+        return {
+            'pricing_config_id': False,
+            'pricing_snapshot_id': False,
+            'base_sale_price': 0.0,
+            'margin_amount': 0.0,
+            'price_calculation_info': _('Product or vendor not specified.'),
+        }
 
     def _clear_pricing_info(self):
         """Clear pricing information"""
-        self.pricing_config_id = False
-        self.base_sale_price = 0.0
-        self.margin_amount = 0.0
-        self.price_calculation_info = _('Product or vendor not specified.')
+        self.write(self._get_clear_pricing_vals())
 
-    def _apply_fallback_pricing(self):
-        """Apply fallback pricing when no config found"""
-        self.pricing_config_id = False
-        self.base_sale_price = 0.0
-        self.margin_amount = 0.0
-        
+    def _get_fallback_pricing_vals(self):
+        """Values of the fallback pricing when no config found"""
+        self.ensure_one()
+        vals = {
+            'pricing_config_id': False,
+            'pricing_snapshot_id': False,
+            'base_sale_price': 0.0,
+            'margin_amount': 0.0,
+        }
         if self.product_id.standard_price > 0:
-            self.price_unit = self.product_id.standard_price
-            self.price_calculation_info = _('Using product standard cost: %s') % (
+            vals['price_unit'] = self.product_id.standard_price
+            vals['price_calculation_info'] = _('Using product standard cost: %s') % (
                 MONEY_FORMAT.format(self.product_id.standard_price)
             )
         elif self.product_id.list_price > 0:
-            self.price_unit = self.product_id.list_price
-            self.price_calculation_info = _('Using product list price: %s') % (
+            vals['price_unit'] = self.product_id.list_price
+            vals['price_calculation_info'] = _('Using product list price: %s') % (
                 MONEY_FORMAT.format(self.product_id.list_price)
             )
         else:
-            self.price_calculation_info = _('No pricing configuration found. Please set price manually.')
+            vals['price_calculation_info'] = _('No pricing configuration found. Please set price manually.')
+        return vals
 
-    def _apply_config_pricing(self, config):
-        """Apply pricing from configuration"""
-        self.pricing_config_id = config.id
-        date_from = self.order_id.pricing_date_from or False
-        date_to = self.order_id.pricing_date_to or False
-        
-        price_details = config.get_price_details(date_from, date_to)
-        
-        if price_details['price_count'] == 0:
-            self._apply_fallback_with_config()
-        else:
-            self._apply_calculated_pricing(price_details)
+    def _apply_fallback_pricing(self):
+        """Apply fallback pricing when no config found"""
+        self._write_pricing_vals({line: line._get_fallback_pricing_vals() for line in self})
 
-    def _apply_fallback_with_config(self):
-        """Apply fallback pricing when config exists but no sale data"""
-        self.base_sale_price = 0.0
-        self.margin_amount = 0.0
-        
+    def _get_fallback_with_config_vals(self):
+        """Values of the fallback pricing when config exists but no sale data"""
+        self.ensure_one()
+        vals = {
+            'base_sale_price': 0.0,
+            'margin_amount': 0.0,
+        }
         if self.product_id.standard_price > 0:
-            self.price_unit = self.product_id.standard_price
-            self.price_calculation_info = _('No sale data found. Using product standard cost: %s') % (
+            vals['price_unit'] = self.product_id.standard_price
+            vals['price_calculation_info'] = _('No sale data found. Using product standard cost: %s') % (
                 MONEY_FORMAT.format(self.product_id.standard_price)
             )
         elif self.product_id.list_price > 0:
-            self.price_unit = self.product_id.list_price  
-            self.price_calculation_info = _('No sale data found. Using product list price: %s') % (
+            vals['price_unit'] = self.product_id.list_price
+            vals['price_calculation_info'] = _('No sale data found. Using product list price: %s') % (
                 MONEY_FORMAT.format(self.product_id.list_price)
             )
         else:
-            self.price_calculation_info = _('No sale prices found in the specified date range.')
+            vals['price_calculation_info'] = _('No sale prices found in the specified date range.')
+        return vals
+
+    def _apply_fallback_with_config(self):
+        """Apply fallback pricing when config exists but no sale data"""
+        self._write_pricing_vals({line: line._get_fallback_with_config_vals() for line in self})
+
+    def _get_calculated_pricing_vals(self, price_details):
+        """Values of the pricing calculated from sale data"""
+        method_name = dict(
+            self.env[PRICING_CONFIG_MODEL]._fields['pricing_method']._description_selection(self.env)
+        )[price_details['pricing_method']]
+        return {
+            'base_sale_price': price_details['base_price'],
+            'margin_amount': price_details['margin_amount'],
+            'price_unit': price_details['final_price'],
+            'price_calculation_info': _(
+                'Auto-calculated:\n'
+                'Method: %s\n'
+                'Base Price: %s\n'
+                'Purchase Margin: %s%% (-%s)\n'
+                'Final Price: %s\n'
+                'Based on %s sale orders'
+            ) % (
+                method_name,
+                MONEY_FORMAT.format(price_details['base_price']),
+                price_details['purchase_margin'],
+                MONEY_FORMAT.format(price_details['margin_amount']),
+                MONEY_FORMAT.format(price_details['final_price']),
+                price_details['price_count']
+            ),
+        }
 
     def _apply_calculated_pricing(self, price_details):
         """Apply calculated pricing from sale data"""
-        self.base_sale_price = price_details['base_price']
-        self.margin_amount = price_details['margin_amount']
-        self.price_unit = price_details['final_price']
-        
-        method_name = _('Minimum') if price_details['pricing_method'] == 'min_price' else _('Average')
-        self.price_calculation_info = _(
-            'Auto-calculated:\n'
-            'Method: %s Sale Price\n'
-            'Base Price: %s\n'
-            'Purchase Margin: %s%% (-%s)\n'
-            'Final Price: %s\n'
-            'Based on %s sale orders'
-        ) % (
-            method_name,
-            MONEY_FORMAT.format(price_details['base_price']),
-            price_details['purchase_margin'],
-            MONEY_FORMAT.format(price_details['margin_amount']),
-            MONEY_FORMAT.format(price_details['final_price']),
-            price_details['price_count']
-        )
+        self.write(self._get_calculated_pricing_vals(price_details))
 
     def action_view_pricing_details(self):
-        """Show detailed pricing calculation"""
+        """Show the pricing calculation stored when the line was priced"""
+        self.ensure_one()
         if not self.pricing_config_id:
             return {
                 'type': CLIENT_ACTION,
@@ -227,39 +325,16 @@ class PurchaseOrderLine(models.Model):
                 }
             }
 
-        date_from = self.order_id.pricing_date_from or False
-        date_to = self.order_id.pricing_date_to or False
-        # Get price details from the pricing configuration
-        price_details = self.pricing_config_id.get_price_details(date_from, date_to)  # type: ignore
-
-        message = _(
-            'Product: %s\n'
-            'Vendor: %s\n'
-            'Pricing Method: %s\n'
-            'Date Range: %s to %s\n'
-            'Sale Orders Found: %s\n'
-            'Base Price: %s\n'
-            'Purchase Margin: %s%% (-%s)\n'
-            'Final Purchase Price: %s'
-        ) % (
-            self.product_id.name,
-            self.order_id.partner_id.name,
-            _('Minimum') if price_details['pricing_method'] == 'min_price' else _('Average'),
-            date_from or _('Not Set'),
-            date_to or _('Not Set'),
-            price_details['price_count'],
-            MONEY_FORMAT.format(price_details['base_price']),
-            price_details['purchase_margin'],
-            MONEY_FORMAT.format(price_details['margin_amount']),
-            MONEY_FORMAT.format(price_details['final_price'])
-        )
+        if self.pricing_snapshot_id:
+            # Evidence stored at pricing time, not recalculated from today's sales
+            return self.pricing_snapshot_id.action_view_calculation_details()
 
         return {
             'type': CLIENT_ACTION,
             'tag': 'display_notification',
             'params': {
                 'title': _('Pricing Calculation Details'),
-                'message': message,
+                'message': self.price_calculation_info or _('No sale data was used for this price.'),
                 'type': 'info',
             }
         }
@@ -1,12 +1,33 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from collections import Counter
+from datetime import timedelta
+from psycopg2.errors import UniqueViolation
 
 # Constants
 CLIENT_ACTION = 'ir.actions.client'
 MONEY_FORMAT = '{:,.2f}'
 DAILY_PRICE_MODEL = 'daily.price'
 VALIDATION_ERROR_TITLE = 'Validation Error'
-ORDER_DATE_FIELD = 'order_id.date_order'
+SALE_ORDER_DETAILS_ORDER = 'date_order desc, id desc'
+# Fields that change which configuration applies to a (product, vendor) pair
+CONFIG_LOOKUP_FIELDS = {'product_id', 'vendor_id', 'active', 'company_id'}
+# Partial unique index: one active configuration per product, vendor and company
+UNIQUE_ACTIVE_CONFIG_INDEX = 'purchase_pricing_config_active_product_vendor_company_uniq'
+# Fields the stored calculation preview depends on
+TEST_CALCULATION_FIELDS = {
+    'product_id', 'purchase_margin', 'pricing_method', 'date_range_days', 'trim_percent', 'ewma_alpha',
+}
+# Methods to derive the base price from the sale prices of the window
+PRICING_METHODS = [
+    ('min_price', 'Minimum Sale Price'),
+    ('avg_price', 'Average Sale Price'),
+    ('vwap', 'Volume-Weighted Average Price'),
+    ('median', 'Median Sale Price'),
+    ('trimmed_mean', 'Trimmed Mean Sale Price'),
+    ('ewma', 'Exponentially-Weighted Average Price'),
+]
 
 
 class PurchasePricingConfig(models.Model):
@@ -20,11 +41,12 @@ class PurchasePricingConfig(models.Model):
                                domain=['|', ('is_company', '=', True), ('supplier_rank', '>', 0)])
     
     # Pricing method
-    pricing_method = fields.Selection([
-        ('min_price', 'Minimum Sale Price'),
-        ('avg_price', 'Average Sale Price'),
-    ], string='Pricing Method', required=True, default='min_price',
+    pricing_method = fields.Selection(PRICING_METHODS, string='Pricing Method', required=True, default='min_price',
        help="Method to calculate base price from daily sale prices")
+    trim_percent = fields.Float(string='Trim (%)', default=10.0, digits=(5, 2),
+                                help="Share of the lowest and of the highest sale prices ignored by the trimmed mean")
+    ewma_alpha = fields.Float(string='Smoothing Factor', default=0.3, digits=(3, 2),
+                              help="Weight of the most recent day in the exponentially-weighted average (0 to 1)")
     
     # Purchase margin configuration
     purchase_margin = fields.Float(string='Purchase Margin (%)', default=10.0, digits=(5,2),
@@ -37,12 +59,14 @@ class PurchasePricingConfig(models.Model):
     # Computed fields
     display_name = fields.Char(string='Display Name', compute='_compute_display_name', store=True)
     
-    # Test calculation results (computed fields)
-    test_base_price = fields.Float(string='Base Sale Price', compute='_compute_test_calculation', readonly=True)
-    test_margin_amount = fields.Float(string='Margin Amount', compute='_compute_test_calculation', readonly=True)
-    test_final_price = fields.Float(string='Final Purchase Price', compute='_compute_test_calculation', readonly=True)
-    test_price_count = fields.Integer(string='Sale Orders Found', compute='_compute_test_calculation', readonly=True)
-    test_status_message = fields.Char(string='Status', compute='_compute_test_calculation', readonly=True)
+    # Test calculation results (stored preview, see _refresh_test_calculations)
+    test_base_price = fields.Float(string='Base Sale Price', readonly=True)
+    test_margin_amount = fields.Float(string='Margin Amount', readonly=True)
+    test_final_price = fields.Float(string='Final Purchase Price', readonly=True)
+    test_price_count = fields.Integer(string='Sale Orders Found', readonly=True)
+    test_status_message = fields.Char(string='Status', readonly=True)
+    test_calculated_at = fields.Datetime(string='Calculated At', readonly=True,
+                                         help="When the calculation preview was last refreshed")
     active = fields.Boolean(string='Active', default=True)
     
     # Company
@@ -57,46 +81,73 @@ class PurchasePricingConfig(models.Model):
             else:
                 record.display_name = record.name or _('New Configuration')
 
-    @api.depends('product_id', 'purchase_margin', 'pricing_method', 'date_range_days')
-    def _compute_test_calculation(self):
-        for record in self:
-            if not record.product_id:
-                record._set_empty_test_values()
-                record.test_status_message = _('Please select a product first')
-                continue
-                
-            try:
-                price_details = record.get_price_details()
-                record._set_test_values_from_details(price_details)
-                    
-            except Exception as e:
-                record._set_empty_test_values()
-                record.test_status_message = _('Error: %s') % str(e)
+    def _refresh_test_calculations(self):
+        """Store a fresh calculation preview on these configurations
+
+        The daily sale statistics of all their products are read with one query
+        over the widest window, then each configuration merges its own days.
+        """
+        calculated_at = fields.Datetime.now()
+        configs = self.filtered('product_id')
+        without_product = self - configs
+        if without_product:
+            without_product._set_empty_test_values()
+            without_product.write({
+                'test_status_message': _('Please select a product first'),
+                'test_calculated_at': calculated_at,
+            })
+        if not configs:
+            return
+
+        today = fields.Date.today()
+        daily_stats = self.env['sale.price.daily'].get_daily_stats(
+            configs.product_id.ids, today - timedelta(days=max(configs.mapped('date_range_days'))), today,
+        )
+        for config in configs:
+            date_from, date_to = config._get_price_window()
+            window_stats = {
+                day: stats for day, stats in daily_stats.get(config.product_id.id, {}).items()
+                if date_from <= day <= date_to
+            }
+            config._set_test_values_from_details(config._build_price_details(window_stats))
+            config.test_calculated_at = calculated_at
 
     def _set_empty_test_values(self):
         """Helper method to set empty test values"""
-        self.test_base_price = 0.0
-        self.test_margin_amount = 0.0
-        self.test_final_price = 0.0
-        self.test_price_count = 0
+        self.write({
+            'test_base_price': 0.0,
+            'test_margin_amount': 0.0,
+            'test_final_price': 0.0,
+            'test_price_count': 0,
+        })
 
     def _set_test_values_from_details(self, price_details):
         """Helper method to set test values from price details"""
-        self.test_base_price = price_details['base_price']
-        self.test_margin_amount = price_details['margin_amount']
-        self.test_final_price = price_details['final_price']
-        self.test_price_count = price_details['price_count']
-        
         if price_details['price_count'] == 0:
-            self.test_status_message = _('No sale orders found in date range')
+            status_message = _('No sale orders found in date range')
         else:
-            self.test_status_message = _('Calculation ready - click "View Details" for breakdown')
+            status_message = _('Calculation ready - click "View Details" for breakdown')
+        self.write({
+            'test_base_price': price_details['base_price'],
+            'test_margin_amount': price_details['margin_amount'],
+            'test_final_price': price_details['final_price'],
+            'test_price_count': price_details['price_count'],
+            'test_status_message': status_message,
+        })
+
+    def action_refresh_test_calculation(self):
+        """Refresh the calculation preview of the selected configurations"""
+        self._refresh_test_calculations()
+        return True
+
+    @api.model
+    def _cron_refresh_test_calculations(self):
+        """Refresh the calculation preview of every active configuration"""
+        self.search([('active', '=', True)])._refresh_test_calculations()
 
     def _get_no_data_message(self):
         """Helper method to get no data message"""
-        from datetime import timedelta
-        date_from = fields.Date.today() - timedelta(days=self.date_range_days)
-        date_to = fields.Date.today()
+        date_from, date_to = self._get_price_window()
         
         return _(
             'No sale orders found for product "%s"\n'
@@ -125,92 +176,76 @@ class PurchasePricingConfig(models.Model):
             if record.date_range_days <= 0:
                 raise ValidationError(_('Date range must be greater than 0.'))
 
-    @api.constrains('product_id', 'vendor_id')
-    def _check_unique_product_vendor(self):
+    @api.constrains('trim_percent')
+    def _check_trim_percent(self):
         for record in self:
-            if record.product_id and record.vendor_id:
-                existing_config = self.search([
-                    ('product_id', '=', record.product_id.id),
-                    ('vendor_id', '=', record.vendor_id.id),
-                    ('id', '!=', record.id),
-                    ('active', '=', True)
-                ])
-                if existing_config:
-                    raise ValidationError(_(
-                        'An active pricing configuration already exists for product "%s" and vendor "%s".'
-                    ) % (record.product_id.name, record.vendor_id.name))
+            if record.trim_percent < 0 or record.trim_percent >= 50:
+                raise ValidationError(_('Trim must be at least 0% and less than 50%.'))
+
+    @api.constrains('ewma_alpha')
+    def _check_ewma_alpha(self):
+        for record in self:
+            if record.ewma_alpha <= 0 or record.ewma_alpha > 1:
+                raise ValidationError(_('Smoothing factor must be greater than 0 and at most 1.'))
 
     def calculate_purchase_price(self, date_from=None, date_to=None):
         """Calculate purchase price based on sale orders for the same product"""
         self.ensure_one()
-        
+        return self.get_price_details(date_from, date_to)['final_price']
+
+    def _get_price_window(self, date_from=None, date_to=None):
+        """Return the (date_from, date_to) window, defaulting to the last date_range_days days"""
+        self.ensure_one()
         if not date_from:
-            from datetime import timedelta
             date_from = fields.Date.today() - timedelta(days=self.date_range_days)
-        
         if not date_to:
             date_to = fields.Date.today()
+        return date_from, date_to
 
-        # Get sale order lines for this product from all vendors
-        sale_lines = self.env['sale.order.line'].search([
-            ('product_id', '=', self.product_id.id),
-            (ORDER_DATE_FIELD, '>=', date_from),
-            (ORDER_DATE_FIELD, '<=', date_to),
-            ('order_id.state', 'in', ['sale'])  # Only confirmed orders
-        ])
-
-        if not sale_lines:
-            return 0.0
-
-        prices = sale_lines.mapped('price_unit')
-        
-        if self.pricing_method == 'min_price':
-            base_price = min(prices)
-        else:  # avg_price
-            base_price = sum(prices) / len(prices)
-
-        # Apply purchase margin
-        margin_amount = base_price * (self.purchase_margin / 100)
-        final_price = base_price - margin_amount
+    def _get_sale_line_domain(self, date_from, date_to):
+        """Domain of confirmed sale order lines of this product within the window (whole days)"""
+        self.ensure_one()
+        return self.env['sale.price.daily']._get_confirmed_sale_line_domain(
+            [self.product_id.id], fields.Date.to_date(date_from), fields.Date.to_date(date_to),
+        )
 
-        return final_price
+    def _get_daily_price_stats(self, date_from, date_to):
+        """Return the {date: values} daily sale statistics of the product in the window"""
+        self.ensure_one()
+        return self.env['sale.price.daily'].get_daily_stats(
+            [self.product_id.id], date_from, date_to,
+        ).get(self.product_id.id, {})
 
     def get_price_details(self, date_from=None, date_to=None):
-        """Get detailed price calculation information from sale orders"""
+        """Get price calculation information from sale orders
+
+        Only aggregated figures are returned; use get_sale_order_details()
+        for the contributing sale orders.
+        """
         self.ensure_one()
-        
-        if not date_from:
-            from datetime import timedelta
-            date_from = fields.Date.today() - timedelta(days=self.date_range_days)
-        
-        if not date_to:
-            date_to = fields.Date.today()
+        date_from, date_to = self._get_price_window(date_from, date_to)
+        return self._build_price_details(self._get_daily_price_stats(date_from, date_to))
 
-        # Get sale order lines for this product from all vendors
-        sale_lines = self.env['sale.order.line'].search([
-            ('product_id', '=', self.product_id.id),
-            (ORDER_DATE_FIELD, '>=', date_from),
-            (ORDER_DATE_FIELD, '<=', date_to),
-            ('order_id.state', 'in', ['sale'])  # Only confirmed orders
-        ])
+    def _build_price_details(self, daily_stats):
+        """Apply the pricing method and margin to the {date: values} sale statistics of a window
 
-        if not sale_lines:
+        method_prices holds the base price every method would give, for comparison.
+        """
+        self.ensure_one()
+        summary = self.env['sale.price.daily'].summarize_days(daily_stats, self.trim_percent, self.ewma_alpha)
+        if not summary['price_count']:
             return {
                 'base_price': 0.0,
                 'margin_amount': 0.0,
                 'final_price': 0.0,
                 'price_count': 0,
+                'qty_sum': 0.0,
+                'method_prices': {},
                 'pricing_method': self.pricing_method,
                 'purchase_margin': self.purchase_margin,
-                'sale_orders': []
             }
 
-        prices = sale_lines.mapped('price_unit')
-        
-        if self.pricing_method == 'min_price':
-            base_price = min(prices)
-        else:  # avg_price
-            base_price = sum(prices) / len(prices)
+        base_price = summary['method_prices'][self.pricing_method]
 
         # Apply purchase margin
         margin_amount = base_price * (self.purchase_margin / 100)
@@ -220,26 +255,163 @@ class PurchasePricingConfig(models.Model):
             'base_price': base_price,
             'margin_amount': margin_amount,
             'final_price': final_price,
-            'price_count': len(prices),
+            'price_count': summary['price_count'],
+            'qty_sum': summary['qty_sum'],
+            'method_prices': summary['method_prices'],
             'pricing_method': self.pricing_method,
             'purchase_margin': self.purchase_margin,
-            'sale_orders': sale_lines.mapped(lambda line: {
-                'date': line.order_id.date_order.date(),
-                'price': line.price_unit,
-                'customer': line.order_id.partner_id.name,
-                'order_name': line.order_id.name,
-                'quantity': line.product_uom_qty
-            })
         }
 
+    def get_sale_order_details(self, date_from=None, date_to=None, offset=0, limit=None, order=SALE_ORDER_DETAILS_ORDER):
+        """Get one page of the sale orders used in the price calculation"""
+        self.ensure_one()
+        date_from, date_to = self._get_price_window(date_from, date_to)
+        sale_lines = self.env['sale.order.line'].search(
+            self._get_sale_line_domain(date_from, date_to), offset=offset, limit=limit, order=order,
+        )
+        return [{
+            'date': line.date_order.date(),
+            'price': line.price_unit,
+            'customer': line.order_id.partner_id.name,
+            'order_name': line.order_id.name,
+            'quantity': line.product_uom_qty
+        } for line in sale_lines]
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS %s
+                ON %s (product_id, vendor_id, COALESCE(company_id, 0))
+             WHERE active
+            """,
+            SQL.identifier(UNIQUE_ACTIVE_CONFIG_INDEX),
+            SQL.identifier(self._table),
+        ))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to invalidate the configuration lookup cache and store the calculation preview"""
+        try:
+            with self.env.cr.savepoint():
+                configs = super().create(vals_list)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_ACTIVE_CONFIG_INDEX:
+                raise
+            defaults = self.default_get(['active', 'company_id'])
+            keys = [
+                (
+                    vals.get('product_id'),
+                    vals.get('vendor_id'),
+                    vals.get('company_id', defaults.get('company_id')) or False,
+                )
+                for vals in vals_list
+                if vals.get('active', defaults.get('active'))
+            ]
+            raise self._get_duplicate_config_error(keys) from None
+        self.env.registry.clear_cache()
+        configs._refresh_test_calculations()
+        return configs
+
+    def write(self, vals):
+        """Override write to invalidate the configuration lookup cache (also covers archiving)
+
+        The calculation preview is refreshed when a field it depends on changes.
+        """
+        if not CONFIG_LOOKUP_FIELDS & vals.keys():
+            result = super().write(vals)
+            if TEST_CALCULATION_FIELDS & vals.keys():
+                self._refresh_test_calculations()
+            return result
+        try:
+            with self.env.cr.savepoint():
+                result = super().write(vals)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_ACTIVE_CONFIG_INDEX:
+                raise
+            keys = [
+                (
+                    vals.get('product_id', record.product_id.id),
+                    vals.get('vendor_id', record.vendor_id.id),
+                    vals.get('company_id', record.company_id.id) or False,
+                )
+                for record in self
+                if vals.get('active', record.active)
+            ]
+            raise self._get_duplicate_config_error(keys, exclude_ids=self.ids) from None
+        self.env.registry.clear_cache()
+        if TEST_CALCULATION_FIELDS & vals.keys():
+            self._refresh_test_calculations()
+        return result
+
     @api.model
-    def get_config_for_product_vendor(self, product_id, vendor_id):
-        """Get active pricing configuration for product and vendor"""
-        return self.search([
-            ('product_id', '=', product_id),
-            ('vendor_id', '=', vendor_id),
-            ('active', '=', True)
-        ], limit=1)
+    def _get_duplicate_config_error(self, keys, exclude_ids=()):
+        """Build the error for the first active (product_id, vendor_id, company_id) key violating uniqueness
+
+        Only called once the database rejected the rows, so the extra lookup stays off the normal path.
+        """
+        duplicate_keys = {key for key, count in Counter(keys).items() if count > 1}
+        existing_configs = self.sudo().search_fetch([
+            ('product_id', 'in', [key[0] for key in keys]),
+            ('vendor_id', 'in', [key[1] for key in keys]),
+            ('id', 'not in', list(exclude_ids)),
+            ('active', '=', True),
+        ], ['product_id', 'vendor_id', 'company_id'])
+        duplicate_keys.update(
+            (config.product_id.id, config.vendor_id.id, config.company_id.id or False)
+            for config in existing_configs
+        )
+        for product_id, vendor_id, company_id in keys:
+            if (product_id, vendor_id, company_id) in duplicate_keys:
+                return ValidationError(_(
+                    'An active pricing configuration already exists for product "%s" and vendor "%s".'
+                ) % (
+                    self.env['product.product'].browse(product_id).name,
+                    self.env['res.partner'].browse(vendor_id).name,
+                ))
+        return ValidationError(_('An active pricing configuration already exists for this product and vendor.'))
+
+    def unlink(self):
+        """Override unlink to invalidate the configuration lookup cache"""
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_active_config_map(self, company_id):
+        """Return {(product_id, vendor_id): config_id} of the active configurations of a company
+
+        Cached per registry; a miss loads every pair with one query.
+        """
+        configs = self.sudo().search_fetch(
+            [('active', '=', True), ('company_id', 'in', [company_id, False])],
+            ['product_id', 'vendor_id', 'company_id'],
+            order='id',
+        )
+        config_map = {}
+        # Company specific configurations win over shared ones, then the oldest one
+        for config in configs.sorted(lambda config: (not config.company_id, config.id)):
+            config_map.setdefault((config.product_id.id, config.vendor_id.id), config.id)
+        return tools.frozendict(config_map)
+
+    @api.model
+    def get_config_for_product_vendor(self, product_id, vendor_id, company_id=None):
+        """Get active pricing configuration for product and vendor (of company_id, default the current company)"""
+        config_map = self._get_active_config_map(company_id or self.env.company.id)
+        return self.browse(config_map.get((product_id, vendor_id)))
+
+    @api.model
+    def get_configs_for_product_vendor_pairs(self, pairs, company_id=None):
+        """Get active pricing configurations for many (product_id, vendor_id) pairs at once
+        Configurations are those of company_id, default the current company.
+        Returns dict {(product_id, vendor_id): config}"""
+        config_map = self._get_active_config_map(company_id or self.env.company.id)
+        return {
+            pair: self.browse(config_map[pair])
+            for pair in set(pairs)
+            if pair in config_map
+        }
 
     @api.model
     def get_purchase_price_for_product_vendor(self, product_id, vendor_id, date_from=None, date_to=None):
@@ -294,9 +466,7 @@ class PurchasePricingConfig(models.Model):
             price_details = self.get_price_details()
             
             if price_details['price_count'] == 0:
-                from datetime import timedelta
-                date_from = fields.Date.today() - timedelta(days=self.date_range_days)
-                date_to = fields.Date.today()
+                date_from, date_to = self._get_price_window()
                 
                 message = _(
                     '⚠️ No Sale Orders Found\n\n'
@@ -326,16 +496,16 @@ class PurchasePricingConfig(models.Model):
                     }
                 }
             
-            method_name = _('Minimum') if self.pricing_method == 'min_price' else _('Average')
+            method_name = dict(self._fields['pricing_method']._description_selection(self.env))[self.pricing_method]
             
-            # Create detailed sale order breakdown
+            # Create detailed sale order breakdown (show max 5 entries)
             order_info = []
-            for sale_order in price_details['sale_orders']:
+            for sale_order in self.get_sale_order_details(limit=5):
                 order_info.append(f"  • {sale_order['customer']} ({sale_order['date']}) - {sale_order['order_name']}: {MONEY_FORMAT.format(sale_order['price'])} x {sale_order['quantity']:.0f}")
             
-            order_breakdown = '\n'.join(order_info[:5])  # Show max 5 entries
-            if len(price_details['sale_orders']) > 5:
-                order_breakdown += f"\n  ... and {len(price_details['sale_orders']) - 5} more"
+            order_breakdown = '\n'.join(order_info)
+            if price_details['price_count'] > 5:
+                order_breakdown += f"\n  ... and {price_details['price_count'] - 5} more"
             
             # Calculate profit margin percentage
             if price_details['base_price'] > 0:
@@ -347,7 +517,7 @@ class PurchasePricingConfig(models.Model):
                 '✅ Price Calculation Test Results\n\n'
                 '📦 Product: %s\n'
                 '🏭 Vendor: %s\n'
-                '📊 Method: %s Sale Price\n'
+                '📊 Method: %s\n'
                 '📅 Date Range: %s days\n'
                 '📈 Sale Orders Found: %s\n\n'
                 '💰 Pricing Details:\n'
@@ -463,17 +633,18 @@ class PurchasePricingConfig(models.Model):
             else:
                 profit_margin = 0
             
-            from datetime import timedelta
-            date_from = fields.Date.today() - timedelta(days=self.date_range_days)
-            date_to = fields.Date.today()
+            date_from, date_to = self._get_price_window()
             
             # Create wizard record with calculation details
-            wizard = self.env['wizard.calculation.details'].create({
+            wizard_model = self.env['wizard.calculation.details']
+            wizard = wizard_model.create({
                 'config_id': self.id,
                 'product_name': self.product_id.name,
                 'vendor_name': self.vendor_id.name if self.vendor_id else _('Not Set'),
                 'pricing_method': self.pricing_method,
                 'purchase_margin': self.purchase_margin,
+                'trim_percent': self.trim_percent,
+                'ewma_alpha': self.ewma_alpha,
                 'date_range_days': self.date_range_days,
                 'date_from': date_from,
                 'date_to': date_to,
@@ -482,24 +653,10 @@ class PurchasePricingConfig(models.Model):
                 'margin_amount': price_details['margin_amount'],
                 'final_price': price_details['final_price'],
                 'profit_margin': profit_margin,
+                'qty_sum': price_details['qty_sum'],
+                **wizard_model._get_method_price_vals(price_details['method_prices']),
             })
             
-            # Create sale order lines
-            line_vals = []
-            for sale_order in price_details['sale_orders']:
-                line_vals.append({
-                    'wizard_id': wizard.id,
-                    'customer_name': sale_order['customer'],
-                    'order_name': sale_order['order_name'],
-                    'order_date': sale_order['date'],
-                    'unit_price': sale_order['price'],
-                    'quantity': sale_order['quantity'],
-                    'subtotal': sale_order['price'] * sale_order['quantity'],
-                })
-            
-            if line_vals:
-                self.env['wizard.calculation.details.line'].create(line_vals)
-            
             # Return modal wizard
             return {
                 'name': _('Price Calculation Details'),
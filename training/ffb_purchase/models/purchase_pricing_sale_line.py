@@ -0,0 +1,54 @@
+from odoo import models, fields, tools
+from odoo.tools import SQL
+
+from .purchase_pricing_snapshot import SNAPSHOT_SALE_LINE_TABLE
+
+
+class PurchasePricingSaleLine(models.Model):
+    _name = 'purchase.pricing.sale.line'
+    _description = 'Sale Order Line Used in Purchase Pricing'
+    _auto = False
+    _order = 'date_order desc, id desc'
+
+    # Same ids as sale.order.line, so snapshot sale line ids can be used directly.
+    # Every state is kept: a snapshot still shows lines of orders cancelled later,
+    # live windows filter on the state themselves
+    order_id = fields.Many2one('sale.order', string='Sale Order', readonly=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', readonly=True)
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    date_order = fields.Datetime(string='Order Date', readonly=True)
+    state = fields.Selection(
+        selection=lambda self: self.env['sale.order']._fields['state']._description_selection(self.env),
+        string='Status', readonly=True,
+    )
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    unit_price = fields.Float(string='Unit Price', readonly=True, aggregator='avg')
+    quantity = fields.Float(string='Quantity', readonly=True)
+    subtotal = fields.Float(string='Subtotal', readonly=True)
+    # Same relation table as the snapshot's sale lines: filtering on it is a subselect
+    snapshot_ids = fields.Many2many('purchase.pricing.snapshot', SNAPSHOT_SALE_LINE_TABLE, 'sale_line_id', 'snapshot_id',
+                                    string='Pricing Snapshots', readonly=True)
+
+    def init(self):
+        # A plain view: always in line with the sale orders, read one page at a time
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL("""
+            CREATE OR REPLACE VIEW %(table)s AS (
+                SELECT sol.id,
+                       sol.order_id,
+                       so.partner_id AS customer_id,
+                       sol.product_id,
+                       sol.date_order,
+                       sol.state,
+                       sol.company_id,
+                       sol.currency_id,
+                       sol.price_unit AS unit_price,
+                       sol.product_uom_qty AS quantity,
+                       sol.price_unit * sol.product_uom_qty AS subtotal
+                  FROM sale_order_line sol
+                  JOIN sale_order so ON so.id = sol.order_id
+                 WHERE sol.product_id IS NOT NULL
+                   AND sol.date_order IS NOT NULL
+            )
+        """, table=SQL.identifier(self._table)))
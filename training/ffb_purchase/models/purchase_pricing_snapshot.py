@@ -0,0 +1,162 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+from .purchase_pricing_config import PRICING_METHODS
+
+# (snapshot_id, sale_line_id) pairs of the contributing sale lines
+SNAPSHOT_SALE_LINE_TABLE = 'purchase_pricing_snapshot_sale_line_rel'
+
+
+class PurchasePricingSnapshot(models.Model):
+    _name = 'purchase.pricing.snapshot'
+    _description = 'Purchase Pricing Snapshot'
+    _order = 'create_date desc, id desc'
+
+    config_id = fields.Many2one('purchase.pricing.config', string='Pricing Configuration',
+                                ondelete='set null', index=True, readonly=True)
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    vendor_id = fields.Many2one('res.partner', string='Vendor', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    date_from = fields.Date(string='Date From', readonly=True)
+    date_to = fields.Date(string='Date To', readonly=True)
+    pricing_method = fields.Selection(PRICING_METHODS, string='Pricing Method', readonly=True)
+    purchase_margin = fields.Float(string='Purchase Margin (%)', digits=(5, 2), readonly=True)
+    trim_percent = fields.Float(string='Trim (%)', digits=(5, 2), readonly=True)
+    ewma_alpha = fields.Float(string='Smoothing Factor', digits=(3, 2), readonly=True)
+    base_price = fields.Float(string='Base Sale Price', readonly=True)
+    margin_amount = fields.Float(string='Purchase Margin Amount', readonly=True)
+    final_price = fields.Float(string='Final Purchase Price', readonly=True)
+    price_count = fields.Integer(string='Sale Orders Found', readonly=True)
+    qty_sum = fields.Float(string='Quantity Sold', readonly=True)
+    method_prices = fields.Json(string='Method Prices', readonly=True,
+                                help="Base price every pricing method gave over the window")
+    sale_line_ids = fields.Many2many('sale.order.line', SNAPSHOT_SALE_LINE_TABLE, 'snapshot_id', 'sale_line_id',
+                                     string='Contributing Sale Lines', readonly=True,
+                                     help="Confirmed sale order lines the price was calculated from")
+    purchase_line_ids = fields.One2many('purchase.order.line', 'pricing_snapshot_id',
+                                        string='Purchase Order Lines', readonly=True)
+
+    @api.depends('product_id', 'vendor_id', 'create_date')
+    def _compute_display_name(self):
+        for snapshot in self:
+            snapshot.display_name = f"{snapshot.product_id.name or ''} - {snapshot.vendor_id.name or ''} " \
+                                    f"({fields.Datetime.to_string(snapshot.create_date) or _('New')})"
+
+    def write(self, vals):
+        raise UserError(_("Pricing snapshots cannot be modified."))
+
+    def _matches_price_details(self, config, date_from, date_to, price_details):
+        """Whether this snapshot already stores the given price details of config over the window,
+        calculated from the same sale lines"""
+        if len(self) != 1:
+            return False
+        date_from, date_to = config._get_price_window(date_from, date_to)
+        if not (
+            self.config_id == config
+            and self.date_from == fields.Date.to_date(date_from)
+            and self.date_to == fields.Date.to_date(date_to)
+            and self.pricing_method == price_details['pricing_method']
+            and self.purchase_margin == config.purchase_margin
+            and self.trim_percent == config.trim_percent
+            and self.ewma_alpha == config.ewma_alpha
+            and self.price_count == price_details['price_count']
+            and self.base_price == price_details['base_price']
+            and self.final_price == price_details['final_price']
+        ):
+            return False
+
+        # Compared in the database, the line ids never reach Python
+        window_lines = self._get_window_sale_lines_query(config, date_from, date_to)
+        snapshot_lines = SQL(
+            "SELECT sale_line_id FROM %s WHERE snapshot_id = %s", SQL.identifier(SNAPSHOT_SALE_LINE_TABLE), self.id,
+        )
+        self.env.cr.execute(SQL(
+            "(%s EXCEPT %s) UNION ALL (%s EXCEPT %s) LIMIT 1",
+            window_lines, snapshot_lines, snapshot_lines, window_lines,
+        ))
+        return not self.env.cr.rowcount
+
+    @api.model
+    def _get_window_sale_lines_query(self, config, date_from, date_to):
+        """SQL selecting the ids of the sale lines config prices from over the window"""
+        sale_lines = self.env['sale.order.line'].sudo()
+        sale_lines.flush_model()
+        return sale_lines._search(config._get_sale_line_domain(date_from, date_to)).subselect()
+
+    @api.model
+    def _create_from_price_details(self, details_by_window):
+        """Create one snapshot per window
+
+        details_by_window maps (config, date_from, date_to) to the result of
+        config.get_price_details() over that window. The contributing sale
+        lines are linked with one INSERT ... SELECT per window, without
+        loading their ids. Return {window: snapshot}.
+        """
+        windows = list(details_by_window)
+        vals_list = []
+        for config, date_from, date_to in windows:
+            price_details = details_by_window[config, date_from, date_to]
+            date_from, date_to = config._get_price_window(date_from, date_to)
+            vals_list.append({
+                'config_id': config.id,
+                'product_id': config.product_id.id,
+                'vendor_id': config.vendor_id.id,
+                'company_id': config.company_id.id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'pricing_method': price_details['pricing_method'],
+                'purchase_margin': price_details['purchase_margin'],
+                'trim_percent': config.trim_percent,
+                'ewma_alpha': config.ewma_alpha,
+                'base_price': price_details['base_price'],
+                'margin_amount': price_details['margin_amount'],
+                'final_price': price_details['final_price'],
+                'price_count': price_details['price_count'],
+                'qty_sum': price_details['qty_sum'],
+                'method_prices': price_details['method_prices'],
+            })
+        snapshots = self.create(vals_list)
+
+        for snapshot, (config, date_from, date_to) in zip(snapshots, windows):
+            self.env.cr.execute(SQL(
+                "INSERT INTO %s (snapshot_id, sale_line_id) SELECT %s, line.id FROM (%s) AS line",
+                SQL.identifier(SNAPSHOT_SALE_LINE_TABLE), snapshot.id,
+                self._get_window_sale_lines_query(config, *config._get_price_window(date_from, date_to)),
+            ))
+        snapshots.invalidate_recordset(['sale_line_ids'])
+        return dict(zip(windows, snapshots))
+
+    def action_view_calculation_details(self):
+        """Show the stored calculation breakdown in the details wizard"""
+        self.ensure_one()
+        wizard_model = self.env['wizard.calculation.details']
+        wizard = wizard_model.create({
+            'config_id': self.config_id.id,
+            'snapshot_id': self.id,
+            'product_name': self.product_id.name,
+            'vendor_name': self.vendor_id.name or _('Not Set'),
+            'pricing_method': self.pricing_method,
+            'purchase_margin': self.purchase_margin,
+            'trim_percent': self.trim_percent,
+            'ewma_alpha': self.ewma_alpha,
+            'date_range_days': (self.date_to - self.date_from).days if self.date_from and self.date_to else 0,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'price_count': self.price_count,
+            'base_price': self.base_price,
+            'margin_amount': self.margin_amount,
+            'final_price': self.final_price,
+            'profit_margin': (self.margin_amount / self.base_price) * 100 if self.base_price > 0 else 0,
+            'qty_sum': self.qty_sum,
+            **wizard_model._get_method_price_vals(self.method_prices or {}),
+        })
+        return {
+            'name': _('Price Calculation Details'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'wizard.calculation.details',
+            'res_id': wizard.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'context': self.env.context,
+        }
@@ -0,0 +1,16 @@
+from odoo import models
+from collections import Counter
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    def write(self, vals):
+        """Override write to keep daily sale price statistics in sync with confirmation and order date"""
+        tracked = {'state', 'date_order'} & vals.keys()
+        before = self.order_line._get_daily_price_contributions() if tracked else Counter()
+        result = super().write(vals)
+        if tracked:
+            after = self.order_line._get_daily_price_contributions()
+            self.env['sale.price.daily']._apply_contributions(before - after, after - before)
+        return result
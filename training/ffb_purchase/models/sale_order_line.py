@@ -0,0 +1,58 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from collections import Counter
+
+from .sale_price_daily import CONFIRMED_SALE_STATES
+
+# Line fields that feed the daily sale price statistics
+DAILY_PRICE_FIELDS = {'product_id', 'price_unit', 'product_uom_qty', 'order_id'}
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    # Stored copy of the order date so price lookups can use a single-table index
+    date_order = fields.Datetime(string='Order Date', related='order_id.date_order', store=True,
+                                 help="Order date of the sale order, used for purchase price calculation")
+
+    def init(self):
+        super().init()
+        # Covers the (product, order date, state) filter used by purchase pricing
+        create_index(
+            self.env.cr,
+            'sale_order_line_product_date_order_state_index',
+            self._table,
+            ['product_id', 'date_order', 'state'],
+        )
+
+    def _get_daily_price_contributions(self):
+        """Return the Counter of (product_id, date, price, quantity) these lines add to sale.price.daily"""
+        return Counter(
+            (line.product_id.id, line.order_id.date_order.date(), line.price_unit, line.product_uom_qty)
+            for line in self
+            if line.order_id.state in CONFIRMED_SALE_STATES and line.product_id and line.order_id.date_order
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to add the lines of confirmed orders to the daily sale price statistics"""
+        lines = super().create(vals_list)
+        self.env['sale.price.daily']._apply_contributions(Counter(), lines._get_daily_price_contributions())
+        return lines
+
+    def write(self, vals):
+        """Override write to update daily sale price statistics when prices or quantities change"""
+        tracked = DAILY_PRICE_FIELDS & vals.keys()
+        before = self._get_daily_price_contributions() if tracked else Counter()
+        result = super().write(vals)
+        if tracked:
+            after = self._get_daily_price_contributions()
+            self.env['sale.price.daily']._apply_contributions(before - after, after - before)
+        return result
+
+    def unlink(self):
+        """Override unlink to drop removed lines from daily sale price statistics"""
+        before = self._get_daily_price_contributions()
+        result = super().unlink()
+        self.env['sale.price.daily']._apply_contributions(before, Counter())
+        return result
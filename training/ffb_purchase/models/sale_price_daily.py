@@ -0,0 +1,333 @@
+from odoo import models, fields, api
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+# Sale order states whose lines are used as reference prices
+CONFIRMED_SALE_STATES = ['sale']
+# Maximum number of [price, count] centroids kept in a daily quantile sketch
+SKETCH_SIZE = 50
+# Statistics of a bucket without sale lines
+EMPTY_BUCKET_VALUES = {
+    'price_count': 0,
+    'price_sum': 0.0,
+    'price_min': 0.0,
+    'price_max': 0.0,
+    'qty_sum': 0.0,
+    'weighted_price_sum': 0.0,
+    'price_sketch': [],
+}
+
+
+def compress_sketch(centroids, size=SKETCH_SIZE):
+    """Return the [price, count] centroids sorted by price, merged down to at most size entries
+
+    Equal prices are merged first; then the two closest neighbours are merged
+    into their weighted mean until the sketch fits.
+    """
+    sketch = []
+    for price, count in sorted(centroids):
+        if sketch and sketch[-1][0] == price:
+            sketch[-1][1] += count
+        else:
+            sketch.append([price, count])
+    while len(sketch) > size:
+        i = min(range(len(sketch) - 1), key=lambda k: sketch[k + 1][0] - sketch[k][0])
+        (price_1, count_1), (price_2, count_2) = sketch[i], sketch[i + 1]
+        sketch[i:i + 2] = [[(price_1 * count_1 + price_2 * count_2) / (count_1 + count_2), count_1 + count_2]]
+    return sketch
+
+
+def apply_price_deltas(values, removed, added):
+    """Return the bucket values with the removed and added (price, quantity) pairs applied
+
+    Counts and sums take the deltas, added prices are merged into the sketch
+    and removed ones taken out of their centroid. Return None when a removal
+    cannot be undone exactly: the price was merged into another centroid, or
+    it was the minimum or maximum of the day and other prices remain.
+    """
+    values = dict(values, price_sketch=[list(centroid) for centroid in values['price_sketch'] or []])
+    sketch = values['price_sketch']
+    extreme_removed = False
+    for price, quantity in removed:
+        centroid = next((centroid for centroid in sketch if centroid[0] == price), None)
+        if not centroid:
+            return None
+        centroid[1] -= 1
+        if not centroid[1]:
+            sketch.remove(centroid)
+        extreme_removed = extreme_removed or price in (values['price_min'], values['price_max'])
+        values['price_count'] -= 1
+        values['price_sum'] -= price
+        values['qty_sum'] -= quantity
+        values['weighted_price_sum'] -= price * quantity
+
+    for price, quantity in added:
+        if values['price_count'] > 0:
+            values['price_min'] = min(values['price_min'], price)
+            values['price_max'] = max(values['price_max'], price)
+        else:
+            values['price_min'] = values['price_max'] = price
+        values['price_count'] += 1
+        values['price_sum'] += price
+        values['qty_sum'] += quantity
+        values['weighted_price_sum'] += price * quantity
+        sketch.append([price, 1])
+
+    if extreme_removed and values['price_count'] > 0:
+        return None
+    values['price_sketch'] = compress_sketch(sketch)
+    return values
+
+
+def merge_sketches(sketches):
+    """Merge daily sketches into one sorted sketch (not compressed, the window is read once)"""
+    return sorted(centroid for sketch in sketches for centroid in sketch or [])
+
+
+def sketch_quantile(sketch, quantile):
+    """Return the price at the given quantile (0..1) of a sorted sketch"""
+    total = sum(count for _price, count in sketch)
+    target = quantile * total
+    cumulative = 0
+    for i, (price, count) in enumerate(sketch):
+        cumulative += count
+        if cumulative >= target:
+            # Exactly between two centroids, e.g. the median of an even count
+            if cumulative == target and i + 1 < len(sketch):
+                return (price + sketch[i + 1][0]) / 2
+            return price
+    return 0.0
+
+
+def sketch_trimmed_mean(sketch, trim):
+    """Return the mean of a sorted sketch without the lowest and highest trim (0..0.5) share of prices"""
+    total = sum(count for _price, count in sketch)
+    low, high = total * trim, total * (1 - trim)
+    cumulative = weighted_sum = kept = 0.0
+    for price, count in sketch:
+        start, cumulative = cumulative, cumulative + count
+        share = max(0.0, min(cumulative, high) - max(start, low))
+        weighted_sum += price * share
+        kept += share
+    return weighted_sum / kept if kept else 0.0
+
+
+class SalePriceDaily(models.Model):
+    _name = 'sale.price.daily'
+    _description = 'Daily Sale Price Statistics'
+    _order = 'date desc, product_id'
+
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    date = fields.Date(string='Date', required=True)
+    price_count = fields.Integer(string='Sale Lines', readonly=True)
+    price_sum = fields.Float(string='Sum of Prices', readonly=True)
+    price_min = fields.Float(string='Minimum Price', readonly=True)
+    price_max = fields.Float(string='Maximum Price', readonly=True)
+    qty_sum = fields.Float(string='Quantity', readonly=True)
+    weighted_price_sum = fields.Float(string='Sum of Price x Quantity', readonly=True)
+    price_sketch = fields.Json(string='Price Sketch', readonly=True,
+                               help="Sorted [price, count] centroids of the day, mergeable across days for quantiles")
+
+    _sql_constraints = [
+        ('unique_product_date', 'unique(product_id, date)',
+         'Daily sale price statistics already exist for this product and date!')
+    ]
+
+    @api.model
+    def _get_confirmed_sale_line_domain(self, product_ids, date_from, date_to):
+        """Domain of confirmed sale order lines of the products ordered between date_from and date_to (inclusive)"""
+        return [
+            ('product_id', 'in', list(product_ids)),
+            ('date_order', '>=', datetime.combine(date_from, time.min)),
+            ('date_order', '<', datetime.combine(date_to + timedelta(days=1), time.min)),
+            ('state', 'in', CONFIRMED_SALE_STATES),
+        ]
+
+    @api.model
+    def _read_sale_line_stats(self, domain):
+        """Return {(product_id, date): values} aggregated from the sale order lines matching domain"""
+        # Buckets are UTC days, matching the dates of sale.order.line._get_daily_price_keys()
+        sale_lines = self.env['sale.order.line'].sudo().with_context(tz='UTC')
+        groups = sale_lines._read_group(
+            domain,
+            ['product_id', 'date_order:day'],
+            ['__count', 'price_unit:sum', 'price_unit:min', 'price_unit:max',
+             'price_unit:array_agg', 'product_uom_qty:array_agg'],
+        )
+        stats = {}
+        for product, day, count, price_sum, price_min, price_max, prices, quantities in groups:
+            # Both arrays are aggregated over the same rows, in the same order;
+            # numeric arrays come back as Decimal
+            prices = [float(price) for price in prices]
+            quantities = [float(quantity) for quantity in quantities]
+            stats[product.id, fields.Date.to_date(day)] = {
+                'price_count': count,
+                'price_sum': price_sum,
+                'price_min': price_min,
+                'price_max': price_max,
+                'qty_sum': sum(quantities),
+                'weighted_price_sum': sum(price * qty for price, qty in zip(prices, quantities)),
+                'price_sketch': compress_sketch([price, 1] for price in prices),
+            }
+        return stats
+
+    @api.model
+    def _apply_contributions(self, removed, added):
+        """Apply the sale line contributions leaving and joining the buckets
+
+        removed and added are Counters of (product_id, date, price, quantity),
+        see sale.order.line._get_daily_price_contributions(). Buckets are
+        updated from the deltas alone; the few a removal cannot be undone in
+        (see apply_price_deltas) are recomputed from their sale lines.
+        """
+        deltas = defaultdict(lambda: ([], []))
+        for index, contributions in enumerate((removed, added)):
+            for (product_id, day, price, quantity), count in contributions.items():
+                deltas[product_id, day][index].extend([(price, quantity)] * count)
+        if not deltas:
+            return
+
+        buckets = self.sudo().search([
+            ('product_id', 'in', list({product_id for product_id, _day in deltas})),
+            ('date', 'in', list({day for _product_id, day in deltas})),
+        ])
+        bucket_by_key = {(bucket.product_id.id, bucket.date): bucket for bucket in buckets}
+
+        to_create = []
+        to_unlink = self.sudo().browse()
+        to_refresh = set()
+        for key, (removed_prices, added_prices) in deltas.items():
+            bucket = bucket_by_key.get(key)
+            values = apply_price_deltas(
+                bucket._get_stat_values() if bucket else dict(EMPTY_BUCKET_VALUES), removed_prices, added_prices,
+            )
+            if values is None:
+                to_refresh.add(key)
+            elif values['price_count'] <= 0:
+                if bucket:
+                    to_unlink |= bucket
+            elif bucket:
+                bucket.write(values)
+            else:
+                to_create.append(dict(values, product_id=key[0], date=key[1]))
+
+        to_unlink.unlink()
+        if to_create:
+            self.sudo().create(to_create)
+        self._refresh_buckets(to_refresh)
+
+    def _get_stat_values(self):
+        """Return the statistics of this bucket, in the format of _read_sale_line_stats()"""
+        self.ensure_one()
+        return {name: self[name] for name in EMPTY_BUCKET_VALUES}
+
+    @api.model
+    def _refresh_buckets(self, keys):
+        """Recompute the statistics of the given (product_id, date) buckets from confirmed sale lines"""
+        keys = {(product_id, day) for product_id, day in keys if product_id and day}
+        if not keys:
+            return
+
+        product_ids = {product_id for product_id, _day in keys}
+        days = {day for _product_id, day in keys}
+        stats = self._read_sale_line_stats(
+            self._get_confirmed_sale_line_domain(product_ids, min(days), max(days)))
+
+        buckets = self.sudo().search([('product_id', 'in', list(product_ids)), ('date', 'in', list(days))])
+        bucket_by_key = {(bucket.product_id.id, bucket.date): bucket for bucket in buckets}
+
+        to_create = []
+        to_unlink = self.sudo().browse()
+        for key in keys:
+            bucket = bucket_by_key.get(key)
+            values = stats.get(key)
+            if not values:
+                if bucket:
+                    to_unlink |= bucket
+            elif bucket:
+                bucket.write(values)
+            else:
+                to_create.append(dict(values, product_id=key[0], date=key[1]))
+
+        to_unlink.unlink()
+        if to_create:
+            self.sudo().create(to_create)
+
+    @api.model
+    def _rebuild_all(self):
+        """Rebuild every bucket from confirmed sale lines (used on install and upgrade)"""
+        self.sudo().search([]).unlink()
+        stats = self._read_sale_line_stats([
+            ('product_id', '!=', False),
+            ('date_order', '!=', False),
+            ('state', 'in', CONFIRMED_SALE_STATES),
+        ])
+        self.sudo().create([
+            dict(values, product_id=product_id, date=day)
+            for (product_id, day), values in stats.items()
+        ])
+
+    @api.model
+    def get_daily_stats(self, product_ids, date_from, date_to):
+        """Return {product_id: {date: values}} of the buckets of the products between date_from and date_to (inclusive)"""
+        buckets = self.search_fetch(
+            [
+                ('product_id', 'in', list(product_ids)),
+                ('date', '>=', fields.Date.to_date(date_from)),
+                ('date', '<=', fields.Date.to_date(date_to)),
+            ],
+            ['product_id', 'date', 'price_count', 'price_sum', 'price_min',
+             'qty_sum', 'weighted_price_sum', 'price_sketch'],
+        )
+        daily_stats = {}
+        for bucket in buckets:
+            daily_stats.setdefault(bucket.product_id.id, {})[bucket.date] = {
+                'price_count': bucket.price_count,
+                'price_sum': bucket.price_sum,
+                'price_min': bucket.price_min,
+                'qty_sum': bucket.qty_sum,
+                'weighted_price_sum': bucket.weighted_price_sum,
+                'price_sketch': bucket.price_sketch or [],
+            }
+        return daily_stats
+
+    @api.model
+    def summarize_days(self, daily_stats, trim_percent=0.0, ewma_alpha=1.0):
+        """Merge the {date: values} buckets of one product into the price of every pricing method
+
+        Each bucket is read once: sums are added, sketches merged and the
+        exponentially weighted average is updated day by day from the daily
+        average price, oldest first.
+        """
+        days = sorted(day for day, values in daily_stats.items() if values['price_count'])
+        if not days:
+            return {'price_count': 0, 'qty_sum': 0.0, 'method_prices': {}}
+
+        price_count = qty_sum = price_sum = weighted_price_sum = 0.0
+        ewma = None
+        sketches = []
+        for day in days:
+            values = daily_stats[day]
+            price_count += values['price_count']
+            price_sum += values['price_sum']
+            qty_sum += values['qty_sum']
+            weighted_price_sum += values['weighted_price_sum']
+            day_avg = values['price_sum'] / values['price_count']
+            ewma = day_avg if ewma is None else ewma_alpha * day_avg + (1 - ewma_alpha) * ewma
+            # Buckets stored before sketches existed count as their average price
+            sketches.append(values['price_sketch'] or [[day_avg, values['price_count']]])
+
+        sketch = merge_sketches(sketches)
+        avg_price = price_sum / price_count
+        return {
+            'price_count': int(price_count),
+            'qty_sum': qty_sum,
+            'method_prices': {
+                'min_price': min(daily_stats[day]['price_min'] for day in days),
+                'avg_price': avg_price,
+                'vwap': weighted_price_sum / qty_sum if qty_sum else avg_price,
+                'median': sketch_quantile(sketch, 0.5),
+                'trimmed_mean': sketch_trimmed_mean(sketch, trim_percent / 100),
+                'ewma': ewma,
+            },
+        }
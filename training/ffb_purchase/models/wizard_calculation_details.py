@@ -1,5 +1,7 @@
 from odoo import models, fields, api, _
 
+from .purchase_pricing_config import PRICING_METHODS
+
 
 class WizardCalculationDetails(models.TransientModel):
     _name = 'wizard.calculation.details'
@@ -7,13 +9,13 @@ class WizardCalculationDetails(models.TransientModel):
 
     # Configuration fields
     config_id = fields.Many2one('purchase.pricing.config', string='Configuration', readonly=True)
+    snapshot_id = fields.Many2one('purchase.pricing.snapshot', string='Pricing Snapshot', readonly=True)
     product_name = fields.Char(string='Product', readonly=True)
     vendor_name = fields.Char(string='Vendor', readonly=True)
-    pricing_method = fields.Selection([
-        ('min_price', 'Minimum Sale Price'),
-        ('avg_price', 'Average Sale Price'),
-    ], string='Pricing Method', readonly=True)
+    pricing_method = fields.Selection(PRICING_METHODS, string='Pricing Method', readonly=True)
     purchase_margin = fields.Float(string='Purchase Margin (%)', readonly=True)
+    trim_percent = fields.Float(string='Trim (%)', readonly=True)
+    ewma_alpha = fields.Float(string='Smoothing Factor', readonly=True)
     date_range_days = fields.Integer(string='Date Range (Days)', readonly=True)
     date_from = fields.Date(string='Date From', readonly=True)
     date_to = fields.Date(string='Date To', readonly=True)
@@ -24,20 +26,44 @@ class WizardCalculationDetails(models.TransientModel):
     margin_amount = fields.Float(string='Purchase Margin Amount', readonly=True)
     final_price = fields.Float(string='Final Purchase Price', readonly=True)
     profit_margin = fields.Float(string='Expected Profit (%)', readonly=True)
+    qty_sum = fields.Float(string='Quantity Sold', readonly=True)
     
-    # Sale order lines
-    sale_order_line_ids = fields.One2many('wizard.calculation.details.line', 'wizard_id', 
-                                         string='Sale Order Details', readonly=True)
-
+    # Base price of every pricing method over the same window, for comparison
+    min_price = fields.Float(string='Minimum', readonly=True)
+    avg_price = fields.Float(string='Average', readonly=True)
+    vwap_price = fields.Float(string='Volume-Weighted Average', readonly=True)
+    median_price = fields.Float(string='Median', readonly=True)
+    trimmed_mean_price = fields.Float(string='Trimmed Mean', readonly=True)
+    ewma_price = fields.Float(string='Exponentially-Weighted Average', readonly=True)
+    
+    @api.model
+    def _get_method_price_vals(self, method_prices):
+        """Wizard values of the {pricing_method: base_price} comparison"""
+        return {
+            'min_price': method_prices.get('min_price', 0.0),
+            'avg_price': method_prices.get('avg_price', 0.0),
+            'vwap_price': method_prices.get('vwap', 0.0),
+            'median_price': method_prices.get('median', 0.0),
+            'trimmed_mean_price': method_prices.get('trimmed_mean', 0.0),
+            'ewma_price': method_prices.get('ewma', 0.0),
+        }
 
-class WizardCalculationDetailsLine(models.TransientModel):
-    _name = 'wizard.calculation.details.line'
-    _description = 'Calculation Details Sale Order Line'
+    def _get_sale_line_domain(self):
+        """Domain of the contributing sale order lines: the snapshot ones, or the live window"""
+        self.ensure_one()
+        if self.snapshot_id:
+            # The client only carries the snapshot id, not its sale line ids
+            return [('snapshot_ids', 'in', self.snapshot_id.ids)]
+        return self.config_id._get_sale_line_domain(self.date_from, self.date_to)
 
-    wizard_id = fields.Many2one('wizard.calculation.details', string='Wizard', ondelete='cascade')
-    customer_name = fields.Char(string='Customer', readonly=True)
-    order_name = fields.Char(string='Sale Order', readonly=True)
-    order_date = fields.Date(string='Order Date', readonly=True)
-    unit_price = fields.Float(string='Unit Price', readonly=True)
-    quantity = fields.Float(string='Quantity', readonly=True)
-    subtotal = fields.Float(string='Subtotal', readonly=True)
+    def action_open_sale_lines(self):
+        """Open the contributing sale order lines, read page by page"""
+        self.ensure_one()
+        return {
+            'name': _('Sale Orders of %s') % self.product_name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'purchase.pricing.sale.line',
+            'view_mode': 'list',
+            'domain': self._get_sale_line_domain(),
+            'target': 'current',
+        }
@@ -1,3 +1,4 @@
 from . import test_purchase_pricing_config
 from . import test_ffb_purchase_order
-from . import test_ffb_purchase_order_line
\ No newline at end of file
+from . import test_ffb_purchase_order_line
+from . import test_sale_price_daily
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import ValidationError, UserError
 from datetime import date, timedelta
@@ -214,3 +216,173 @@ class TestFfbPurchaseOrder(TransactionCase):
         self.assertTrue(hasattr(purchase_order_enabled, 'pricing_date_to'))
         self.assertTrue(hasattr(purchase_order_disabled, 'pricing_date_from'))
         self.assertTrue(hasattr(purchase_order_disabled, 'pricing_date_to'))
+
+    def test_action_reprice_open_orders(self):
+        """Test 9: Reprice several open orders in one call"""
+        orders = self.env['purchase.order'].create([dict(self.purchase_order_data) for _i in range(3)])
+        self.env['purchase.order.line'].create([{
+            'order_id': order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_qty': 10.0,
+            'product_uom': self.product.uom_id.id,
+        } for order in orders])
+        # No configuration yet: standard cost
+        self.assertEqual(orders.order_line.mapped('price_unit'), [50.0, 50.0, 50.0])
+        orders[2].write({'state': 'purchase'})
+        
+        # Price shock: new sale data and a configuration
+        customer = self.env['res.partner'].create({'name': 'Test Customer'})
+        sale_order = self.env['sale.order'].create({
+            'partner_id': customer.id,
+            'date_order': fields.Date.today(),
+            'state': 'sale',
+        })
+        self.env['sale.order.line'].create({
+            'order_id': sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 200.0,
+        })
+        self.env['purchase.pricing.config'].create({
+            'name': 'Test Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+        })
+        
+        result = orders.action_reprice_open_orders()
+        self.assertEqual(result['params']['title'], 'Success')
+        self.assertIn('2 order(s)', result['params']['message'])
+        self.assertIn('1 confirmed or cancelled order(s) skipped', result['params']['message'])
+        
+        open_lines = orders[:2].order_line
+        self.assertEqual(open_lines.mapped('price_unit'), [180.0, 180.0],
+                        "Harga order terbuka harus dihitung ulang")
+        self.assertEqual(len(open_lines.pricing_snapshot_id), 1,
+                        "Window yang sama hanya dihitung sekali untuk semua order")
+        self.assertEqual(orders[2].order_line.price_unit, 50.0,
+                        "Order yang sudah dikonfirmasi tidak boleh berubah")
+
+    def test_cron_reprice_open_orders(self):
+        """Test 10: Background repricing by chunks resumes from the saved cursor"""
+        orders = self.env['purchase.order'].create([dict(self.purchase_order_data) for _i in range(4)])
+        self.env['purchase.order.line'].create([{
+            'order_id': order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_qty': 10.0,
+            'product_uom': self.product.uom_id.id,
+        } for order in orders])
+        orders[1].use_pricing_config = False
+        
+        # A product without configuration, priced by hand
+        manual_product = self.env['product.product'].create({
+            'name': 'Manual Product',
+            'standard_price': 60.0,
+        })
+        manual_line = self.env['purchase.order.line'].create({
+            'order_id': orders[3].id,
+            'product_id': manual_product.id,
+            'name': 'Manual Product',
+            'product_qty': 1.0,
+            'product_uom': manual_product.uom_id.id,
+        })
+        manual_line.price_unit = 75.0
+        
+        customer = self.env['res.partner'].create({'name': 'Test Customer'})
+        sale_order = self.env['sale.order'].create({
+            'partner_id': customer.id,
+            'date_order': fields.Date.today(),
+            'state': 'sale',
+        })
+        self.env['sale.order.line'].create({
+            'order_id': sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 200.0,
+        })
+        self.env['purchase.pricing.config'].create({
+            'name': 'Test Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+        })
+        
+        # Resume after the first order, as if a previous run stopped there
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('ffb_purchase.reprice_cursor', orders[0].id)
+        stats = self.env['purchase.order']._cron_reprice_open_orders(chunk_size=2, auto_commit=False)
+        
+        self.assertEqual(stats, {'orders': 2, 'lines': 2, 'skipped': 1, 'failed': 0})
+        self.assertEqual(orders[0].order_line.price_unit, 50.0, "Order sebelum cursor tidak diproses")
+        self.assertEqual(orders[1].order_line.price_unit, 50.0, "Order tanpa pricing config dilewati")
+        self.assertEqual((orders[2:].order_line - manual_line).mapped('price_unit'), [180.0, 180.0])
+        self.assertEqual(manual_line.price_unit, 75.0, "Harga manual tanpa pricing config tidak boleh ditimpa")
+        self.assertEqual(params.get_param('ffb_purchase.reprice_cursor'), '0',
+                        "Cursor kembali ke awal setelah semua order diproses")
+        
+        # Nothing changed since: no new snapshot
+        snapshot_count = self.env['purchase.pricing.snapshot'].search_count([])
+        self.env['purchase.order']._cron_reprice_open_orders(chunk_size=2, auto_commit=False)
+        self.assertEqual(self.env['purchase.pricing.snapshot'].search_count([]), snapshot_count)
+
+    def test_cron_reprice_failure_isolated(self):
+        """Test 11: A failing order is rolled back and counted, the others are still repriced"""
+        orders = self.env['purchase.order'].create([dict(self.purchase_order_data) for _i in range(3)])
+        self.env['purchase.order.line'].create([{
+            'order_id': order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_qty': 10.0,
+            'product_uom': self.product.uom_id.id,
+        } for order in orders])
+        customer = self.env['res.partner'].create({'name': 'Test Customer'})
+        sale_order = self.env['sale.order'].create({
+            'partner_id': customer.id,
+            'date_order': fields.Date.today(),
+            'state': 'sale',
+        })
+        self.env['sale.order.line'].create({
+            'order_id': sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 200.0,
+        })
+        self.env['purchase.pricing.config'].create({
+            'name': 'Test Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+        })
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('ffb_purchase.reprice_cursor', orders[0].id - 1)
+        
+        # The middle order fails after its price was already written
+        broken_order = orders[1]
+        reprice = type(self.env['purchase.order'])._reprice_configured_lines
+        def reprice_or_fail(order_set):
+            lines = reprice(order_set)
+            if broken_order in order_set:
+                raise ValueError("Broken order")
+            return lines
+        
+        with patch.object(type(self.env['purchase.order']), '_reprice_configured_lines', reprice_or_fail):
+            stats = self.env['purchase.order']._cron_reprice_open_orders(chunk_size=3, auto_commit=False)
+        
+        self.assertEqual(stats['orders'], 2)
+        self.assertEqual(stats['lines'], 2)
+        self.assertEqual(stats['failed'], 1, "Order yang gagal dihitung, tidak menghentikan cron")
+        self.assertEqual((orders - broken_order).order_line.mapped('price_unit'), [180.0, 180.0])
+        self.assertEqual(broken_order.order_line.price_unit, 50.0, "Perubahan order yang gagal di-rollback")
+        self.assertEqual(params.get_param('ffb_purchase.reprice_cursor'), '0',
+                        "Cursor tetap maju melewati order yang gagal")
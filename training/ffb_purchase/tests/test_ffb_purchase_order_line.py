@@ -346,3 +346,166 @@ class TestFfbPurchaseOrderLine(TransactionCase):
         self.assertGreater(order_line.base_sale_price, 0.0)
         self.assertGreater(order_line.margin_amount, 0.0)
         self.assertGreater(order_line.price_unit, 0.0)
+
+    def test_apply_pricing_config_batch(self):
+        """Test 14: Test _apply_pricing_config on many lines at once"""
+        # Second product without pricing configuration
+        product_2 = self.env['product.product'].create({
+            'name': 'Test Product 2',
+            'type': 'consu',
+            'standard_price': 30.0,
+            'uom_id': self.env.ref('uom.product_uom_unit').id,
+        })
+        
+        pricing_config = self.env['purchase.pricing.config'].create({
+            'name': 'Test Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+        })
+        
+        # Create several lines in one call (batch pricing)
+        vals_list = [dict(self.purchase_order_line_data) for _i in range(3)]
+        vals_list.append(dict(self.purchase_order_line_data, product_id=product_2.id, name='Test Product 2'))
+        order_lines = self.env['purchase.order.line'].create(vals_list)
+        
+        # Lines with configuration share the same config and fallback (no sale data)
+        for order_line in order_lines[:3]:
+            self.assertEqual(order_line.pricing_config_id.id, pricing_config.id)
+            self.assertEqual(order_line.price_unit, 50.0)
+            self.assertIn('No sale data found', order_line.price_calculation_info)
+        
+        # Line without configuration uses standard cost
+        self.assertFalse(order_lines[3].pricing_config_id)
+        self.assertEqual(order_lines[3].price_unit, 30.0)
+        self.assertIn('Using product standard cost: 30.00', order_lines[3].price_calculation_info)
+        self.assertFalse(order_lines.pricing_snapshot_id, "Tanpa data penjualan tidak ada snapshot")
+
+    def test_pricing_snapshot(self):
+        """Test 15: Pricing evidence is stored once and does not follow new sales"""
+        customer = self.env['res.partner'].create({
+            'name': 'Test Customer',
+            'customer_rank': 1,
+        })
+        sale_order = self.env['sale.order'].create({
+            'partner_id': customer.id,
+            'date_order': fields.Date.today(),
+            'state': 'sale',
+        })
+        sale_line = self.env['sale.order.line'].create({
+            'order_id': sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 100.0,
+        })
+        self.env['purchase.pricing.config'].create({
+            'name': 'Test Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+        })
+        
+        # Two lines of the same order share one snapshot
+        order_lines = self.env['purchase.order.line'].create([dict(self.purchase_order_line_data) for _i in range(2)])
+        snapshot = order_lines[0].pricing_snapshot_id
+        self.assertTrue(snapshot, "Snapshot harus dibuat saat pricing")
+        self.assertEqual(order_lines[1].pricing_snapshot_id, snapshot)
+        self.assertEqual(snapshot.sale_line_ids, sale_line)
+        self.assertEqual(snapshot.price_count, 1)
+        self.assertAlmostEqual(snapshot.final_price, order_lines[0].price_unit)
+        self.assertAlmostEqual(snapshot.final_price, 90.0)
+        
+        # Recalculating an unchanged price keeps the snapshot
+        snapshot_count = self.env['purchase.pricing.snapshot'].search_count([])
+        order_lines.action_recalculate_price()
+        self.assertEqual(order_lines.pricing_snapshot_id, snapshot, "Snapshot yang sama harus dipakai ulang")
+        self.assertEqual(self.env['purchase.pricing.snapshot'].search_count([]), snapshot_count,
+                        "Tidak boleh ada snapshot baru tanpa perubahan harga")
+        
+        # A cheaper sale confirmed later does not change the stored evidence
+        self.env['sale.order.line'].create({
+            'order_id': sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 5,
+            'price_unit': 50.0,
+        })
+        result = order_lines[0].action_view_pricing_details()
+        self.assertEqual(result['res_model'], 'wizard.calculation.details')
+        wizard = self.env['wizard.calculation.details'].browse(result['res_id'])
+        self.assertEqual(wizard.snapshot_id, snapshot)
+        self.assertEqual(wizard.price_count, 1, "Detail harus berasal dari snapshot, bukan dihitung ulang")
+        self.assertAlmostEqual(wizard.final_price, 90.0)
+        domain = wizard.action_open_sale_lines()['domain']
+        self.assertEqual(domain, [('snapshot_ids', 'in', snapshot.ids)], "Domain hanya membawa id snapshot")
+        sale_lines = self.env['purchase.pricing.sale.line'].search(domain)
+        self.assertEqual(sale_lines.ids, [sale_line.id], "Hanya sale line dari snapshot yang ditampilkan")
+        self.assertEqual(sale_lines.order_id, sale_order)
+        
+        # Snapshots are read-only evidence
+        with self.assertRaises(UserError):
+            snapshot.write({'final_price': 0.0})
+        
+        # Recalculating stores a new snapshot with the new sale
+        order_lines[0].action_recalculate_price()
+        self.assertNotEqual(order_lines[0].pricing_snapshot_id, snapshot)
+        self.assertEqual(order_lines[0].pricing_snapshot_id.price_count, 2)
+        self.assertAlmostEqual(order_lines[0].price_unit, 45.0)
+        self.assertEqual(order_lines[1].pricing_snapshot_id, snapshot)
+        
+        # Sale lines of an order cancelled later stay in the evidence
+        sale_order.write({'state': 'cancel'})
+        wizard = self.env['wizard.calculation.details'].browse(order_lines[1].action_view_pricing_details()['res_id'])
+        sale_lines = self.env['purchase.pricing.sale.line'].search(wizard.action_open_sale_lines()['domain'])
+        self.assertEqual(sale_lines.ids, [sale_line.id], "Sale line yang dibatalkan tetap jadi bukti snapshot")
+        self.assertEqual(sale_lines.state, 'cancel')
+        
+        # Same price from other sale lines is new evidence, not the old snapshot
+        other_order = self.env['sale.order'].create({
+            'partner_id': customer.id,
+            'date_order': fields.Date.today(),
+            'state': 'sale',
+        })
+        other_line = self.env['sale.order.line'].create({
+            'order_id': other_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 100.0,
+        })
+        order_lines[1].action_recalculate_price()
+        self.assertAlmostEqual(order_lines[1].price_unit, 90.0)
+        self.assertNotEqual(order_lines[1].pricing_snapshot_id, snapshot)
+        self.assertEqual(order_lines[1].pricing_snapshot_id.sale_line_ids, other_line)
+
+    def test_pricing_config_of_order_company(self):
+        """Test 16: Lines use the configuration of their order's company, not the current one"""
+        company_b = self.env['res.company'].create({'name': 'Test Company B'})
+        config_b = self.env['purchase.pricing.config'].create({
+            'name': 'Company B Config',
+            'product_id': self.product.id,
+            'vendor_id': self.vendor.id,
+            'pricing_method': 'min_price',
+            'purchase_margin': 10.0,
+            'date_range_days': 30,
+            'company_id': company_b.id,
+        })
+        order_b = self.env['purchase.order'].with_company(company_b).create({
+            'partner_id': self.vendor.id,
+            'date_order': fields.Date.today(),
+        })
+        self.assertNotEqual(self.env.company, company_b)
+        
+        # Priced from the current (other) company
+        order_line = self.env['purchase.order.line'].create(dict(self.purchase_order_line_data, order_id=order_b.id))
+        
+        self.assertEqual(order_line.pricing_config_id, config_b, "Config company order harus dipakai")
+        self.assertTrue(order_line.pricing_config_available)
+        # The order of the current company does not see company B's configuration
+        other_line = self.env['purchase.order.line'].create(self.purchase_order_line_data)
+        self.assertFalse(other_line.pricing_config_id)
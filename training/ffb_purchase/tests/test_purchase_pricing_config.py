@@ -57,7 +57,7 @@ class TestPurchasePricingConfig(TransactionCase):
         
         # Test perubahan quantity
         purchase_pricing_config.purchase_margin = 15.0
-        purchase_pricing_config._compute_test_calculation()  # Memanggil compute method
+        purchase_pricing_config._refresh_test_calculations()  # Menyimpan ulang preview kalkulasi
         new_expected_test_base_price = 10.0 * 50.0
         self.assertEqual(purchase_pricing_config.test_base_price, new_expected_test_base_price)
 
@@ -228,7 +228,7 @@ class TestPurchasePricingConfig(TransactionCase):
         self.assertIn('Final Purchase Price: 72.00', message, "Message harus menunjukkan final price")
 
     def test_07_compute_test_calculation(self):
-        """Test 7: Test _compute_test_calculation method"""
+        """Test 7: Test _refresh_test_calculations method"""
         # Create purchase pricing config
         purchase_pricing_config = self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
         
@@ -267,8 +267,10 @@ class TestPurchasePricingConfig(TransactionCase):
             'price_unit': 80.0,   # Lower price
         })
         
-        # Trigger the compute method by accessing the computed field
-        purchase_pricing_config._compute_test_calculation()
+        # Preview hanya diperbarui saat refresh, bukan saat dibaca
+        self.assertEqual(purchase_pricing_config.test_price_count, 0,
+                        "Preview tersimpan tidak boleh berubah sebelum refresh")
+        purchase_pricing_config._refresh_test_calculations()
         
         # Verify that test values are computed correctly
         self.assertGreater(purchase_pricing_config.test_base_price, 0.0,
@@ -284,9 +286,12 @@ class TestPurchasePricingConfig(TransactionCase):
         self.assertIn('Calculation ready', purchase_pricing_config.test_status_message,
                      "Status message harus menunjukkan calculation ready")
         
+        self.assertTrue(purchase_pricing_config.test_calculated_at, "Waktu kalkulasi harus tersimpan")
+        
         # Test with no product (should set empty values)
-        purchase_pricing_config.product_id = False
-        purchase_pricing_config._compute_test_calculation()
+        purchase_pricing_config = self.env['purchase.pricing.config'].new(
+            dict(self.purchase_pricing_config_data, product_id=False))
+        purchase_pricing_config._refresh_test_calculations()
         
         # Verify empty values are set
         self.assertEqual(purchase_pricing_config.test_base_price, 0.0,
@@ -372,6 +377,14 @@ class TestPurchasePricingConfig(TransactionCase):
         self.assertGreater(wizard.final_price, 0.0,
                           "Final price harus lebih dari 0.0")
         
+        # Contributing sale lines are read on demand, page by page
+        sale_lines_action = wizard.action_open_sale_lines()
+        self.assertEqual(sale_lines_action['res_model'], 'purchase.pricing.sale.line')
+        sale_lines = self.env['purchase.pricing.sale.line'].search(sale_lines_action['domain'], limit=1)
+        self.assertEqual(len(sale_lines), 1, "Halaman pertama dibatasi oleh limit")
+        self.assertEqual(self.env['purchase.pricing.sale.line'].search_count(sale_lines_action['domain']), 2)
+        self.assertEqual(sale_lines.order_id, sale_order2, "Urutan terbaru dulu, lalu id")
+        
         # Test with no product (should show warning)
         purchase_pricing_config.product_id = False
         result_no_product = purchase_pricing_config.action_view_calculation_details()
@@ -472,4 +485,165 @@ class TestPurchasePricingConfig(TransactionCase):
         self.assertIn('Please select a product first', result_no_product['params']['message'],
                      "Message harus menunjukkan bahwa product harus dipilih dulu")
 
-   
\ No newline at end of file
+   
+    def test_11_get_sale_order_details_paginated(self):
+        """Test 11: Test get_sale_order_details returns paginated sale order lines"""
+        # Create purchase pricing config
+        purchase_pricing_config = self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
+        
+        customer = self.env['res.partner'].create({
+            'name': 'Test Customer',
+        })
+        
+        # Create three confirmed sale orders with the test product
+        for price in (100.0, 80.0, 90.0):
+            sale_order = self.env['sale.order'].create({
+                'partner_id': customer.id,
+                'date_order': fields.Date.today(),
+                'state': 'sale',
+            })
+            self.env['sale.order.line'].create({
+                'order_id': sale_order.id,
+                'product_id': self.product.id,
+                'name': 'Test Product',
+                'product_uom_qty': 1,
+                'price_unit': price,
+            })
+        
+        # Aggregates only, no per-line data
+        price_details = purchase_pricing_config.get_price_details()
+        self.assertEqual(price_details['price_count'], 3, "Price count harus 3")
+        self.assertEqual(price_details['base_price'], 90.0, "Average price harus 90.0")
+        self.assertNotIn('sale_orders', price_details, "Price details tidak boleh memuat detail sale order")
+        
+        # Paginated details
+        first_page = purchase_pricing_config.get_sale_order_details(limit=2)
+        second_page = purchase_pricing_config.get_sale_order_details(offset=2, limit=2)
+        self.assertEqual(len(first_page), 2, "Halaman pertama harus berisi 2 baris")
+        self.assertEqual(len(second_page), 1, "Halaman kedua harus berisi 1 baris")
+        self.assertEqual(first_page[0]['customer'], 'Test Customer')
+        
+        by_price = purchase_pricing_config.get_sale_order_details(order='price_unit asc')
+        self.assertEqual([line['price'] for line in by_price], [80.0, 90.0, 100.0],
+                        "Detail harus bisa diurutkan berdasarkan harga")
+
+    def test_12_get_config_for_product_vendor_cache(self):
+        """Test 12: Test cached configuration lookup follows create, archive and unlink"""
+        config_model = self.env['purchase.pricing.config']
+        
+        # No configuration yet
+        self.assertFalse(config_model.get_config_for_product_vendor(self.product.id, self.vendor.id))
+        
+        # Cache is invalidated on create
+        purchase_pricing_config = config_model.create(self.purchase_pricing_config_data)
+        self.assertEqual(config_model.get_config_for_product_vendor(self.product.id, self.vendor.id),
+                        purchase_pricing_config)
+        
+        # Bulk lookup resolves known pairs only
+        other_vendor = self.env['res.partner'].create({'name': 'Other Vendor'})
+        configs = config_model.get_configs_for_product_vendor_pairs([
+            (self.product.id, self.vendor.id),
+            (self.product.id, other_vendor.id),
+        ])
+        self.assertEqual(configs, {(self.product.id, self.vendor.id): purchase_pricing_config})
+        
+        # Cache is invalidated on archive
+        purchase_pricing_config.action_archive()
+        self.assertFalse(config_model.get_config_for_product_vendor(self.product.id, self.vendor.id))
+        
+        # Cache is invalidated on unarchive and unlink
+        purchase_pricing_config.action_unarchive()
+        self.assertEqual(config_model.get_config_for_product_vendor(self.product.id, self.vendor.id),
+                        purchase_pricing_config)
+        purchase_pricing_config.unlink()
+        self.assertFalse(config_model.get_config_for_product_vendor(self.product.id, self.vendor.id))
+
+    def test_13_unique_active_product_vendor(self):
+        """Test 13: Test only one active configuration per product, vendor and company"""
+        purchase_pricing_config = self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
+        
+        # Duplicate active configuration is rejected with the readable message
+        with self.assertRaises(ValidationError) as context:
+            self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
+        self.assertIn('An active pricing configuration already exists for product "Test Product" and vendor "Test Vendor".',
+                     str(context.exception))
+        
+        # Archived configurations do not conflict
+        purchase_pricing_config.action_archive()
+        new_config = self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
+        self.assertTrue(new_config.active)
+        
+        # Reactivating the old one collides with the new active configuration
+        with self.assertRaises(ValidationError):
+            purchase_pricing_config.action_unarchive()
+
+    def test_14_refresh_test_calculations_bulk(self):
+        """Test 14: Test bulk refresh of the stored calculation preview"""
+        other_product = self.env['product.product'].create({'name': 'Other Product'})
+        configs = self.env['purchase.pricing.config'].create([
+            self.purchase_pricing_config_data,
+            dict(self.purchase_pricing_config_data, name='Other Config', product_id=other_product.id,
+                 pricing_method='min_price', date_range_days=7),
+        ])
+        customer = self.env['res.partner'].create({'name': 'Test Customer'})
+        for product, price_unit in ((self.product, 100.0), (self.product, 80.0), (other_product, 60.0)):
+            sale_order = self.env['sale.order'].create({
+                'partner_id': customer.id,
+                'date_order': fields.Date.today(),
+                'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': 1, 'price_unit': price_unit})],
+            })
+            sale_order.write({'state': 'sale'})
+        self.assertEqual(configs.mapped('test_price_count'), [0, 0], "Preview belum di-refresh")
+
+        self.env['purchase.pricing.config']._cron_refresh_test_calculations()
+
+        self.assertEqual(configs[0].test_price_count, 2)
+        self.assertEqual(configs[0].test_base_price, 90.0, "Average dari 100 dan 80")
+        self.assertEqual(configs[1].test_price_count, 1)
+        self.assertEqual(configs[1].test_base_price, 60.0)
+        self.assertEqual(configs[1].test_final_price, 54.0)
+
+        # Perubahan margin langsung memperbarui preview
+        configs[1].purchase_margin = 50.0
+        self.assertEqual(configs[1].test_final_price, 30.0)
+
+    def test_15_rolling_pricing_methods(self):
+        """Test 15: Volume-weighted, median, trimmed mean and exponentially-weighted methods"""
+        config = self.env['purchase.pricing.config'].create(self.purchase_pricing_config_data)
+        customer = self.env['res.partner'].create({'name': 'Test Customer'})
+        for price_unit, quantity in ((100.0, 10), (80.0, 5), (60.0, 1)):
+            sale_order = self.env['sale.order'].create({
+                'partner_id': customer.id,
+                'date_order': fields.Date.today(),
+                'order_line': [(0, 0, {'product_id': self.product.id, 'product_uom_qty': quantity,
+                                       'price_unit': price_unit})],
+            })
+            sale_order.write({'state': 'sale'})
+
+        expected = {
+            'vwap': 91.25,          # (1000 + 400 + 60) / 16
+            'median': 80.0,
+            'trimmed_mean': 80.0,   # 10% dari kedua ujung: (0.7 x 60 + 80 + 0.7 x 100) / 2.4
+            'ewma': 80.0,           # Satu hari: rata-rata hari itu
+        }
+        for pricing_method, base_price in expected.items():
+            config.pricing_method = pricing_method
+            price_details = config.get_price_details()
+            self.assertAlmostEqual(price_details['base_price'], base_price,
+                                   msg=f"Base price {pricing_method} tidak sesuai")
+            self.assertAlmostEqual(config.test_base_price, base_price,
+                                   msg="Preview harus memakai metode yang sama")
+
+        # The details wizard shows every method side by side
+        result = config.action_view_calculation_details()
+        wizard = self.env['wizard.calculation.details'].browse(result['res_id'])
+        self.assertEqual(wizard.qty_sum, 16.0)
+        self.assertEqual(wizard.min_price, 60.0)
+        self.assertEqual(wizard.avg_price, 80.0)
+        self.assertAlmostEqual(wizard.vwap_price, 91.25)
+        self.assertEqual(wizard.median_price, 80.0)
+
+        with self.assertRaises(ValidationError):
+            config.trim_percent = 50.0
+        with self.assertRaises(ValidationError):
+            config.ewma_alpha = 0.0
@@ -0,0 +1,166 @@
+from odoo.tests.common import TransactionCase
+from odoo import fields
+from datetime import date
+
+from odoo.addons.ffb_purchase.models.sale_price_daily import apply_price_deltas, compress_sketch, sketch_quantile
+
+
+class TestSalePriceDaily(TransactionCase):
+    """Unit test for model SalePriceDaily"""
+    def setUp(self):
+        """Setup method that runs before each test"""
+        super(TestSalePriceDaily, self).setUp()
+        
+        self.customer = self.env['res.partner'].create({
+            'name': 'Test Customer',
+        })
+        
+        self.product = self.env['product.product'].create({
+            'name': 'Test Product',
+        })
+        
+        # Draft sale order with two lines for the test product
+        self.sale_order = self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'date_order': fields.Date.today(),
+        })
+        self.sale_line_1 = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 10,
+            'price_unit': 100.0,
+        })
+        self.sale_line_2 = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 5,
+            'price_unit': 80.0,
+        })
+
+    def _get_bucket(self):
+        return self.env['sale.price.daily'].search([
+            ('product_id', '=', self.product.id),
+            ('date', '=', fields.Date.today()),
+        ])
+
+    def test_01_draft_order_not_counted(self):
+        """Test 1: Draft sale orders do not create statistics"""
+        self.assertFalse(self._get_bucket(), "Draft sale order tidak boleh masuk statistik")
+
+    def test_02_confirm_order_creates_bucket(self):
+        """Test 2: Confirming a sale order fills the daily bucket"""
+        self.sale_order.write({'state': 'sale'})
+        
+        bucket = self._get_bucket()
+        self.assertEqual(bucket.price_count, 2)
+        self.assertEqual(bucket.price_sum, 180.0)
+        self.assertEqual(bucket.price_min, 80.0)
+        self.assertEqual(bucket.price_max, 100.0)
+
+    def test_03_line_write_updates_bucket(self):
+        """Test 3: Price changes on confirmed lines are reflected in the bucket"""
+        self.sale_order.write({'state': 'sale'})
+        
+        self.sale_line_2.price_unit = 120.0
+        bucket = self._get_bucket()
+        self.assertEqual(bucket.price_min, 100.0)
+        self.assertEqual(bucket.price_max, 120.0)
+        self.assertEqual(bucket.price_sum, 220.0)
+
+    def test_04_cancel_order_removes_bucket(self):
+        """Test 4: Cancelling a confirmed sale order removes its prices"""
+        self.sale_order.write({'state': 'sale'})
+        self.sale_order.write({'state': 'cancel'})
+        
+        self.assertFalse(self._get_bucket(), "Statistik harus hilang setelah sale order dibatalkan")
+
+    def test_05_line_quantity_updates_bucket(self):
+        """Test 5: Quantity changes on confirmed lines are reflected in the bucket"""
+        self.sale_order.write({'state': 'sale'})
+        
+        self.sale_line_2.product_uom_qty = 15
+        bucket = self._get_bucket()
+        self.assertEqual(bucket.qty_sum, 25.0)
+        self.assertEqual(bucket.weighted_price_sum, 2200.0, "100 x 10 + 80 x 15")
+
+    def test_06_bucket_quantity_and_sketch(self):
+        """Test 6: Buckets keep quantity, weighted sum and a price sketch"""
+        self.sale_order.write({'state': 'sale'})
+        
+        bucket = self._get_bucket()
+        self.assertEqual(bucket.qty_sum, 15.0)
+        self.assertEqual(bucket.weighted_price_sum, 1400.0, "100 x 10 + 80 x 5")
+        self.assertEqual(bucket.price_sketch, [[80.0, 1], [100.0, 1]])
+
+    def test_07_summarize_days(self):
+        """Test 7: Window prices of every method are merged from daily buckets"""
+        daily_stats = {
+            date(2025, 1, 1): {
+                'price_count': 2, 'price_sum': 200.0, 'price_min': 90.0, 'qty_sum': 30.0,
+                'weighted_price_sum': 3100.0, 'price_sketch': [[90.0, 1], [110.0, 1]],
+            },
+            date(2025, 1, 2): {
+                'price_count': 2, 'price_sum': 160.0, 'price_min': 60.0, 'qty_sum': 10.0,
+                'weighted_price_sum': 700.0, 'price_sketch': [[60.0, 1], [100.0, 1]],
+            },
+        }
+        summary = self.env['sale.price.daily'].summarize_days(daily_stats, trim_percent=25.0, ewma_alpha=0.5)
+        
+        self.assertEqual(summary['price_count'], 4)
+        self.assertEqual(summary['qty_sum'], 40.0)
+        prices = summary['method_prices']
+        self.assertEqual(prices['min_price'], 60.0)
+        self.assertEqual(prices['avg_price'], 90.0)
+        self.assertEqual(prices['vwap'], 95.0, "3800 / 40")
+        self.assertEqual(prices['median'], 95.0, "Di antara 90 dan 100")
+        self.assertEqual(prices['trimmed_mean'], 95.0, "60 dan 110 dibuang")
+        self.assertEqual(prices['ewma'], 90.0, "0.5 x 80 + 0.5 x 100")
+        
+        empty = self.env['sale.price.daily'].summarize_days({})
+        self.assertEqual(empty['price_count'], 0)
+
+    def test_08_compress_sketch(self):
+        """Test 8: Sketches stay bounded and keep their total count"""
+        sketch = compress_sketch(([float(price), 1] for price in range(200)), size=20)
+        
+        self.assertEqual(len(sketch), 20)
+        self.assertEqual(sum(count for _price, count in sketch), 200)
+        self.assertAlmostEqual(sum(price * count for price, count in sketch) / 200, 99.5)
+        self.assertAlmostEqual(sketch_quantile(sketch, 0.5), 99.5, delta=10.0)
+
+    def test_09_incremental_bucket_updates(self):
+        """Test 9: Buckets follow line changes from deltas, recomputing only when a removal is not exact"""
+        self.sale_order.write({'state': 'sale'})
+        line_3 = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'name': 'Test Product',
+            'product_uom_qty': 2,
+            'price_unit': 90.0,
+        })
+        bucket = self._get_bucket()
+        self.assertEqual(bucket.price_count, 3)
+        self.assertEqual(bucket.price_sum, 270.0)
+        self.assertEqual(bucket.qty_sum, 17.0)
+        self.assertEqual(bucket.price_sketch, [[80.0, 1], [90.0, 1], [100.0, 1]])
+        
+        # Removing the minimum falls back to recomputing the bucket
+        self.sale_line_2.unlink()
+        self.assertEqual(bucket.price_min, 90.0)
+        self.assertEqual(bucket.price_count, 2)
+        
+        line_3.unlink()
+        self.assertEqual(bucket.price_sketch, [[100.0, 1]])
+        self.assertEqual(bucket.weighted_price_sum, 1000.0)
+        
+        values = {
+            'price_count': 3, 'price_sum': 270.0, 'price_min': 80.0, 'price_max': 100.0,
+            'qty_sum': 3.0, 'weighted_price_sum': 270.0, 'price_sketch': [[80.0, 1], [90.0, 1], [100.0, 1]],
+        }
+        updated = apply_price_deltas(values, [(90.0, 1.0)], [(95.0, 2.0)])
+        self.assertEqual(updated['price_sketch'], [[80.0, 1], [95.0, 1], [100.0, 1]])
+        self.assertEqual(updated['weighted_price_sum'], 370.0)
+        self.assertIsNone(apply_price_deltas(values, [(85.0, 1.0)], []), "Harga yang tidak ada di sketch dihitung ulang")
+        self.assertIsNone(apply_price_deltas(values, [(100.0, 1.0)], []), "Maximum yang dihapus dihitung ulang")
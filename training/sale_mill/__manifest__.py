@@ -1,6 +1,6 @@
 {
     'name': 'Sale Mill',
-    'version': '1.0',
+    'version': '1.0.1',
     'category': 'Sales',
     'summary': 'Sale Mill Management Module with Daily Price Management',
     'description': """
@@ -25,12 +25,17 @@
         'sale',
         'sale_management',
         'purchase',
+        'sequence_batch',
     ],
     'data': [
         'security/ir.model.access.csv',
         'security/record_rules.xml',
         'data/ir_sequence_data.xml',
+        'data/ir_cron_data.xml',
         'views/daily_price_views.xml',
+        'views/daily_price_import_views.xml',
+        'views/daily_price_fill_forward_views.xml',
+        'views/daily_price_matrix_views.xml',
         'views/menu_views.xml',
     ],
     'installable': True,
@@ -0,0 +1,13 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Apply the sequence changes the noupdate data only applies on install"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    # Daily prices are numbered by batches: a gap-allowed Postgres sequence
+    # does not hold a row lock until the batch commits
+    sequence = env.ref('sale_mill.seq_daily_price', raise_if_not_found=False)
+    if sequence and sequence.implementation != 'standard':
+        sequence.implementation = 'standard'
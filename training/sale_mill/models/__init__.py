@@ -1 +1,4 @@
-from . import daily_price 
\ No newline at end of file
+from . import daily_price
+from . import daily_price_import
+from . import daily_price_fill_forward
+from . import daily_price_matrix
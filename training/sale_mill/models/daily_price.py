@@ -1,10 +1,17 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from collections import Counter
 from datetime import timedelta
+from psycopg2.errors import UniqueViolation
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Database constraint guarding one price per product-customer-date
+UNIQUE_PRODUCT_CUSTOMER_DATE = 'daily_price_unique_product_customer_date'
+UNIQUE_KEY_FIELDS = {'product_id', 'customer_id', 'date'}
+
 
 class DailyPriceLine(models.Model):
     _name = 'daily.price.line'
@@ -86,12 +93,73 @@ class DailyPrice(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        """Override create to handle both single and batch creation"""
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                vals['name'] = self.env['ir.sequence'].next_by_code('daily.price') or _('New')
+        """Override create to handle both single and batch creation, numbering the batch in one sequence block"""
+        vals_to_number = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        names = self.env['ir.sequence'].next_by_code_batch('daily.price', len(vals_to_number))
+        for vals, name in zip(vals_to_number, names):
+            vals['name'] = name
         
-        return super(DailyPrice, self).create(vals_list)
+        try:
+            with self.env.cr.savepoint():
+                return super(DailyPrice, self).create(vals_list)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_PRODUCT_CUSTOMER_DATE:
+                raise
+            default_date = self.default_get(['date']).get('date')
+            keys = [
+                (vals.get('product_id'), vals.get('customer_id'), fields.Date.to_date(vals.get('date', default_date)))
+                for vals in vals_list
+            ]
+            raise self._get_duplicate_key_error(keys) from None
+
+    def write(self, vals):
+        """Override write to report duplicate product-customer-date combinations readably"""
+        if not UNIQUE_KEY_FIELDS & vals.keys():
+            return super(DailyPrice, self).write(vals)
+        try:
+            with self.env.cr.savepoint():
+                return super(DailyPrice, self).write(vals)
+        except UniqueViolation as error:
+            if error.diag.constraint_name != UNIQUE_PRODUCT_CUSTOMER_DATE:
+                raise
+            keys = [
+                (
+                    vals.get('product_id', record.product_id.id),
+                    vals.get('customer_id', record.customer_id.id),
+                    fields.Date.to_date(vals['date']) if 'date' in vals else record.date,
+                )
+                for record in self
+            ]
+            raise self._get_duplicate_key_error(keys, exclude_ids=self.ids) from None
+
+    @api.model
+    def _get_duplicate_key_error(self, keys, exclude_ids=()):
+        """Build the error for the first (product_id, customer_id, date) key violating uniqueness
+
+        Only called once the database rejected the rows, so the extra lookup stays off the normal path.
+        """
+        duplicate_keys = {key for key, count in Counter(keys).items() if count > 1}
+        # The unique constraint spans every company, so look beyond the record rules
+        existing_records = self.sudo().search_fetch([
+            ('product_id', 'in', [key[0] for key in keys]),
+            ('customer_id', 'in', [key[1] for key in keys]),
+            ('date', 'in', [key[2] for key in keys]),
+            ('id', 'not in', list(exclude_ids)),
+        ], ['product_id', 'customer_id', 'date'])
+        duplicate_keys.update(
+            (record.product_id.id, record.customer_id.id, record.date) for record in existing_records
+        )
+        for product_id, customer_id, date in keys:
+            if (product_id, customer_id, date) in duplicate_keys:
+                return ValidationError(_(
+                    'A daily price record already exists for product "%s", customer "%s" on date "%s". '
+                    'Please use a different date or modify the existing record.'
+                ) % (
+                    self.env['product.product'].browse(product_id).name,
+                    self.env['res.partner'].browse(customer_id).name,
+                    date.strftime('%Y-%m-%d'),
+                ))
+        return ValidationError(_('A daily price record for this product-customer-date combination already exists!'))
 
     @api.model
     def _remove_old_constraints(self):
@@ -169,37 +237,56 @@ class DailyPrice(models.Model):
             if record.date and record.date > fields.Date.today() + timedelta(days=365):
                 raise ValidationError(_('Price date cannot be more than 1 year in the future.'))
 
-    @api.constrains('product_id', 'customer_id', 'date')
-    def _check_unique_product_customer_date(self):
-        for record in self:
-            if record.product_id and record.customer_id and record.date:
-                # Check if another record exists with the same product-customer-date combination
-                existing_record = self.search([
-                    ('product_id', '=', record.product_id.id),
-                    ('customer_id', '=', record.customer_id.id),
-                    ('date', '=', record.date),
-                    ('id', '!=', record.id)
-                ], limit=1)
-                
-                if existing_record:
-                    raise ValidationError(_(
-                        'A daily price record already exists for product "%s", customer "%s" on date "%s". '
-                        'Please use a different date or modify the existing record.'
-                    ) % (record.product_id.name, record.customer_id.name, record.date.strftime('%Y-%m-%d')))
+    @api.model
+    def get_prices_for_keys(self, keys, fallback=False):
+        """Get unit prices for many (product_id, customer_id, date) triples in one query
+
+        With fallback=True a triple without a price on its date gets the latest price before it.
+        Returns dict {(product_id, customer_id, date): unit_price} for the triples that have a price.
+        """
+        keys = {
+            (product_id, customer_id, fields.Date.to_date(date))
+            for product_id, customer_id, date in keys
+            if product_id and customer_id and date
+        }
+        if not keys:
+            return {}
+        product_ids, customer_ids, dates = (list(column) for column in zip(*keys))
+
+        # Visible records only (multi-company rule), narrowed to the requested products and customers
+        domain = [('product_id', 'in', product_ids), ('customer_id', 'in', customer_ids)]
+        if fallback:
+            domain.append(('date', '<=', max(dates)))
+            date_condition = SQL("dp.date <= k.date")
+        else:
+            domain.append(('date', 'in', dates))
+            date_condition = SQL("dp.date = k.date")
+        query = self._search(domain)
+
+        self.flush_model(['product_id', 'customer_id', 'date', 'unit_price'])
+        self.env.cr.execute(SQL("""
+            SELECT k.product_id, k.customer_id, k.date, price.unit_price
+              FROM unnest(%s::int[], %s::int[], %s::date[]) AS k(product_id, customer_id, date)
+              CROSS JOIN LATERAL (
+                    SELECT dp.unit_price
+                      FROM daily_price dp
+                     WHERE dp.product_id = k.product_id
+                       AND dp.customer_id = k.customer_id
+                       AND %s
+                       AND dp.id IN %s
+                  ORDER BY dp.date DESC
+                     LIMIT 1
+              ) AS price
+        """, product_ids, customer_ids, dates, date_condition, query.subselect()))
+        return {
+            (product_id, customer_id, date): unit_price
+            for product_id, customer_id, date, unit_price in self.env.cr.fetchall()
+        }
 
-    def get_price_for_date(self, product_id, customer_id, date):
+    def get_price_for_date(self, product_id, customer_id, date, fallback=False):
         """Get unit price for a specific product, customer and date"""
-        # Search for the daily price record for this product-customer-date combination
-        price_record = self.search([
-            ('product_id', '=', product_id),
-            ('customer_id', '=', customer_id),
-            ('date', '=', date)
-        ], limit=1)
-        
-        if price_record:
-            return price_record.unit_price
-        
-        return 0.0
+        key = (product_id, customer_id, fields.Date.to_date(date))
+        return self.get_prices_for_keys([key], fallback=fallback).get(key, 0.0)
 
     def get_price_for_date_range(self, product_id, customer_id, start_date, end_date):
         """Get unit prices for a product-customer combination within a date range"""
@@ -215,21 +302,73 @@ class DailyPrice(models.Model):
 
     def check_price_exists(self, product_id, customer_id, date):
         """Check if price exists for a specific product, customer and date"""
-        # Search for the daily price record for this product-customer-date combination
-        price_record = self.search([
-            ('product_id', '=', product_id),
-            ('customer_id', '=', customer_id),
-            ('date', '=', date)
-        ], limit=1)
-        
-        return bool(price_record)
+        key = (product_id, customer_id, fields.Date.to_date(date))
+        return key in self.get_prices_for_keys([key])
+
+    def fill_forward(self, date_to, date_from=None, domain=None):
+        """Carry prices forward to every date up to ``date_to`` that has no price yet
+
+        Works on this recordset, or on the records matching ``domain``. For each
+        product-customer pair the latest selected price is copied to the following
+        dates without a price, a newer existing price taking over from its own date.
+        Only dates from ``date_from`` on are filled. Existing prices are read in one
+        query and the missing ones are created in one batch.
+
+        Returns {'created': n, 'skipped': n}, skipped counting the dates that already had a price.
+        """
+        sources = self.search(domain) if domain is not None else self
+        date_to = fields.Date.to_date(date_to)
+        date_from = fields.Date.to_date(date_from) if date_from else None
+
+        source_by_pair = {}
+        for record in sources.sorted('date'):
+            if record.date < date_to:
+                source_by_pair[record.product_id.id, record.customer_id.id] = record
+        if not source_by_pair:
+            return {'created': 0, 'skipped': 0}
+
+        # The unique constraint spans every company, so look beyond the record rules
+        existing_records = self.sudo().search_fetch([
+            ('product_id', 'in', [product_id for product_id, _customer_id in source_by_pair]),
+            ('customer_id', 'in', [customer_id for _product_id, customer_id in source_by_pair]),
+            ('date', '>', min(record.date for record in source_by_pair.values())),
+            ('date', '<=', date_to),
+        ], ['product_id', 'customer_id', 'date', 'unit_price', 'currency_id', 'name'])
+        existing_by_cell = {
+            (record.product_id.id, record.customer_id.id, record.date): record for record in existing_records
+        }
+
+        vals_list = []
+        skipped = 0
+        for (product_id, customer_id), source in source_by_pair.items():
+            day = source.date + timedelta(days=1)
+            while day <= date_to:
+                existing = existing_by_cell.get((product_id, customer_id, day))
+                in_range = not date_from or day >= date_from
+                if existing:
+                    source = existing
+                    skipped += in_range
+                elif in_range:
+                    vals_list.append({
+                        'product_id': product_id,
+                        'customer_id': customer_id,
+                        'date': day,
+                        'unit_price': source.unit_price,
+                        'currency_id': source.currency_id.id,
+                        'notes': f'Copied from {source.name}',
+                    })
+                day += timedelta(days=1)
+
+        self.create(vals_list)
+        return {'created': len(vals_list), 'skipped': skipped}
 
     def action_copy_to_next_day(self):
         """Copy this daily price to the next day"""
+        self.ensure_one()
         next_day = self.date + timedelta(days=1)
         
-        # Check if record already exists for next day
-        if self.check_record_exists(self.product_id.id, self.customer_id.id, next_day):
+        result = self.fill_forward(next_day, date_from=next_day)
+        if not result['created']:
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
@@ -240,16 +379,6 @@ class DailyPrice(models.Model):
                 }
             }
         
-        # Create new daily price record for next day
-        self.create({
-            'product_id': self.product_id.id,
-            'customer_id': self.customer_id.id,
-            'date': next_day,
-            'unit_price': self.unit_price,
-            'currency_id': self.currency_id.id,
-            'notes': f'Copied from {self.name}',
-        })
-        
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
@@ -355,12 +484,21 @@ class ProductProduct(models.Model):
         for product in self:
             product.has_daily_pricing = bool(product.daily_price_ids)
 
-    def get_daily_price(self, customer_id, date):
+    def get_daily_price(self, customer_id, date, fallback=False):
         """Get daily price for this product, customer and date"""
         self.ensure_one()
-        daily_price = self.env['daily.price'].get_price_for_date(self.id, customer_id, date)
+        daily_price = self.env['daily.price'].get_price_for_date(self.id, customer_id, date, fallback=fallback)
         return daily_price
 
+    def get_daily_prices(self, customer_id, date, fallback=False):
+        """Get daily prices of these products for a customer and date
+        Returns dict {product_id: unit_price} for the products that have a price"""
+        date = fields.Date.to_date(date)
+        prices = self.env['daily.price'].get_prices_for_keys(
+            [(product.id, customer_id, date) for product in self], fallback=fallback
+        )
+        return {product_id: price for (product_id, _customer_id, _date), price in prices.items()}
+
     def check_daily_price_exists(self, customer_id, date):
         """Check if daily price exists for this product, customer and date"""
         self.ensure_one()
@@ -400,10 +538,11 @@ class SaleOrderLine(models.Model):
                 # Get the date from sale order
                 order_date = self.order_id.date_order.date()
                 
-                # Check if daily price exists for this date
-                if self.product_id.check_daily_price_exists(self.order_id.partner_id.id, order_date):
-                    # Get the daily price
-                    daily_price = self.product_id.get_daily_price(self.order_id.partner_id.id, order_date)
+                # Get the daily price for this date (missing when not set)
+                key = (self.product_id.id, self.order_id.partner_id.id, order_date)
+                prices = self.env['daily.price'].get_prices_for_keys([key])
+                if key in prices:
+                    daily_price = prices[key]
                     if daily_price > 0:
                         self.price_unit = daily_price
                 else:
@@ -422,22 +561,27 @@ class SaleOrderLine(models.Model):
     @api.constrains('product_id', 'price_unit')
     def _check_daily_price_required(self):
         """Validate that products with daily pricing have valid prices"""
-        for line in self:
-            if (line.product_id and line.product_id.has_daily_pricing and 
-                line.order_id.partner_id and line.order_id.date_order):
-                
-                order_date = line.order_id.date_order.date()
-                
-                # Check if daily price exists
-                if not line.product_id.check_daily_price_exists(line.order_id.partner_id.id, order_date):
-                    raise ValidationError(_(
-                        'Product %s requires a daily price for customer %s on %s. '
-                        'Please set the daily price in Daily Prices menu first.'
-                    ) % (
-                        line.product_id.name,
-                        line.order_id.partner_id.name,
-                        order_date.strftime('%Y-%m-%d')
-                    ))
+        lines = self.filtered(lambda line: (
+            line.product_id and line.product_id.has_daily_pricing and
+            line.order_id.partner_id and line.order_id.date_order
+        ))
+        keys_by_line = {
+            line: (line.product_id.id, line.order_id.partner_id.id, line.order_id.date_order.date())
+            for line in lines
+        }
+        # Resolve every line with a single lookup
+        prices = self.env['daily.price'].get_prices_for_keys(keys_by_line.values())
+        for line, key in keys_by_line.items():
+            if key not in prices:
+                order_date = key[2]
+                raise ValidationError(_(
+                    'Product %s requires a daily price for customer %s on %s. '
+                    'Please set the daily price in Daily Prices menu first.'
+                ) % (
+                    line.product_id.name,
+                    line.order_id.partner_id.name,
+                    order_date.strftime('%Y-%m-%d')
+                ))
 
 
 class ResPartner(models.Model):
@@ -445,10 +589,20 @@ class ResPartner(models.Model):
 
     daily_price_ids = fields.One2many('daily.price', 'customer_id', string='Daily Prices')
 
-    def get_daily_price_for_product(self, product_id, date):
+    def get_daily_price_for_product(self, product_id, date, fallback=False):
         """Get daily price for a specific product and date for this customer"""
         self.ensure_one()
-        return self.env['daily.price'].get_price_for_date(product_id, self.id, date)
+        return self.env['daily.price'].get_price_for_date(product_id, self.id, date, fallback=fallback)
+
+    def get_daily_prices_for_products(self, product_ids, date, fallback=False):
+        """Get daily prices of many products on a date for this customer
+        Returns dict {product_id: unit_price} for the products that have a price"""
+        self.ensure_one()
+        date = fields.Date.to_date(date)
+        prices = self.env['daily.price'].get_prices_for_keys(
+            [(product_id, self.id, date) for product_id in product_ids], fallback=fallback
+        )
+        return {product_id: price for (product_id, _customer_id, _date), price in prices.items()}
 
     def check_daily_price_record_exists(self, product_id, date=None):
         """Check if a daily price record exists for this customer, product and date"""
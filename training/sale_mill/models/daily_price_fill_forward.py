@@ -0,0 +1,48 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class DailyPriceFillForwardWizard(models.TransientModel):
+    _name = 'daily.price.fill.forward.wizard'
+    _description = 'Fill Daily Prices Forward'
+
+    daily_price_ids = fields.Many2many('daily.price', string='Source Prices', required=True)
+    date_from = fields.Date(string='From Date', help='First date to fill, defaults to the day after each source price')
+    date_to = fields.Date(string='To Date', required=True, default=fields.Date.today)
+    pair_count = fields.Integer(string='Product-Customer Pairs', compute='_compute_pair_count')
+
+    @api.model
+    def default_get(self, fields_list):
+        """Take the selected daily prices as source"""
+        res = super(DailyPriceFillForwardWizard, self).default_get(fields_list)
+        if self.env.context.get('active_model') == 'daily.price' and self.env.context.get('active_ids'):
+            res['daily_price_ids'] = [(6, 0, self.env.context['active_ids'])]
+        return res
+
+    @api.depends('daily_price_ids')
+    def _compute_pair_count(self):
+        for record in self:
+            record.pair_count = len({
+                (price.product_id.id, price.customer_id.id) for price in record.daily_price_ids
+            })
+
+    def action_fill_forward(self):
+        """Carry the selected prices forward up to the target date"""
+        self.ensure_one()
+        if self.date_from and self.date_from > self.date_to:
+            raise UserError(_('The start date must be on or before the end date.'))
+
+        result = self.daily_price_ids.fill_forward(self.date_to, date_from=self.date_from)
+        if result['created']:
+            self.env['daily.price.matrix']._trigger_refresh()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Fill Forward'),
+                'message': _('%(created)s daily price(s) created, %(skipped)s date(s) already had a price.',
+                             created=result['created'], skipped=result['skipped']),
+                'type': 'success' if result['created'] else 'warning',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
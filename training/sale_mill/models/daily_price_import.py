@@ -0,0 +1,286 @@
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL, split_every
+from datetime import date, datetime, timedelta
+import base64
+import csv
+import io
+import logging
+
+import psycopg2
+
+from .daily_price import UNIQUE_PRODUCT_CUSTOMER_DATE
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Rows resolved and written per statement
+IMPORT_CHUNK_SIZE = 2000
+# Row errors kept in the report, the rest are only counted
+IMPORT_ERROR_LIMIT = 500
+IMPORT_COLUMNS = ('product_code', 'customer_code', 'date', 'unit_price', 'notes')
+REQUIRED_IMPORT_COLUMNS = ('product_code', 'customer_code', 'date', 'unit_price')
+
+
+class DailyPriceImportWizard(models.TransientModel):
+    _name = 'daily.price.import.wizard'
+    _description = 'Import Daily Prices'
+
+    file = fields.Binary(string='File', required=True,
+                         help='CSV or XLSX with columns product_code, customer_code, date, unit_price and optional notes')
+    filename = fields.Char(string='File Name')
+    update_existing = fields.Boolean(string='Update Existing Prices', default=True,
+                                     help='Overwrite the unit price of rows already recorded for the same product, customer and date')
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    created_count = fields.Integer(string='Created', readonly=True)
+    updated_count = fields.Integer(string='Updated', readonly=True)
+    skipped_count = fields.Integer(string='Skipped', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    error_log = fields.Text(string='Error Details', readonly=True)
+
+    def _iter_rows(self):
+        """Yield (row_number, {column: value}) from the uploaded file, one row at a time"""
+        self.ensure_one()
+        content = base64.b64decode(self.file)
+        if (self.filename or '').lower().endswith('.xlsx'):
+            yield from self._iter_xlsx_rows(content)
+        else:
+            yield from self._iter_csv_rows(content)
+
+    def _iter_csv_rows(self, content):
+        reader = csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig', newline=''))
+        header = self._get_column_indexes(next(reader, []))
+        for row_number, row in enumerate(reader, start=2):
+            if any(row):
+                yield row_number, {column: row[index] if index < len(row) else '' for column, index in header.items()}
+
+    def _iter_xlsx_rows(self, content):
+        if openpyxl is None:
+            raise UserError(_('Reading XLSX files requires the openpyxl library. Please import a CSV file instead.'))
+        workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = self._get_column_indexes(next(rows, ()))
+            for row_number, row in enumerate(rows, start=2):
+                if any(value not in (None, '') for value in row):
+                    yield row_number, {
+                        column: row[index] if index < len(row) else None for column, index in header.items()
+                    }
+        finally:
+            workbook.close()
+
+    def _get_column_indexes(self, header_row):
+        """Map the known import columns to their position in the header row"""
+        header = {
+            str(name).strip().lower(): index for index, name in enumerate(header_row) if name not in (None, '')
+        }
+        missing_columns = [column for column in REQUIRED_IMPORT_COLUMNS if column not in header]
+        if missing_columns:
+            raise UserError(_('The file is missing the column(s): %s') % ', '.join(missing_columns))
+        return {column: header[column] for column in IMPORT_COLUMNS if column in header}
+
+    @staticmethod
+    def _cell_text(value):
+        """Text of a code cell; spreadsheets hand numeric codes over as floats"""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip() if value not in (None, False) else ''
+
+    @staticmethod
+    def _parse_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return fields.Date.to_date(str(value).strip())
+
+    def action_import(self):
+        """Import the file chunk by chunk, upserting on (product, customer, date)"""
+        self.ensure_one()
+        DailyPrice = self.env['daily.price']
+        DailyPrice.check_access('create')
+        if self.update_existing:
+            DailyPrice.check_access('write')
+
+        totals = {'created': 0, 'updated': 0, 'skipped': 0}
+        errors = []
+        error_count = 0
+        for chunk in split_every(IMPORT_CHUNK_SIZE, self._iter_rows()):
+            chunk_result, chunk_errors = self._import_chunk(chunk)
+            for key, count in chunk_result.items():
+                totals[key] += count
+            error_count += len(chunk_errors)
+            errors.extend(chunk_errors[:max(IMPORT_ERROR_LIMIT - len(errors), 0)])
+
+        DailyPrice.invalidate_model()
+        if totals['created'] or totals['updated']:
+            self.env['daily.price.matrix']._trigger_refresh()
+        error_lines = [_('Row %(row)s: %(message)s', row=row_number, message=message) for row_number, message in errors]
+        if error_count > len(errors):
+            error_lines.append(_('... and %s more errors', error_count - len(errors)))
+        self.write({
+            'state': 'done',
+            'created_count': totals['created'],
+            'updated_count': totals['updated'],
+            'skipped_count': totals['skipped'],
+            'error_count': error_count,
+            'error_log': '\n'.join(error_lines),
+        })
+        _logger.info("Daily price import: %s created, %s updated, %s skipped, %s errors",
+                     totals['created'], totals['updated'], totals['skipped'], error_count)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _import_chunk(self, rows):
+        """Resolve and upsert one chunk of rows
+
+        Returns ({'created': n, 'updated': n, 'skipped': n}, [(row_number, message)]).
+        """
+        errors = []
+        product_codes = {self._cell_text(row['product_code']) for _row_number, row in rows} - {''}
+        customer_codes = {self._cell_text(row['customer_code']) for _row_number, row in rows} - {''}
+        products = self.env['product.product'].search_fetch(
+            [('default_code', 'in', list(product_codes))], ['default_code', 'name'], order='id desc',
+        )
+        customers = self.env['res.partner'].search_fetch(
+            [('ref', 'in', list(customer_codes))], ['ref', 'name'], order='id desc',
+        )
+        # Lowest id wins when a code is shared
+        product_by_code = {product.default_code: product for product in products}
+        customer_by_code = {customer.ref: customer for customer in customers}
+
+        max_date = fields.Date.today() + timedelta(days=365)
+        values_by_key = {}
+        for row_number, row in rows:
+            product = product_by_code.get(self._cell_text(row['product_code']))
+            customer = customer_by_code.get(self._cell_text(row['customer_code']))
+            if not product:
+                errors.append((row_number, _('Unknown product code "%s"', row['product_code'])))
+                continue
+            if not customer:
+                errors.append((row_number, _('Unknown customer code "%s"', row['customer_code'])))
+                continue
+            try:
+                price_date = self._parse_date(row['date'])
+            except (TypeError, ValueError):
+                errors.append((row_number, _('Invalid date "%s", expected YYYY-MM-DD', row['date'])))
+                continue
+            try:
+                unit_price = float(row['unit_price'])
+            except (TypeError, ValueError):
+                errors.append((row_number, _('Invalid unit price "%s"', row['unit_price'])))
+                continue
+            # Same rules as the daily.price constraints, which raw SQL skips
+            if unit_price <= 0:
+                errors.append((row_number, _('Unit price must be greater than zero.')))
+                continue
+            if price_date > max_date:
+                errors.append((row_number, _('Price date cannot be more than 1 year in the future.')))
+                continue
+
+            key = (product.id, customer.id, price_date)
+            if key in values_by_key:
+                errors.append((values_by_key[key]['row_number'], _('Superseded by row %s', row_number)))
+            values_by_key[key] = {
+                'row_number': row_number,
+                'unit_price': unit_price,
+                'notes': self._cell_text(row.get('notes')) or None,
+                'display_name': f"{price_date} - {product.name} - {customer.name}",
+            }
+
+        result = {'created': 0, 'updated': 0, 'skipped': 0}
+        if not values_by_key:
+            return result, errors
+
+        keys = list(values_by_key)
+        try:
+            with self.env.cr.savepoint():
+                upserted = self._upsert_prices(keys, [values_by_key[key] for key in keys])
+        except psycopg2.Error as error:
+            _logger.warning("Daily price import chunk failed: %s", error)
+            errors.extend((values['row_number'], str(error)) for values in values_by_key.values())
+            return result, errors
+
+        for key in keys:
+            inserted = upserted.get(key)
+            if inserted is None:
+                result['skipped'] += 1
+                if self.update_existing:
+                    errors.append((values_by_key[key]['row_number'],
+                                   _('A price for this product, customer and date belongs to another company.')))
+            elif inserted:
+                result['created'] += 1
+            else:
+                result['updated'] += 1
+        return result, errors
+
+    def _upsert_prices(self, keys, values_list):
+        """Insert or update daily prices in one statement and number the inserted rows
+
+        Returns {(product_id, customer_id, date): inserted} for the rows written.
+        """
+        company = self.env.company
+        if self.update_existing:
+            conflict_action = SQL("""
+                DO UPDATE SET unit_price = EXCLUDED.unit_price,
+                              notes = COALESCE(EXCLUDED.notes, daily_price.notes),
+                              write_uid = EXCLUDED.write_uid,
+                              write_date = EXCLUDED.write_date
+                        WHERE daily_price.company_id IS NOT DISTINCT FROM EXCLUDED.company_id
+            """)
+        else:
+            conflict_action = SQL("DO NOTHING")
+
+        product_ids, customer_ids, dates = (list(column) for column in zip(*keys))
+        self.env['daily.price'].flush_model()
+        self.env.cr.execute(SQL("""
+            INSERT INTO daily_price (name, product_id, customer_id, date, unit_price, notes, display_name,
+                                     currency_id, company_id, create_uid, write_uid, create_date, write_date)
+                 SELECT %s, k.product_id, k.customer_id, k.date, k.unit_price, k.notes, k.display_name,
+                        %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+                   FROM unnest(%s::int[], %s::int[], %s::date[], %s::float8[], %s::text[], %s::varchar[])
+                        AS k(product_id, customer_id, date, unit_price, notes, display_name)
+            ON CONFLICT ON CONSTRAINT %s %s
+              RETURNING id, product_id, customer_id, date, (xmax = 0) AS inserted
+        """,
+            _('New'), company.currency_id.id, company.id, self.env.uid, self.env.uid,
+            product_ids, customer_ids, dates,
+            [values['unit_price'] for values in values_list],
+            [values['notes'] for values in values_list],
+            [values['display_name'] for values in values_list],
+            SQL.identifier(UNIQUE_PRODUCT_CUSTOMER_DATE), conflict_action,
+        ))
+        upserted = {}
+        inserted_ids = []
+        for record_id, product_id, customer_id, price_date, inserted in self.env.cr.fetchall():
+            upserted[product_id, customer_id, price_date] = inserted
+            if inserted:
+                inserted_ids.append(record_id)
+
+        # One block of numbers for every row inserted by the chunk
+        names = self.env['ir.sequence'].next_by_code_batch('daily.price', len(inserted_ids))
+        if names:
+            self.env.cr.execute(SQL("""
+                UPDATE daily_price dp
+                   SET name = n.name
+                  FROM unnest(%s::int[], %s::varchar[]) AS n(id, name)
+                 WHERE dp.id = n.id
+            """, inserted_ids, names))
+
+        # Raw SQL skips the recompute of the products' stored has_daily_pricing
+        products = self.env['product.product'].browse(
+            {product_id for (product_id, _customer_id, _date), inserted in upserted.items() if inserted}
+        )
+        products.invalidate_recordset(['daily_price_ids'])
+        products.modified(['daily_price_ids'])
+        products.flush_recordset(['has_daily_pricing'])
+        return upserted
@@ -0,0 +1,97 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+import hashlib
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class DailyPriceMatrix(models.Model):
+    _name = 'daily.price.matrix'
+    _description = 'Daily Price Matrix'
+    _auto = False
+    _order = 'date desc, product_id, customer_id'
+
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    unit_price = fields.Float(string='Unit Price', digits=(10, 2), readonly=True, aggregator='avg')
+    previous_price = fields.Float(string='Previous Price', digits=(10, 2), readonly=True, aggregator='avg',
+                                  help='Price of the previous recorded date for the same product and customer')
+    price_change = fields.Float(string='Change', digits=(10, 2), readonly=True, aggregator='sum',
+                                help='Difference with the previous recorded price')
+    price_change_percent = fields.Float(string='Change (%)', digits=(10, 2), readonly=True, aggregator='avg')
+    moving_avg_7d = fields.Float(string='7-Day Average', digits=(10, 2), readonly=True, aggregator='avg',
+                                 help='Average price over the 7 calendar days ending on this date')
+    moving_avg_30d = fields.Float(string='30-Day Average', digits=(10, 2), readonly=True, aggregator='avg',
+                                  help='Average price over the 30 calendar days ending on this date')
+
+    def init(self):
+        # Materialized, so reading a month of the matrix does not recompute the windows
+        create_view = SQL("""
+            CREATE MATERIALIZED VIEW %(table)s AS (
+                SELECT dp.id,
+                       dp.product_id,
+                       dp.customer_id,
+                       dp.date,
+                       dp.company_id,
+                       dp.currency_id,
+                       dp.unit_price,
+                       LAG(dp.unit_price) OVER pair_by_date AS previous_price,
+                       dp.unit_price - LAG(dp.unit_price) OVER pair_by_date AS price_change,
+                       ROUND(((dp.unit_price / NULLIF(LAG(dp.unit_price) OVER pair_by_date, 0) - 1) * 100)::numeric, 2)
+                           AS price_change_percent,
+                       AVG(dp.unit_price) OVER (pair_by_date RANGE BETWEEN INTERVAL '6 days' PRECEDING AND CURRENT ROW)
+                           AS moving_avg_7d,
+                       AVG(dp.unit_price) OVER (pair_by_date RANGE BETWEEN INTERVAL '29 days' PRECEDING AND CURRENT ROW)
+                           AS moving_avg_30d
+                  FROM daily_price dp
+                WINDOW pair_by_date AS (PARTITION BY dp.product_id, dp.customer_id ORDER BY dp.date)
+            )
+        """, table=SQL.identifier(self._table))
+        # Recreated only when missing or when its query changed: the query hash is kept
+        # as the view comment, so a module load keeps the view and its data
+        query_hash = hashlib.sha1(create_view.code.encode()).hexdigest()
+        self.env.cr.execute(SQL("SELECT obj_description(to_regclass(%s), 'pg_class')", self._table))
+        if self.env.cr.fetchone()[0] == query_hash:
+            return
+
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", SQL.identifier(self._table)))
+        self.env.cr.execute(create_view)
+        # A unique index is what allows REFRESH ... CONCURRENTLY
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)",
+            SQL.identifier(f'{self._table}_id_uniq'), SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX %s ON %s (date, product_id, customer_id)",
+            SQL.identifier(f'{self._table}_date_product_customer_index'), SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "COMMENT ON MATERIALIZED VIEW %s IS %s", SQL.identifier(self._table), query_hash,
+        ))
+
+    @api.model
+    def refresh_view(self, concurrently=True):
+        """Refresh the matrix from daily.price
+
+        Concurrently keeps the matrix readable while it is rebuilt.
+        """
+        self.env['daily.price'].flush_model()
+        self.env.cr.execute(SQL(
+            "REFRESH MATERIALIZED VIEW %s %s",
+            SQL("CONCURRENTLY") if concurrently else SQL(),
+            SQL.identifier(self._table),
+        ))
+        self.invalidate_model()
+        _logger.info("Daily price matrix refreshed")
+
+    @api.model
+    def _trigger_refresh(self):
+        """Have the refresh cron run as soon as possible, outside of the current request"""
+        cron = self.env.ref('sale_mill.ir_cron_refresh_daily_price_matrix', raise_if_not_found=False)
+        if cron:
+            # sudo: scheduling the refresh is part of entering prices, not a separate permission
+            cron.sudo()._trigger()
@@ -1 +1,2 @@
-from . import test_daily_price
\ No newline at end of file
+from . import test_daily_price
+from . import test_daily_price_import
@@ -522,3 +522,160 @@ class TestDailyPrice(TransactionCase):
         
         result = new_daily_price._onchange_product_customer_date_check_existing()
         self.assertIsNone(result, "Should return None when date is missing")
+
+    def test_26_get_prices_for_keys(self):
+        """Test 26: Test get_prices_for_keys batch resolver with and without fallback"""
+        today = fields.Date.today()
+        yesterday = today - timedelta(days=1)
+        other_product = self.env['product.product'].create({'name': 'Other Product'})
+        
+        # Price only yesterday for product, today for other product
+        self.env['daily.price'].create(dict(self.daily_price_data, date=yesterday, unit_price=90.0))
+        self.env['daily.price'].create(dict(self.daily_price_data, product_id=other_product.id, unit_price=110.0))
+        
+        keys = [
+            (self.product.id, self.customer.id, today),
+            (self.product.id, self.customer.id, yesterday),
+            (other_product.id, self.customer.id, today),
+            (other_product.id, self.customer.id, yesterday),
+        ]
+        
+        # Exact date only
+        prices = self.env['daily.price'].get_prices_for_keys(keys)
+        self.assertEqual(prices, {
+            (self.product.id, self.customer.id, yesterday): 90.0,
+            (other_product.id, self.customer.id, today): 110.0,
+        }, "Hanya harga pada tanggal yang sama yang dikembalikan")
+        
+        # Latest price on or before date
+        prices = self.env['daily.price'].get_prices_for_keys(keys, fallback=True)
+        self.assertEqual(prices, {
+            (self.product.id, self.customer.id, today): 90.0,
+            (self.product.id, self.customer.id, yesterday): 90.0,
+            (other_product.id, self.customer.id, today): 110.0,
+        }, "Fallback harus memakai harga terakhir sebelum tanggal")
+        
+        # Helpers on product and customer delegate to the resolver
+        products = self.product | other_product
+        self.assertEqual(products.get_daily_prices(self.customer.id, today), {other_product.id: 110.0})
+        self.assertEqual(self.customer.get_daily_prices_for_products(products.ids, today, fallback=True),
+                        {self.product.id: 90.0, other_product.id: 110.0})
+        self.assertEqual(self.product.get_daily_price(self.customer.id, today, fallback=True), 90.0)
+        self.assertFalse(self.product.check_daily_price_exists(self.customer.id, today))
+
+    def test_27_unique_product_customer_date_batch(self):
+        """Test 27: Test duplicates inside one batch and on write are rejected readably"""
+        tomorrow = fields.Date.today() + timedelta(days=1)
+        
+        # Duplicate inside a single batch create
+        with self.assertRaises(ValidationError) as context:
+            self.env['daily.price'].create([self.daily_price_data, dict(self.daily_price_data)])
+        self.assertIn('A daily price record already exists for product "Test Product"', str(context.exception))
+        self.assertFalse(self.env['daily.price'].search([('product_id', '=', self.product.id)]),
+                        "Tidak ada record yang tersimpan dari batch yang gagal")
+        
+        # Batch without duplicates succeeds
+        daily_prices = self.env['daily.price'].create([
+            self.daily_price_data,
+            dict(self.daily_price_data, date=tomorrow),
+        ])
+        self.assertEqual(len(daily_prices), 2)
+        
+        # Moving a price onto an existing date fails
+        with self.assertRaises(ValidationError) as context:
+            daily_prices[1].write({'date': fields.Date.today()})
+        self.assertIn("already exists", str(context.exception))
+        self.assertEqual(daily_prices[1].date, tomorrow)
+
+    def test_28_fill_forward(self):
+        """Test 28: Test fill_forward carries prices over missing dates only"""
+        start = fields.Date.today() - timedelta(days=10)
+        other_customer = self.env['res.partner'].create({'name': 'Other Customer'})
+        friday_prices = self.env['daily.price'].create([
+            dict(self.daily_price_data, date=start, unit_price=100.0),
+            dict(self.daily_price_data, customer_id=other_customer.id, date=start, unit_price=200.0),
+        ])
+        # Harga baru yang sudah diinput untuk hari ketiga
+        self.env['daily.price'].create(dict(self.daily_price_data, date=start + timedelta(days=2), unit_price=120.0))
+        
+        result = friday_prices.fill_forward(start + timedelta(days=3))
+        
+        self.assertEqual(result, {'created': 5, 'skipped': 1})
+        prices = self.env['daily.price'].get_prices_for_keys([
+            (self.product.id, self.customer.id, start + timedelta(days=1)),
+            (self.product.id, self.customer.id, start + timedelta(days=3)),
+            (self.product.id, other_customer.id, start + timedelta(days=3)),
+        ])
+        self.assertEqual(prices[self.product.id, self.customer.id, start + timedelta(days=1)], 100.0)
+        self.assertEqual(prices[self.product.id, self.customer.id, start + timedelta(days=3)], 120.0,
+                        "Harga yang lebih baru harus dipakai setelah tanggalnya")
+        self.assertEqual(prices[self.product.id, other_customer.id, start + timedelta(days=3)], 200.0)
+        
+        # Running again creates nothing
+        result = friday_prices.fill_forward(start + timedelta(days=3))
+        self.assertEqual(result, {'created': 0, 'skipped': 6})
+
+    def test_29_fill_forward_wizard(self):
+        """Test 29: Test fill forward wizard with a start date"""
+        start = fields.Date.today() - timedelta(days=5)
+        daily_price = self.env['daily.price'].create(dict(self.daily_price_data, date=start))
+        
+        wizard = self.env['daily.price.fill.forward.wizard'].with_context(
+            active_model='daily.price', active_ids=daily_price.ids,
+        ).create({
+            'date_from': start + timedelta(days=3),
+            'date_to': start + timedelta(days=4),
+        })
+        self.assertEqual(wizard.daily_price_ids, daily_price)
+        self.assertEqual(wizard.pair_count, 1)
+        
+        result = wizard.action_fill_forward()
+        self.assertEqual(result['params']['type'], 'success')
+        filled_dates = self.env['daily.price'].search([
+            ('product_id', '=', self.product.id),
+            ('customer_id', '=', self.customer.id),
+            ('date', '>', start),
+        ]).mapped('date')
+        self.assertEqual(sorted(filled_dates), [start + timedelta(days=3), start + timedelta(days=4)],
+                        "Tanggal sebelum date_from tidak boleh diisi")
+
+    def test_30_daily_price_matrix(self):
+        """Test 30: Test price matrix change and moving averages after refresh"""
+        start = fields.Date.today() - timedelta(days=40)
+        self.env['daily.price'].create([
+            dict(self.daily_price_data, date=start, unit_price=100.0),
+            dict(self.daily_price_data, date=start + timedelta(days=1), unit_price=110.0),
+            dict(self.daily_price_data, date=start + timedelta(days=3), unit_price=130.0),
+            dict(self.daily_price_data, date=start + timedelta(days=10), unit_price=150.0),
+        ])
+        
+        matrix = self.env['daily.price.matrix']
+        matrix.refresh_view()
+        rows = matrix.search([
+            ('product_id', '=', self.product.id),
+            ('customer_id', '=', self.customer.id),
+        ], order='date')
+        self.assertEqual(len(rows), 4, "Setiap daily price harus muncul di matrix")
+        
+        self.assertFalse(rows[0].previous_price)
+        self.assertEqual(rows[1].previous_price, 100.0)
+        self.assertEqual(rows[1].price_change, 10.0)
+        self.assertEqual(rows[1].price_change_percent, 10.0)
+        self.assertAlmostEqual(rows[2].moving_avg_7d, 340.0 / 3, places=2)
+        # Hari ke-10 hanya melihat 7 hari ke belakang
+        self.assertEqual(rows[3].moving_avg_7d, 150.0)
+        self.assertAlmostEqual(rows[3].moving_avg_30d, 122.5, places=2)
+
+    def test_31_batch_sequence_block(self):
+        """Test 31: A create batch is numbered from one contiguous sequence block"""
+        sequence = self.env.ref('sale_mill.seq_daily_price')
+        self.assertEqual(sequence.implementation, 'standard', "Sequence tanpa row lock (gap diperbolehkan)")
+        
+        daily_prices = self.env['daily.price'].create([
+            dict(self.daily_price_data, date=fields.Date.today() - timedelta(days=days))
+            for days in range(3)
+        ] + [dict(self.daily_price_data, date=fields.Date.today() - timedelta(days=3), name='DP-MANUAL')])
+        
+        numbers = [int(name[len('DP'):]) for name in daily_prices[:3].mapped('name')]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 3)), "Nomor harus berurutan dalam satu blok")
+        self.assertEqual(daily_prices[3].name, 'DP-MANUAL', "Nama yang diisi manual tidak diganti")
@@ -0,0 +1,136 @@
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import UserError
+from odoo import fields
+from datetime import timedelta
+import base64
+
+
+class TestDailyPriceImport(TransactionCase):
+    """Unit test for DailyPriceImportWizard"""
+
+    def setUp(self):
+        """Setup method that runs before each test"""
+        super(TestDailyPriceImport, self).setUp()
+
+        self.customer = self.env['res.partner'].create({
+            'name': 'Import Customer',
+            'ref': 'CUST-01',
+        })
+        self.product = self.env['product.product'].create({
+            'name': 'Import CPO',
+            'default_code': 'CPO',
+        })
+        self.today = fields.Date.today()
+
+    def _import(self, lines, **values):
+        """Run the import wizard on the given CSV lines"""
+        content = '\n'.join(['product_code,customer_code,date,unit_price,notes'] + lines) + '\n'
+        wizard = self.env['daily.price.import.wizard'].create(dict({
+            'file': base64.b64encode(content.encode()),
+            'filename': 'prices.csv',
+        }, **values))
+        wizard.action_import()
+        return wizard
+
+    def _get_price(self, date):
+        return self.env['daily.price'].search([
+            ('product_id', '=', self.product.id),
+            ('customer_id', '=', self.customer.id),
+            ('date', '=', date),
+        ])
+
+    def test_01_import_creates_prices(self):
+        """Test 1: Import creates daily prices with reference and display name"""
+        yesterday = self.today - timedelta(days=1)
+        wizard = self._import([
+            f'CPO,CUST-01,{self.today},12500,Harga pagi',
+            f'CPO,CUST-01,{yesterday},12400,',
+        ])
+
+        self.assertEqual(wizard.state, 'done')
+        self.assertEqual(wizard.created_count, 2)
+        self.assertEqual(wizard.error_count, 0)
+
+        price = self._get_price(self.today)
+        self.assertEqual(price.unit_price, 12500.0)
+        self.assertEqual(price.notes, 'Harga pagi')
+        self.assertTrue(price.name.startswith('DP'), "Record import harus mendapat nomor sequence")
+        self.assertEqual(price.display_name, f"{self.today} - Import CPO - Import Customer")
+        self.assertEqual(price.company_id, self.env.company)
+        cron = self.env.ref('sale_mill.ir_cron_refresh_daily_price_matrix')
+        self.assertTrue(self.env['ir.cron.trigger'].search([('cron_id', '=', cron.id)]),
+                        "Matrix di-refresh oleh cron, bukan di dalam import")
+
+    def test_02_import_updates_existing(self):
+        """Test 2: Import updates the price of an existing product-customer-date row"""
+        existing = self.env['daily.price'].create({
+            'product_id': self.product.id,
+            'customer_id': self.customer.id,
+            'date': self.today,
+            'unit_price': 100.0,
+            'notes': 'Manual',
+        })
+
+        wizard = self._import([f'CPO,CUST-01,{self.today},150,'])
+
+        self.assertEqual(wizard.created_count, 0)
+        self.assertEqual(wizard.updated_count, 1)
+        self.assertEqual(existing.unit_price, 150.0)
+        self.assertEqual(existing.notes, 'Manual', "Notes kosong tidak boleh menghapus notes lama")
+        self.assertEqual(self._get_price(self.today), existing, "Tidak boleh ada record duplikat")
+
+        wizard = self._import([f'CPO,CUST-01,{self.today},175,'], update_existing=False)
+        self.assertEqual(wizard.skipped_count, 1)
+        self.assertEqual(existing.unit_price, 150.0, "Harga lama tidak boleh berubah tanpa update existing")
+
+    def test_03_import_reports_row_errors(self):
+        """Test 3: Bad rows are reported without stopping the import"""
+        wizard = self._import([
+            f'UNKNOWN,CUST-01,{self.today},100,',
+            f'CPO,NOBODY,{self.today},100,',
+            'CPO,CUST-01,not-a-date,100,',
+            f'CPO,CUST-01,{self.today},-5,',
+            f'CPO,CUST-01,{self.today + timedelta(days=400)},100,',
+            f'CPO,CUST-01,{self.today},200,',
+        ])
+
+        self.assertEqual(wizard.created_count, 1, "Baris yang valid tetap harus diimport")
+        self.assertEqual(wizard.error_count, 5)
+        self.assertIn('Row 2: Unknown product code "UNKNOWN"', wizard.error_log)
+        self.assertIn('Row 3: Unknown customer code "NOBODY"', wizard.error_log)
+        self.assertIn('Row 4: Invalid date', wizard.error_log)
+        self.assertIn('Row 5: Unit price must be greater than zero.', wizard.error_log)
+        self.assertIn('Row 6: Price date cannot be more than 1 year in the future.', wizard.error_log)
+        self.assertEqual(self._get_price(self.today).unit_price, 200.0)
+
+    def test_04_import_duplicate_rows_in_file(self):
+        """Test 4: The last row wins when a file repeats a product-customer-date"""
+        wizard = self._import([
+            f'CPO,CUST-01,{self.today},100,',
+            f'CPO,CUST-01,{self.today},110,',
+        ])
+
+        self.assertEqual(wizard.created_count, 1)
+        self.assertIn('Row 2: Superseded by row 3', wizard.error_log)
+        self.assertEqual(self._get_price(self.today).unit_price, 110.0)
+
+    def test_05_import_missing_column(self):
+        """Test 5: A file without the required columns is rejected"""
+        wizard = self.env['daily.price.import.wizard'].create({
+            'file': base64.b64encode(b'product_code,date\nCPO,2024-01-01\n'),
+            'filename': 'prices.csv',
+        })
+        with self.assertRaises(UserError):
+            wizard.action_import()
+
+    def test_06_import_flags_products_with_daily_pricing(self):
+        """Test 6: Importing the first price of a product sets its has_daily_pricing flag"""
+        self.assertFalse(self.product.has_daily_pricing)
+
+        self._import([f'CPO,CUST-01,{self.today},12500,'])
+
+        self.assertTrue(self.product.has_daily_pricing, "Produk yang diimport harus punya daily pricing")
+        self.assertEqual(
+            self.env['product.product'].search([('has_daily_pricing', '=', True), ('id', '=', self.product.id)]),
+            self.product, "Flag harus tersimpan di database",
+        )
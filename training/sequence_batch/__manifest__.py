@@ -0,0 +1,20 @@
+{
+    'name': 'Sequence Batch',
+    'version': '1.0',
+    'category': 'Technical',
+    'summary': 'Reserve a block of sequence numbers in one call',
+    'description': """
+        This module provides functionality to:
+        - Draw the numbers of a whole create batch from a sequence at once
+        - Use one nextval call for standard sequences and one row update for no-gap sequences
+    """,
+    'author': 'Tyo',
+    'depends': [
+        'base',
+    ],
+    'data': [],
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+    'license': 'LGPL-3',
+}
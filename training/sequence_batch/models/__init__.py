@@ -0,0 +1 @@
+from . import ir_sequence
@@ -0,0 +1,43 @@
+from odoo import models, api
+from odoo.tools import SQL
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    @api.model
+    def next_by_code_batch(self, sequence_code, count, sequence_date=None):
+        """Reserve ``count`` numbers of the sequence ``sequence_code`` in one block
+
+        The sequence is looked up like next_by_code does. Returns the formatted
+        numbers in order, or an empty list when no sequence matches.
+        """
+        if count <= 0:
+            return []
+        self.browse().check_access('read')
+        company_id = self.env.company.id
+        sequence = self.search([('code', '=', sequence_code), ('company_id', 'in', [company_id, False])],
+                               order='company_id', limit=1)
+        if not sequence:
+            return []
+        return sequence._next_batch(count, sequence_date=sequence_date)
+
+    def _next_batch(self, count, sequence_date=None):
+        """Return the next ``count`` formatted numbers of this sequence, drawn at once"""
+        self.ensure_one()
+        if self.use_date_range:
+            # Date range sub-sequences keep their own counters
+            return [self._next(sequence_date=sequence_date) for _i in range(count)]
+
+        if self.implementation == 'standard':
+            self.env.cr.execute(SQL(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                f'ir_sequence_{self.id:03d}', count,
+            ))
+            numbers = [number for number, in self.env.cr.fetchall()]
+        else:
+            first_number = self._update_nogap(self.number_increment * count)
+            numbers = range(first_number, first_number + self.number_increment * count, self.number_increment)
+
+        prefix, suffix = self._get_prefix_suffix()
+        return [prefix + '%%0%sd' % self.padding % number + suffix for number in numbers]
@@ -0,0 +1 @@
+from . import test_ir_sequence
@@ -0,0 +1,94 @@
+from odoo.tests.common import TransactionCase
+from datetime import date
+
+
+class TestIrSequenceBatch(TransactionCase):
+    """Unit test for next_by_code_batch of IrSequence"""
+
+    def setUp(self):
+        """Setup method that runs before each test"""
+        super(TestIrSequenceBatch, self).setUp()
+        
+        # One sequence per implementation
+        self.standard_sequence = self.env['ir.sequence'].create({
+            'name': 'Test Batch Standard',
+            'code': 'test.batch.standard',
+            'prefix': 'TS/',
+            'padding': 4,
+            'implementation': 'standard',
+        })
+        self.nogap_sequence = self.env['ir.sequence'].create({
+            'name': 'Test Batch No Gap',
+            'code': 'test.batch.nogap',
+            'prefix': 'TN/',
+            'padding': 4,
+            'number_increment': 2,
+            'implementation': 'no_gap',
+        })
+        self.date_range_sequence = self.env['ir.sequence'].create({
+            'name': 'Test Batch Date Range',
+            'code': 'test.batch.range',
+            'prefix': 'TR/%(range_year)s/',
+            'padding': 4,
+            'use_date_range': True,
+            'implementation': 'standard',
+        })
+
+    def _number_next_actual(self, sequence):
+        """Next number of the sequence, read again from the database"""
+        sequence.invalidate_recordset(['number_next_actual'])
+        return sequence.number_next_actual
+
+    def test_batch_count_zero(self):
+        """Test 1: A count of 0 returns nothing and does not consume numbers"""
+        IrSequence = self.env['ir.sequence']
+        for sequence in (self.standard_sequence, self.nogap_sequence, self.date_range_sequence):
+            number_next = self._number_next_actual(sequence)
+            self.assertEqual(IrSequence.next_by_code_batch(sequence.code, 0), [])
+            self.assertEqual(self._number_next_actual(sequence), number_next,
+                             "Count 0 tidak boleh memajukan sequence %s" % sequence.code)
+        self.assertEqual(IrSequence.next_by_code_batch('test.batch.unknown', 3), [],
+                         "Code tanpa sequence mengembalikan list kosong")
+
+    def test_batch_standard(self):
+        """Test 2: Standard sequences draw contiguous numbers and advance past them"""
+        IrSequence = self.env['ir.sequence']
+        self.assertEqual(IrSequence.next_by_code_batch('test.batch.standard', 1), ['TS/0001'])
+        self.assertEqual(self._number_next_actual(self.standard_sequence), 2)
+        
+        numbers = IrSequence.next_by_code_batch('test.batch.standard', 5)
+        self.assertEqual(numbers, ['TS/0002', 'TS/0003', 'TS/0004', 'TS/0005', 'TS/0006'],
+                         "Nomor batch harus berurutan tanpa celah")
+        self.assertEqual(self._number_next_actual(self.standard_sequence), 7)
+        self.assertEqual(IrSequence.next_by_code('test.batch.standard'), 'TS/0007',
+                         "next_by_code melanjutkan setelah batch")
+
+    def test_batch_nogap(self):
+        """Test 3: No-gap sequences reserve the block in one update, with their increment"""
+        IrSequence = self.env['ir.sequence']
+        self.assertEqual(IrSequence.next_by_code_batch('test.batch.nogap', 1), ['TN/0001'])
+        self.assertEqual(self.nogap_sequence.number_next, 3)
+        
+        numbers = IrSequence.next_by_code_batch('test.batch.nogap', 4)
+        self.assertEqual(numbers, ['TN/0003', 'TN/0005', 'TN/0007', 'TN/0009'],
+                         "Nomor batch mengikuti number_increment")
+        self.assertEqual(self.nogap_sequence.number_next, 11)
+        self.assertEqual(IrSequence.next_by_code('test.batch.nogap'), 'TN/0011')
+
+    def test_batch_date_range(self):
+        """Test 4: Date range sequences number the batch within the range of the given date"""
+        IrSequence = self.env['ir.sequence']
+        self.assertEqual(IrSequence.next_by_code_batch('test.batch.range', 1, sequence_date=date(2024, 3, 15)),
+                         ['TR/2024/0001'])
+        numbers = IrSequence.next_by_code_batch('test.batch.range', 3, sequence_date=date(2024, 6, 1))
+        self.assertEqual(numbers, ['TR/2024/0002', 'TR/2024/0003', 'TR/2024/0004'])
+        
+        # Another year has its own counter
+        self.assertEqual(IrSequence.next_by_code_batch('test.batch.range', 2, sequence_date=date(2025, 1, 10)),
+                         ['TR/2025/0001', 'TR/2025/0002'])
+        
+        date_ranges = self.date_range_sequence.date_range_ids.sorted('date_from')
+        self.assertEqual(len(date_ranges), 2)
+        date_ranges.invalidate_recordset(['number_next_actual'])
+        self.assertEqual(date_ranges.mapped('number_next_actual'), [5, 3],
+                         "Setiap date range maju sesuai jumlah nomor yang diambil")